@@ -0,0 +1,51 @@
+import re
+import threading
+from app.core.logger import logger
+from app.database.mongodb import rename_session
+
+HEURISTIC_TITLE_WORDS = 6
+MAX_TITLE_CHARS = 40
+
+# Titles generated in the background, waiting for their session's next rerun: {session_id: title}
+_generated = {}
+_generated_lock = threading.Lock()
+
+
+def heuristic_title(first_query):
+    """Instant stand-in title: the first few words of the user's first message."""
+    words = re.findall(r"[\w'’-]+", first_query)[:HEURISTIC_TITLE_WORDS]
+    title = " ".join(words)
+    if len(title) > MAX_TITLE_CHARS:
+        title = title[:MAX_TITLE_CHARS].rsplit(" ", 1)[0] + "..."
+    return title[:1].upper() + title[1:] if title else "Untitled chat"
+
+
+def start_title_generation(session_id, first_query):
+    """Asks the title model for a title in a background thread.
+
+    The title is written to the session's Mongo records when ready, and handed to the UI by
+    take_generated_title on the session's next rerun.
+
+    Args:
+        session_id (str): ID of the session.
+        first_query (str): User's first message of the session.
+    """
+    def _run():
+        # Imported here: the LLM stack is heavy and the Dashboard never needs it
+        from app.core.llm import get_chat_title
+
+        title = get_chat_title(first_query)
+        if not title or title == heuristic_title(first_query):
+            return
+        rename_session(session_id, title)
+        with _generated_lock:
+            _generated[session_id] = title
+        logger.info(f"Titled session {session_id}: {title}")
+
+    threading.Thread(target=_run, name="chat-title", daemon=True).start()
+
+
+def take_generated_title(session_id):
+    """The session's background-generated title, once, if it has arrived."""
+    with _generated_lock:
+        return _generated.pop(session_id, None)
@@ -7,6 +7,7 @@ class MySettings(BaseSettings):
     QDRANT_URL: str
     QDRANT_PATH: str
     GEMINI_API_KEY: str
+    OPENAI_API_KEY: str = ""
     
     # Base Info
     USER_NAME: str
@@ -28,6 +29,87 @@ class MySettings(BaseSettings):
     GROQ_MODEL_NAME: str
     GOOGLE_GENAI_MODEL_NAME: str
     CHAT_TITLE_MODEL_NAME: str
+
+    # Per-stage deadlines for a chat turn (seconds)
+    CONTEXT_STAGE_TIMEOUT_SECONDS: float = 2.5
+    PERSIST_STAGE_TIMEOUT_SECONDS: float = 1.0
+    CLIENT_STAGE_TIMEOUT_SECONDS: float = 15.0
+    # Research context gets this long while the embedding model is still loading (first turn only)
+    EMBEDDING_WARMUP_TIMEOUT_SECONDS: float = 60.0
+
+    # LLM clients: local model residency/warm-up, pooled HTTP connections, provider health
+    OLLAMA_KEEP_ALIVE: str = "30m"
+    OLLAMA_WARMUP: bool = True
+    LLM_REQUEST_TIMEOUT_SECONDS: float = 120.0
+    LLM_HTTP_MAX_CONNECTIONS: int = 10
+    LLM_HTTP_KEEPALIVE_SECONDS: float = 120.0
+    PROVIDER_HEALTH_WINDOW: int = 20
+    PROVIDER_DEGRADED_AFTER_FAILURES: int = 3
+    PROVIDER_RETRY_AFTER_SECONDS: float = 60.0
+
+    # "Auto" provider routing: a provider that hasn't streamed a token by the deadline is
+    # abandoned for the next one. Hosted providers carry a fixed penalty so short chats stay
+    # local, and local prefill cost grows with the prompt so long contexts go to a hosted model.
+    FIRST_TOKEN_DEADLINE_SECONDS: float = 8.0
+    ROUTER_HOSTED_PENALTY_MS: float = 500.0
+    ROUTER_OLLAMA_PREFILL_MS_PER_1K_TOKENS: float = 400.0
+    ROUTER_HOSTED_PREFILL_MS_PER_1K_TOKENS: float = 20.0
+
+    # Streamed answers reach the UI in coalesced flushes: at most one per interval (or per N chars)
+    STREAM_FLUSH_INTERVAL_SECONDS: float = 0.05
+    STREAM_FLUSH_MAX_CHARS: int = 1000
+
+    # Mongo database and write-behind queue
+    MONGO_DATABASE: str = "ProjectAVA"
+    MONGO_SPOOL_PATH: str = "./data/mongo_spool.jsonl"
+    MONGO_WRITE_BATCH_SIZE: int = 50
+    MONGO_WRITE_FLUSH_SECONDS: float = 1.0
+
+    # Where life logs are mirrored after the local SQLite write: "mongo" or "none"
+    LOG_SYNC_TARGET: str = "mongo"
+
+    # Telemetry: latency samples kept per stage for p50/p95, and the local /metrics port (0 = off)
+    TELEMETRY_WINDOW: int = 500
+    METRICS_PORT: int = 0
+
+    # Sidebar session list
+    SESSION_PAGE_SIZE: int = 20
+    SESSION_LIST_CACHE_SECONDS: float = 30.0
+
+    # Chat window: messages fetched/rendered per page, and the most kept in memory per session
+    CHAT_PAGE_SIZE: int = 30
+    CHAT_MAX_LOADED_MESSAGES: int = 200
+
+    # Conversation memory: last K turns verbatim + a rolling summary of everything older
+    MEMORY_RECENT_TURNS: int = 3
+    MEMORY_HISTORY_TOKEN_BUDGET: int = 1200
+    MEMORY_SUMMARY_MAX_WORDS: int = 150
+    MEMORY_MAX_SESSIONS: int = 64
+
+    # Vector backend: "local" (embedded, QDRANT_PATH), "server" (QDRANT_URL) or "memory"
+    QDRANT_MODE: str = "local"
+    QDRANT_PREFER_GRPC: bool = False
+    QDRANT_HNSW_M: int = 16
+    QDRANT_HNSW_EF_CONSTRUCT: int = 100
+    QDRANT_ON_DISK_PAYLOAD: bool = True
+    QDRANT_QUANTIZATION_THRESHOLD: int = 50_000
+
+    # Research retrieval
+    RESEARCH_TOP_K: int = 3
+    RESEARCH_CANDIDATES: int = 20
+    RESEARCH_RERANK: bool = False
+    RESEARCH_RERANK_MODEL: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    RESEARCH_LATENCY_BUDGET_MS: int = 400
+
+    # Semantic response cache
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_MAX_ENTRIES: int = 256
+    RESPONSE_CACHE_TTL_SECONDS: int = 6 * 3600
+    RESPONSE_CACHE_SIMILARITY: float = 0.95
+
+    # Embedding cache
+    EMBEDDING_CACHE_PATH: str = "./data/embedding_cache.db"
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 200_000
     
     model_config = SettingsConfigDict(env_file=".env")
     
@@ -0,0 +1,174 @@
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from app.core.config import settings
+from app.core.logger import logger
+
+# --- TOKEN COUNTING ---
+# OpenAI gets its exact tiktoken encoding. Groq/Ollama serve Llama-family models and Gemini uses
+# SentencePiece; cl100k is a close stand-in for those, padded by a small safety factor so we
+# undercount less often than we overcount. Without tiktoken we fall back to ~4 chars per token.
+TOKEN_SAFETY_FACTOR = {
+    "OpenAI": 1.0,
+    "Groq": 1.1,
+    "Ollama (Local)": 1.1,
+    "Gemini 3 Flash": 1.15,
+}
+CHARS_PER_TOKEN = 4
+
+# Minimum shared prefix/suffix (chars) treated as splitter overlap between two chunks
+MIN_OVERLAP_CHARS = 40
+NEAR_DUPLICATE_JACCARD = 0.8
+SHINGLE_SIZE = 5
+MIN_SHINGLES_FOR_NEAR_DUP = 20
+
+
+@lru_cache(maxsize=8)
+def _get_encoding(provider):
+    try:
+        import tiktoken
+
+        if provider == "OpenAI":
+            try:
+                return tiktoken.encoding_for_model(settings.OPENAI_MODEL_NAME)
+            except KeyError:
+                return tiktoken.get_encoding("o200k_base")
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # tiktoken downloads its BPE files on first use, which fails on an offline box
+        logger.warning(f"No tokenizer for {provider}, estimating {CHARS_PER_TOKEN} chars per token. ({e})")
+        return None
+
+
+def count_tokens(text, provider="Ollama (Local)"):
+    """Approximate prompt tokens of `text` for the given provider."""
+    if not text:
+        return 0
+    encoding = _get_encoding(provider)
+    raw = len(encoding.encode(text, disallowed_special=())) if encoding else len(text) / CHARS_PER_TOKEN
+    return int(raw * TOKEN_SAFETY_FACTOR.get(provider, 1.1)) + 1
+
+
+@dataclass
+class ContextPiece:
+    """One candidate block of context. Higher priority is packed first."""
+    text: str
+    source: str
+    priority: float
+    order: int = 0
+
+
+@dataclass
+class AssembledContext:
+    text: str
+    tokens: int
+    budget: int
+    included: list = field(default_factory=list)
+    dropped: int = 0
+    deduplicated: int = 0
+
+
+def _normalize(text):
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def _shingles(text):
+    words = _normalize(text).split()
+    if len(words) < SHINGLE_SIZE:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def _strip_overlap(previous, text):
+    """Drops the head of `text` that repeats the tail of `previous` (text-splitter overlap)."""
+    longest = min(len(previous), len(text)) - 1
+    for size in range(longest, MIN_OVERLAP_CHARS - 1, -1):
+        if previous.endswith(text[:size]):
+            return text[size:].lstrip()
+    return text
+
+
+def deduplicate(pieces):
+    """Removes exact and near-duplicate pieces and trims overlap between adjacent chunks.
+
+    Returns:
+        tuple[list[ContextPiece], int]: surviving pieces and how many were dropped or trimmed.
+    """
+    kept = []
+    seen_exact = set()
+    seen_shingles = []
+    removed = 0
+
+    for piece in pieces:
+        key = _normalize(piece.text)
+        if not key or key in seen_exact:
+            removed += 1
+            continue
+
+        # Short pieces (single log lines) legitimately look alike, so only compare real passages
+        shingles = _shingles(piece.text)
+        is_passage = len(shingles) >= MIN_SHINGLES_FOR_NEAR_DUP
+        if is_passage and any(len(shingles & other) / len(shingles | other) >= NEAR_DUPLICATE_JACCARD
+                              for other in seen_shingles):
+            removed += 1
+            continue
+
+        text = piece.text
+        for other in kept:
+            if other.source == piece.source:
+                trimmed = _strip_overlap(other.text, text)
+                if trimmed != text:
+                    text = trimmed
+                    removed += 1
+                    break
+
+        seen_exact.add(key)
+        seen_shingles.append(shingles)
+        kept.append(ContextPiece(text=text, source=piece.source, priority=piece.priority, order=piece.order))
+    return kept, removed
+
+
+def assemble_context(pieces, budget, provider="Ollama (Local)"):
+    """Packs the highest-priority pieces into a token budget.
+
+    Pieces are deduplicated, then taken greedily by priority; anything that doesn't fit is
+    skipped (a smaller, lower-priority piece may still fit). The survivors keep their original
+    order so chunks and logs read naturally.
+
+    Args:
+        pieces (list[ContextPiece]): Candidate context blocks.
+        budget (int): Max tokens for the whole context block.
+        provider (str, optional): LLM provider, for token counting.
+
+    Returns:
+        AssembledContext: final text and its token count.
+    """
+    for index, piece in enumerate(pieces):
+        piece.order = index
+    unique, deduplicated = deduplicate(pieces)
+
+    chosen = []
+    used = 0
+    for piece in sorted(unique, key=lambda p: p.priority, reverse=True):
+        cost = count_tokens(piece.text, provider)
+        if used + cost <= budget:
+            chosen.append(piece)
+            used += cost
+
+    chosen.sort(key=lambda p: p.order)
+    text = "\n\n".join(piece.text for piece in chosen)
+    assembled = AssembledContext(text=text,
+                                 tokens=count_tokens(text, provider),
+                                 budget=budget,
+                                 included=[piece.source for piece in chosen],
+                                 dropped=len(unique) - len(chosen),
+                                 deduplicated=deduplicated)
+    logger.info(f"Context assembled: {assembled.tokens}/{budget} tokens, {len(chosen)} pieces, "
+                f"{assembled.dropped} over budget, {deduplicated} deduplicated")
+    return assembled
+
+
+def pieces_from_ranked(texts, source):
+    """Ranked texts (best first, e.g. retrieved chunks or newest logs) -> ContextPieces."""
+    return [ContextPiece(text=text, source=source, priority=1.0 / (rank + 1))
+            for rank, text in enumerate(texts)]
@@ -0,0 +1,205 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, UTC
+from langchain_classic.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+from app.core.config import settings
+from app.core.context_assembler import count_tokens
+from app.core.llm_factory import get_summary_llm
+from app.core.logger import logger
+from app.database.mongodb import get_session_memory, get_session_messages_page, save_session_memory
+
+# Messages kept for folding while the summarizer is unreachable; older ones are dropped
+MAX_PENDING_MESSAGES = 40
+
+# Folds run one at a time, off the request path; a turn never waits for a summary
+_summary_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ava-memory")
+
+SUMMARY_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You maintain the running memory of a conversation between a user and Ava. "
+               "Merge the new messages into the existing summary. Keep facts, decisions, numbers, "
+               "names and open questions; drop pleasantries. Write plain prose under {max_words} words. "
+               "Return ONLY the updated summary."),
+    ("user", "EXISTING SUMMARY:\n{summary}\n\nNEW MESSAGES:\n{messages}"),
+])
+
+
+def _empty_stats():
+    return {"turns": 0, "history_tokens": 0, "full_history_tokens": 0, "summarized_messages": 0}
+
+
+@dataclass
+class MemorySnapshot:
+    """What goes into one prompt: the rolling summary and the verbatim recent messages."""
+    summary: str
+    messages: list
+    tokens: int
+
+    def as_text(self):
+        """Flat form, used to fingerprint cached answers."""
+        return self.summary + "\n" + "\n".join(f"{role}: {content}" for role, content in self.messages)
+
+
+@dataclass
+class ConversationMemory:
+    """Last K turns verbatim plus a rolling summary of everything older, for one session.
+
+    Messages that fall out of the verbatim window wait in `pending` until the background
+    summarizer folds them into `summary`. Prompt cost stays bounded by the token budget however
+    long the session runs; `stats` tracks what sending the whole history would have cost instead.
+    """
+    session_id: str
+    summary: str = ""
+    recent: list = field(default_factory=list)
+    pending: list = field(default_factory=list)
+    stats: dict = field(default_factory=_empty_stats)
+    # Tokens of every message seen so far, i.e. the cost of sending the full history
+    total_message_tokens: int = 0
+    folding: bool = False
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def snapshot(self, provider):
+        """Summary + the newest recent messages that fit MEMORY_HISTORY_TOKEN_BUDGET."""
+        with self.lock:
+            summary, recent = self.summary, list(self.recent)
+
+        budget = settings.MEMORY_HISTORY_TOKEN_BUDGET
+        used = count_tokens(summary, provider)
+        messages = []
+        for role, content in reversed(recent):
+            tokens = count_tokens(content, provider)
+            if used + tokens > budget:
+                break
+            messages.append((role, content))
+            used += tokens
+        return MemorySnapshot(summary=summary, messages=messages[::-1], tokens=used)
+
+    def record_turn(self, user_message, assistant_message, provider, history_tokens):
+        """Adds a finished turn, updates the savings stats and schedules a fold if needed."""
+        with self.lock:
+            self.stats["turns"] += 1
+            self.stats["history_tokens"] += history_tokens
+            self.stats["full_history_tokens"] += self.total_message_tokens
+            self.total_message_tokens += count_tokens(user_message, provider) + count_tokens(assistant_message, provider)
+
+            self.recent.extend([("user", user_message), ("assistant", assistant_message)])
+            overflow = len(self.recent) - settings.MEMORY_RECENT_TURNS * 2
+            if overflow > 0:
+                self.pending.extend(self.recent[:overflow])
+                del self.recent[:overflow]
+            if len(self.pending) > MAX_PENDING_MESSAGES:
+                logger.warning(f"Summarizer is behind for {self.session_id}, dropping "
+                               f"{len(self.pending) - MAX_PENDING_MESSAGES} unsummarized messages")
+                del self.pending[:-MAX_PENDING_MESSAGES]
+            schedule = bool(self.pending) and not self.folding
+            if schedule:
+                self.folding = True
+
+        saved = self.stats["full_history_tokens"] - self.stats["history_tokens"]
+        logger.info(f"Memory for {self.session_id}: {history_tokens} history tokens this turn, "
+                    f"{saved} saved over {self.stats['turns']} turns")
+        if schedule:
+            _summary_executor.submit(self._fold)
+        else:
+            self._persist()
+
+    # --- BACKGROUND SUMMARY ---
+    def _fold(self):
+        try:
+            while True:
+                with self.lock:
+                    batch, summary = list(self.pending), self.summary
+                    if not batch:
+                        self.folding = False
+                        break
+                try:
+                    new_summary = _summarize(summary, batch)
+                except Exception as e:
+                    # Keep the messages pending; the next turn retries the fold
+                    logger.warning(f"Conversation summary for {self.session_id} failed: {e}")
+                    with self.lock:
+                        self.folding = False
+                    break
+                with self.lock:
+                    self.summary = new_summary
+                    del self.pending[:len(batch)]
+                    self.stats["summarized_messages"] += len(batch)
+        finally:
+            self._persist()
+
+    def _persist(self):
+        with self.lock:
+            memory = {
+                "summary": self.summary,
+                "stats": dict(self.stats),
+                "total_message_tokens": self.total_message_tokens,
+                "updated_at": datetime.now(UTC),
+            }
+        save_session_memory(self.session_id, memory)
+
+
+def _summarize(summary, messages):
+    chain = SUMMARY_PROMPT | get_summary_llm() | StrOutputParser()
+    transcript = "\n".join(f"{role.upper()}: {content}" for role, content in messages)
+    new_summary = chain.invoke({
+        "summary": summary or "(empty)",
+        "messages": transcript,
+        "max_words": settings.MEMORY_SUMMARY_MAX_WORDS,
+    }).strip()
+    # Small models overshoot word limits; the summary has to stay bounded regardless
+    words = new_summary.split()
+    if len(words) > settings.MEMORY_SUMMARY_MAX_WORDS * 2:
+        new_summary = " ".join(words[:settings.MEMORY_SUMMARY_MAX_WORDS * 2]) + " ..."
+    return new_summary
+
+
+# --- SESSION REGISTRY ---
+_sessions = OrderedDict()
+_sessions_lock = threading.Lock()
+
+
+def _load(session_id, before):
+    """Rebuilds a session's memory from Mongo: stored summary/stats plus its latest turns."""
+    stored = get_session_memory(session_id)
+    messages, _ = get_session_messages_page(session_id, limit=settings.MEMORY_RECENT_TURNS * 2,
+                                            before={"timestamp": before})
+    return ConversationMemory(session_id=session_id,
+                              summary=stored.get("summary", ""),
+                              recent=[(message["role"], message["content"]) for message in messages],
+                              stats={**_empty_stats(), **stored.get("stats", {})},
+                              total_message_tokens=stored.get("total_message_tokens", 0))
+
+
+def get_memory(session_id, before=None):
+    """Returns the session's memory, loading it from Mongo the first time this process sees it.
+
+    Args:
+        session_id (str): ID of the session.
+        before (datetime, optional): Only messages older than this are loaded, so the question
+            being answered right now never shows up in its own history. Defaults to now.
+    """
+    with _sessions_lock:
+        memory = _sessions.get(session_id)
+        if memory is not None:
+            _sessions.move_to_end(session_id)
+            return memory
+
+    memory = _load(session_id, before or datetime.now(UTC))
+    with _sessions_lock:
+        memory = _sessions.setdefault(session_id, memory)
+        _sessions.move_to_end(session_id)
+        while len(_sessions) > settings.MEMORY_MAX_SESSIONS:
+            _sessions.popitem(last=False)
+    return memory
+
+
+def memory_stats(session_id):
+    """Token savings of a session's memory so far (None if it isn't loaded in this process)."""
+    memory = _sessions.get(session_id)
+    if memory is None:
+        return None
+    stats = dict(memory.stats)
+    stats["tokens_saved"] = stats["full_history_tokens"] - stats["history_tokens"]
+    return stats
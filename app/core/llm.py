@@ -1,46 +1,137 @@
 from app.core.config import settings
 from app.core.prompts import SYSTEM_MODES
 from app.core.security_utils import sanitize_user_input
-from app.services.vector_engine import query_research
-from app.core.llm_factory import get_llm_client
-from app.database.mongodb import get_ava_context,save_chat_to_mongo
-from langchain_classic.prompts import ChatPromptTemplate
+from app.services.vector_engine import retrieve_research_chunks, get_embeddings, embeddings_ready
+from app.services.analytics import fitness_stats_context
+from app.core.llm_factory import AUTO, configured_api_key, get_llm_client, get_summary_llm, llm_clients
+from app.core.chat_titles import MAX_TITLE_CHARS, heuristic_title
+from app.core.provider_router import FailoverStream, Route, auto_providers, rank_providers
+from app.core.context_assembler import ContextPiece, assemble_context, count_tokens, pieces_from_ranked
+from app.core.response_cache import response_cache, context_fingerprint
+from app.core.request_pipeline import Stage, coalesce_chunks, run_stages
+from app.core.telemetry import TurnTrace, model_name
+from app.core.conversation_memory import MemorySnapshot, get_memory
+from app.database.mongodb import save_chat_to_mongo
+from app.database.repository import log_repository
+from langchain_classic.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.output_parsers import StrOutputParser
 from app.core.logger import logger, log_error_cleanly
+import re
+from datetime import datetime, UTC
 
     
+# How many candidates each source offers the context assembler; the token budget decides the rest
+RESEARCH_CANDIDATE_CHUNKS = 8
+LOG_CANDIDATES = 10
+# How a context source is named when it couldn't be loaded in time for a turn
+CONTEXT_SOURCE_LABELS = {"fitness_db": "fitness logs", "journal_db": "journal entries", "vector_store": "research documents"}
+
+def fetch_context_pieces(context_source, safe_query):
+    """Collects ranked candidate context for a mode's data source."""
+    if context_source == "fitness_db":
+        # Precomputed trends/e1RM/PRs beat raw rows: fewer tokens and nothing left for the model to add up
+        stats = fitness_stats_context()
+        if stats:
+            return [ContextPiece(text=stats, source="fitness_stats", priority=2.0)]
+        return pieces_from_ranked(log_repository.context_lines("fitness", limit=LOG_CANDIDATES), source="fitness_logs")
+    if context_source == "journal_db":
+        return pieces_from_ranked(log_repository.context_lines("journal", limit=LOG_CANDIDATES), source="journal_logs")
+    if context_source == "vector_store":
+        chunks = retrieve_research_chunks(question=safe_query, k=RESEARCH_CANDIDATE_CHUNKS)
+        if not chunks:
+            return [ContextPiece(text="No specific document context found for this query.",
+                                 source="research", priority=1.0)]
+        return pieces_from_ranked(chunks, source="research")
+    return []
+
+def _embed_for_cache(safe_query):
+    """Query vector for the response cache, or None if the embedding model isn't available."""
+    try:
+        return get_embeddings().embed_query(safe_query)
+    except Exception as e:
+        logger.warning(f"Response cache disabled for this turn: {e}")
+        return None
+
+def _get_clients(providers, api_key=None):
+    """Chat clients for the providers this turn may use (a client that can't be built counts
+    against its provider's health). Without `api_key` each provider's key comes from .env.
+    """
+    clients = {}
+    for name in providers:
+        try:
+            client = get_llm_client(provider=name, api_key=api_key or configured_api_key(name))
+        except Exception as e:
+            llm_clients.record_failure(name, e)
+            logger.warning(f"Couldn't create a {name} client: {e}")
+            continue
+        if client is not None:
+            clients[name] = client
+    return clients
+
+def _replay(text, words_per_chunk=8):
+    """Streams a cached answer back in word groups, like a live response."""
+    words = re.findall(r"\S+\s*", text)
+    for start in range(0, len(words), words_per_chunk):
+        yield "".join(words[start:start + words_per_chunk])
+
 def get_ava_response(mode, user_input, session_id, session_title, provider, api_key):
     """
     Main entry point for AVA logic. Handles routing, context fetching, 
-    and generating response.
+    and generating response. With provider "Auto" the turn goes to the provider
+    expected to answer first, failing over if it doesn't start in time.
     """
     
+    trace = TurnTrace(mode=mode, provider=provider)
+    turn_started = datetime.now(UTC)
+
     # 1. Sanitize the Input (Safety Layer)
-    safe_query = sanitize_user_input(user_input)
+    with trace.span("sanitize"):
+        safe_query = sanitize_user_input(user_input)
     if "bypass my core safety" in safe_query:
+        trace.finish(outcome="blocked")
         return safe_query
-    
-    # Logs User Query
-    save_chat_to_mongo(session_id, session_title, "user", safe_query)
 
-    # 2. Dynamic Context Fetching (Routing)
-    # We fetch data only relevant to the current mode to save tokens and improve accuracy
-    context = ""
+    # 2. Independent I/O runs side by side: logging the user query, fetching only the context
+    # relevant to the current mode, loading the session's conversation memory, warming up the LLM
+    # client and embedding the query for the response cache. A slow context source degrades to
+    # "no context" instead of stalling the turn, except while the embedding model is still loading
+    # (first research turn): that one-off load gets its own, longer deadline. The response cache
+    # is simply skipped until the model is loaded (see vector_engine.warm_up).
     mode_config = SYSTEM_MODES[mode]
-    
-    if mode_config["context_source"] == "fitness_db":
-        context = get_ava_context("fitness") 
-    elif mode_config["context_source"] == "journal_db":
-        context = get_ava_context("journal")
-    elif mode_config["context_source"] == "vector_store":
-        search_results = query_research(question=safe_query)
-        if search_results and "No relevant info found" not in search_results:
-            context = search_results
-        else:
-            context = "No specific document context found for this query."
-    else:
-        context="No specific data context needed."
-        
+    context_source = mode_config["context_source"]
+    use_cache = settings.RESPONSE_CACHE_ENABLED and mode_config.get("cache_responses") and embeddings_ready()
+    context_timeout = (settings.EMBEDDING_WARMUP_TIMEOUT_SECONDS
+                       if context_source == "vector_store" and not embeddings_ready()
+                       else settings.CONTEXT_STAGE_TIMEOUT_SECONDS)
+    stages = [
+        Stage("persist", lambda: save_chat_to_mongo(session_id, session_title, "user", safe_query),
+              timeout=settings.PERSIST_STAGE_TIMEOUT_SECONDS),
+        Stage("context", lambda: fetch_context_pieces(context_source, safe_query),
+              timeout=context_timeout, fallback=[]),
+        Stage("memory", lambda: get_memory(session_id, before=turn_started),
+              timeout=settings.CONTEXT_STAGE_TIMEOUT_SECONDS),
+        Stage("llm_client", lambda: _get_clients(auto_providers()) if provider == AUTO
+              else _get_clients([provider], api_key),
+              timeout=settings.CLIENT_STAGE_TIMEOUT_SECONDS, fallback={}),
+    ]
+    if use_cache:
+        stages.append(Stage("cache_embedding", lambda: _embed_for_cache(safe_query),
+                            timeout=settings.CONTEXT_STAGE_TIMEOUT_SECONDS))
+    results = run_stages(stages)
+    for name, result in results.items():
+        status = "timeout" if result.timed_out else "error" if result.error else "ok"
+        trace.record(name, result.elapsed_ms, status=status)
+    context_missing = context_source in CONTEXT_SOURCE_LABELS and (results["context"].timed_out
+                                                                   or results["context"].error is not None)
+
+    prompt_started = trace.elapsed_ms()
+    # Only the highest-value pieces that fit the mode's token budget make it into the prompt
+    assembled = assemble_context(results["context"].value, budget=mode_config["context_token_budget"], provider=provider)
+    context = assembled.text
+
+    # Earlier turns: a rolling summary plus the last few messages verbatim, bounded in tokens
+    memory = results["memory"].value
+    history = memory.snapshot(provider) if memory else MemorySnapshot(summary="", messages=[], tokens=0)
         
     system_prompt = mode_config['instruction']
     
@@ -61,41 +152,117 @@ def get_ava_response(mode, user_input, session_id, session_title, provider, api_
         context = "" # Ensure it's empty for the chain.invoke call
     
     # Creating prompt template
-    prompt_template = ChatPromptTemplate.from_messages([
-    ("system", "{system_instruction}"),
-    ("user", user_message_format)
-    ])
-    logger.info("Created Prompt Template")
+    prompt_messages = [("system", "{system_instruction}")]
+    if history.summary:
+        prompt_messages.append(("system", "Summary of the earlier conversation:\n{conversation_summary}"))
+    prompt_messages += [MessagesPlaceholder("history"), ("user", user_message_format)]
+    prompt_template = ChatPromptTemplate.from_messages(prompt_messages)
+    prompt_tokens = count_tokens(system_prompt, provider) + history.tokens + count_tokens(
+        user_message_format.format(context=context, user_query=safe_query), provider)
+    logger.info(f"Created Prompt Template ({prompt_tokens} prompt tokens, {assembled.tokens} from context, "
+                f"{history.tokens} from history)")
+
+    trace.record("prompt_build", trace.elapsed_ms() - prompt_started)
+    trace.set(prompt_tokens=prompt_tokens, context_tokens=assembled.tokens, history_tokens=history.tokens)
+
+    # Semantic cache: a near-identical question against unchanged context gets the stored answer
+    fingerprint = context_fingerprint(system_prompt, context, history.as_text())
+    # An answer given without its context is neither served from nor stored in the cache
+    query_vector = results["cache_embedding"].value if use_cache and not context_missing else None
+    if query_vector is not None:
+        cached_response = response_cache.lookup(mode, provider, fingerprint, query_vector)
+        if cached_response is not None:
+            trace.record("ttft", trace.elapsed_ms())
+            trace.set(cached=True, completion_tokens=count_tokens(cached_response, provider))
+            trace.finish()
+            yield from _replay(cached_response)
+            save_chat_to_mongo(session_id=session_id,
+                               session_title=session_title,
+                               role="assistant",
+                               content=cached_response,
+                               cached=True)
+            if memory:
+                memory.record_turn(safe_query, cached_response, provider, history.tokens)
+            return
     
-    # Defining LLM
-    llm = get_llm_client(provider=provider, api_key=api_key)
-    logger.info(f"LLM Defined: {llm}")
+    # Defining LLM (clients already created by the llm_client stage); Auto ranks every
+    # reachable provider for this prompt and keeps the rest as fallbacks
+    clients = results["llm_client"].value
+    if provider == AUTO:
+        routes = rank_providers(prompt_tokens, list(clients))
+    else:
+        routes = [Route(provider)] if provider in clients else []
+    if not routes:
+        trace.finish(outcome="client_unavailable")
+        yield f"⚠️ AVA Error: Couldn't reach {provider}. ({results['llm_client'].error or 'no client available'})"
+        return
+    logger.info("LLM route: " + " -> ".join(
+        route.provider if route.score is None else f"{route.provider} (~{route.expected_ttft_ms:.0f}ms)"
+        for route in routes))
+    if context_missing:
+        # Shown with the answer only; the stored answer and the memory stay clean
+        trace.set(context_missing=True)
+        yield (f"_⚠️ Your {CONTEXT_SOURCE_LABELS[context_source]} didn't load in time, "
+               f"so this answer doesn't use them._\n\n")
     
-    # 4. Create the Chain
-    chain = prompt_template | llm | StrOutputParser()
+    # 4. Create the Chain (per provider, as Auto may need more than one)
+    inputs = {
+        "system_instruction": system_prompt,
+        "context": context,
+        "user_query": safe_query,
+        "conversation_summary": history.summary,
+        "history": history.messages
+    }
+    answer = FailoverStream(routes,
+                            lambda name: (prompt_template | clients[name] | StrOutputParser()).stream(inputs),
+                            first_token_timeout=settings.FIRST_TOKEN_DEADLINE_SECONDS if provider == AUTO else None,
+                            prompt_tokens=prompt_tokens)
     
     try:
-        # 1. Capture the stream
-        full_response = ""
-        for chunk in chain.stream(
-                    {
-                        "system_instruction": system_prompt,
-                        "context": context,
-                        "user_query": safe_query
-                    }
-                ):
-            if chunk:
-                full_response += chunk
-                yield chunk
-        
-        # Logging Assistant response
+        # 1. Capture the stream: tokens are coalesced into ~50ms flushes (each one re-renders
+        # the answer in the UI) and the parts joined once at the end
+        parts = []
+        ttft_ms = None
+        stream_started = trace.elapsed_ms()
+        for chunk in coalesce_chunks(answer, settings.STREAM_FLUSH_INTERVAL_SECONDS, settings.STREAM_FLUSH_MAX_CHARS):
+            if ttft_ms is None:
+                # Later spans and the turn counters belong to the provider that answered
+                trace.provider = answer.provider
+                trace.set(model=model_name(clients[answer.provider]))
+                ttft_ms = trace.elapsed_ms()
+                trace.record("ttft", ttft_ms)
+            parts.append(chunk)
+            yield chunk
+        full_response = "".join(parts)
+        trace.record("stream", trace.elapsed_ms() - stream_started)
+        trace.set(stream_flushes=len(parts))
+        if provider == AUTO:
+            trace.set(routed_by=AUTO, failovers=[name for name, _ in answer.failovers])
+        # Counted with the tokenizer of the provider that answered (under Auto, `provider` is just the route)
+        trace.set(completion_tokens=count_tokens(full_response, answer.provider or provider))
+    
+    except Exception as e:
+        trace.set(error=type(e).__name__)
+        trace.finish(outcome="error")
+        yield f"⚠️ AVA Error: I encountered an issue processing that. ({str(e)})"
+        return
+    trace.finish()
+
+    # Logging Assistant response. The answer is complete at this point, so a failure here is
+    # logged rather than reported as a failed turn.
+    try:
         save_chat_to_mongo(session_id=session_id, 
                            session_title=session_title, 
                            role="assistant",
                            content=full_response)
-    
+
+        if memory and full_response:
+            memory.record_turn(safe_query, full_response, provider, history.tokens)
+
+        if query_vector is not None and full_response:
+            response_cache.store(mode, provider, fingerprint, query_vector, safe_query, full_response)
     except Exception as e:
-        yield f"⚠️ AVA Error: I encountered an issue processing that. ({str(e)})"
+        log_error_cleanly(e)
         
 def get_chat_title(first_query):
     """Generates a title for the conversation based on user's first query
@@ -104,7 +271,7 @@ def get_chat_title(first_query):
         first_query (str): User's first query.
     """
     try:
-        llm = get_llm_client(provider="Ollama (Local)")
+        llm = get_summary_llm()
         prompt = ChatPromptTemplate.from_messages([
             ("system", "You are a specialized summarizer. Create a 3-word title for the user's chat. Return ONLY the title words. No quotes, no intro."),
             ("user", "{query}")
@@ -112,9 +279,10 @@ def get_chat_title(first_query):
         
         chain = prompt | llm | StrOutputParser()
         
-        return chain.invoke({"query": first_query}).strip()
+        title = chain.invoke({"query": first_query}).strip().strip("\"'").strip()
+        return title[:MAX_TITLE_CHARS] or heuristic_title(first_query)
         
     except Exception as e:
-        logger.warning("Error genrating chat title. Proceeding with first 25 characters. \nError: {e} ")
+        logger.warning(f"Error genrating chat title. Proceeding with a heuristic title. \nError: {e} ")
         # To continue application smoothly
-        return first_query[:25] + '...'
\ No newline at end of file
+        return heuristic_title(first_query)
@@ -1,24 +1,222 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_groq import ChatGroq
-from langchain_openai import ChatOpenAI
-from langchain_ollama import ChatOllama
-import streamlit as st
+import hashlib
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from statistics import median
 from app.core.config import settings
+from app.core.logger import logger
 
+OLLAMA = "Ollama (Local)"
+PROVIDERS = [OLLAMA, "Gemini 3 Flash", "Groq", "OpenAI"]
+AUTO = "Auto"  # not a provider: get_ava_response routes each turn to one (see provider_router)
 
-@st.cache_resource
-def get_llm_client(provider, api_key):
-    if provider == "Ollama (Local)": 
-        return ChatOllama(model=settings.OLLAMA_MODEL_NAME, temperature=0)
-        
-    if provider == "Groq": 
-        return ChatGroq(model=settings.GROQ_MODEL_NAME, temperature=0, api_key=api_key)
-        
-    if provider == "OpenAI": 
-        return ChatOpenAI(model=settings.OPENAI_MODEL_NAME, temperature=0, api_key=api_key)
-        
-    if provider == "Gemini 3 Flash": 
-        return ChatGoogleGenerativeAI(model=settings.GOOGLE_GENAI_MODEL_NAME, temperature=0, api_key=api_key)
-    
-    return None
+# Keys from .env, used for the providers Auto routing may pick (the sidebar key covers one provider)
+API_KEY_SETTINGS = {"Groq": "GROQ_API_KEY", "Gemini 3 Flash": "GEMINI_API_KEY", "OpenAI": "OPENAI_API_KEY"}
 
+# Each provider SDK is imported only when that provider is first used: together they take
+# seconds to import, and most sessions only ever talk to one of them.
+
+
+# --- HEALTH ---
+@dataclass
+class ProviderHealth:
+    """Rolling outcome of the recent calls to one provider, as (ok, ttft_ms, prompt_tokens).
+
+    A provider is degraded after PROVIDER_DEGRADED_AFTER_FAILURES failures in a row, and gets
+    another chance once PROVIDER_RETRY_AFTER_SECONDS have passed since the last one.
+    """
+    provider: str
+    outcomes: deque = field(default_factory=lambda: deque(maxlen=settings.PROVIDER_HEALTH_WINDOW))
+    consecutive_failures: int = 0
+    last_error: str = None
+    last_failure_at: float = None
+    warmed_up: bool = False
+
+    def degraded(self):
+        if self.consecutive_failures < settings.PROVIDER_DEGRADED_AFTER_FAILURES:
+            return False
+        return time.monotonic() - self.last_failure_at < settings.PROVIDER_RETRY_AFTER_SECONDS
+
+    def error_rate(self):
+        if not self.outcomes:
+            return 0.0
+        return sum(1 for ok, _, _ in self.outcomes if not ok) / len(self.outcomes)
+
+    def ttft_p50_ms(self):
+        latencies = [ttft for ok, ttft, _ in self.outcomes if ok and ttft is not None]
+        return median(latencies) if latencies else None
+
+    def snapshot(self):
+        ttft = self.ttft_p50_ms()
+        return {"provider": self.provider, "status": "degraded" if self.degraded() else "ok",
+                "calls": len(self.outcomes), "error_rate": round(self.error_rate(), 2),
+                "ttft_p50_ms": round(ttft, 1) if ttft is not None else None,
+                "consecutive_failures": self.consecutive_failures, "warmed_up": self.warmed_up,
+                "last_error": self.last_error}
+
+
+def _key_fingerprint(api_key):
+    # Clients are cached per key without keeping the raw key around as a dict key
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16] if api_key else None
+
+
+# --- CLIENT REGISTRY ---
+class ClientRegistry:
+    """One long-lived chat client per (provider, model, api key), sharing a pooled HTTP client
+    per provider, plus the health of every provider.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()  # client creation (may import an SDK, so held for a while)
+        self._health_lock = threading.Lock()
+        self._clients = {}
+        self._http_clients = {}
+        self._health = {provider: ProviderHealth(provider) for provider in PROVIDERS}
+        self._warmup_started = False
+
+    def get(self, provider, api_key=None, model=None):
+        """Returns the cached client, creating it on first use (None for an unknown provider)."""
+        key = (provider, model, _key_fingerprint(api_key))
+        client = self._clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None:
+                    client = self._build(provider, api_key, model)
+                    if client is not None:
+                        self._clients[key] = client
+        return client
+
+    def _http_client(self, provider):
+        """Keep-alive HTTP connection pool shared by every client of a provider (call with the lock held)."""
+        if provider not in self._http_clients:
+            import httpx
+
+            self._http_clients[provider] = httpx.Client(
+                timeout=settings.LLM_REQUEST_TIMEOUT_SECONDS,
+                limits=httpx.Limits(max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+                                    max_keepalive_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+                                    keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_SECONDS))
+        return self._http_clients[provider]
+
+    def _build(self, provider, api_key, model):
+        if provider == OLLAMA:
+            import httpx
+            from langchain_ollama import ChatOllama
+
+            # The ollama client builds its own httpx client from these kwargs; one per model
+            return ChatOllama(model=model or settings.OLLAMA_MODEL_NAME, temperature=0,
+                              keep_alive=settings.OLLAMA_KEEP_ALIVE,
+                              client_kwargs={"timeout": settings.LLM_REQUEST_TIMEOUT_SECONDS,
+                                             "limits": httpx.Limits(
+                                                 max_keepalive_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+                                                 keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_SECONDS)})
+
+        if provider == "Groq":
+            from langchain_groq import ChatGroq
+            return ChatGroq(model=model or settings.GROQ_MODEL_NAME, temperature=0, api_key=api_key,
+                            http_client=self._http_client(provider))
+
+        if provider == "OpenAI":
+            from langchain_openai import ChatOpenAI
+            return ChatOpenAI(model=model or settings.OPENAI_MODEL_NAME, temperature=0, api_key=api_key,
+                              http_client=self._http_client(provider))
+
+        if provider == "Gemini 3 Flash":
+            # google-genai manages its own transport; reusing the instance reuses its connections
+            from langchain_google_genai import ChatGoogleGenerativeAI
+            return ChatGoogleGenerativeAI(model=model or settings.GOOGLE_GENAI_MODEL_NAME, temperature=0,
+                                          api_key=api_key)
+
+        return None
+
+    # --- HEALTH ---
+    def health(self, provider):
+        with self._health_lock:
+            if provider not in self._health:
+                self._health[provider] = ProviderHealth(provider)
+            return self._health[provider]
+
+    def record_success(self, provider, ttft_ms=None, prompt_tokens=0):
+        health = self.health(provider)
+        with self._health_lock:
+            health.outcomes.append((True, ttft_ms, prompt_tokens))
+            health.consecutive_failures = 0
+
+    def record_failure(self, provider, error):
+        health = self.health(provider)
+        with self._health_lock:
+            health.outcomes.append((False, None, 0))
+            health.consecutive_failures += 1
+            health.last_error = f"{type(error).__name__}: {error}"[:200]
+            health.last_failure_at = time.monotonic()
+        if health.degraded():
+            logger.warning(f"{provider} marked degraded after {health.consecutive_failures} failures: {health.last_error}")
+
+    def outcomes(self, provider):
+        """Copy of the provider's recent (ok, ttft_ms, prompt_tokens) outcomes."""
+        health = self.health(provider)
+        with self._health_lock:
+            return list(health.outcomes)
+
+    def is_healthy(self, provider):
+        return not self.health(provider).degraded()
+
+    def health_report(self):
+        with self._health_lock:
+            return [health.snapshot() for health in self._health.values()]
+
+    # --- WARM-UP ---
+    def warm_up(self):
+        """Loads the local Ollama models into memory in a background thread, once per process,
+        so the first chat turn doesn't pay the model load.
+        """
+        if not settings.OLLAMA_WARMUP:
+            return
+        with self._lock:
+            if self._warmup_started:
+                return
+            self._warmup_started = True
+
+        models = list(dict.fromkeys([settings.OLLAMA_MODEL_NAME, settings.CHAT_TITLE_MODEL_NAME]))
+
+        def _run():
+            try:
+                from ollama import Client
+                client = Client(timeout=settings.LLM_REQUEST_TIMEOUT_SECONDS)
+            except Exception as e:
+                logger.warning(f"Ollama warm-up skipped: {e}")
+                return
+            for model in models:
+                start = time.perf_counter()
+                try:
+                    # An empty prompt only loads the model; keep_alive keeps it resident afterwards
+                    client.generate(model=model, prompt="", keep_alive=settings.OLLAMA_KEEP_ALIVE)
+                    health = self.health(OLLAMA)
+                    with self._health_lock:
+                        health.warmed_up = True
+                        health.consecutive_failures = 0
+                    logger.info(f"Warmed up Ollama model '{model}' in {(time.perf_counter() - start) * 1000:.0f}ms")
+                except Exception as e:
+                    self.record_failure(OLLAMA, e)
+                    logger.warning(f"Ollama warm-up of '{model}' failed: {e}")
+
+        threading.Thread(target=_run, name="ollama-warmup", daemon=True).start()
+
+
+llm_clients = ClientRegistry()
+
+
+def get_llm_client(provider, api_key=None):
+    return llm_clients.get(provider, api_key)
+
+
+def configured_api_key(provider):
+    name = API_KEY_SETTINGS.get(provider)
+    return getattr(settings, name, None) if name else None
+
+
+def get_summary_llm():
+    """Small local model for background housekeeping (conversation summaries)."""
+    return llm_clients.get(OLLAMA, model=settings.CHAT_TITLE_MODEL_NAME)
@@ -84,21 +84,29 @@ SYSTEM_MODES = {
     "Fitness & Diet": {
         "instruction": FITNESS_SYSTEM_PROMPT,
         "context_source": "fitness_db",
+        "cache_responses": True,
+        "context_token_budget": 800,
         "onboarding_ask": f"I don't see any logs for today, {settings.USER_NAME}. What did we hit in the gym?"
     },
     "Journal & Chat": {
         "instruction": JOURNAL_SYSTEM_PROMPT,
         "context_source": "journal_db",
+        "cache_responses": False,
+        "context_token_budget": 800,
         "onboarding_ask": f"The journal is empty today. How's your headspace, {settings.USER_NICKNAME}?"
     },
     "Research Mode": {
         "instruction": RESEARCH_SYSTEM_PROMPT,
         "context_source": "vector_store",
+        "cache_responses": True,
+        "context_token_budget": 2000,
         "onboarding_ask": "I'm in deep-search mode. Ready to analyze your documents or the web—what are we investigating?"
     },
     "Summarizer": {
         "instruction": SUMMARIZER_SYSTEM_PROMPT,
         "context_source": "none",
+        "cache_responses": False,
+        "context_token_budget": 0,
         "onboarding_ask": "Drop the text, transcript, or link you need me to distill!"
     }
 }
\ No newline at end of file
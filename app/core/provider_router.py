@@ -0,0 +1,121 @@
+import time
+from dataclasses import dataclass
+from statistics import median
+from app.core.config import settings
+from app.core.llm_factory import OLLAMA, PROVIDERS, configured_api_key, llm_clients
+from app.core.logger import logger
+from app.core.request_pipeline import stream_with_deadline
+
+# Time to first token assumed for a short prompt until a provider has samples of its own (ms)
+PRIOR_TTFT_MS = {OLLAMA: 600.0, "Groq": 350.0, "Gemini 3 Flash": 700.0, "OpenAI": 800.0}
+UNKNOWN_PROVIDER_TTFT_MS = 1000.0
+
+
+@dataclass
+class Route:
+    """A provider Auto routing may use for this turn, and why it ranks where it does."""
+    provider: str
+    expected_ttft_ms: float = None
+    score: float = None
+    degraded: bool = False
+
+
+# --- RANKING ---
+def auto_providers():
+    """Providers Auto routing can reach: local Ollama plus every hosted one with a key in .env."""
+    return [provider for provider in PROVIDERS if provider == OLLAMA or configured_api_key(provider)]
+
+
+def prefill_ms(provider, prompt_tokens):
+    """Time the provider needs to read the prompt before it can emit a token."""
+    rate = (settings.ROUTER_OLLAMA_PREFILL_MS_PER_1K_TOKENS if provider == OLLAMA
+            else settings.ROUTER_HOSTED_PREFILL_MS_PER_1K_TOKENS)
+    return prompt_tokens / 1000 * rate
+
+
+def expected_ttft_ms(provider, prompt_tokens, registry=llm_clients):
+    """Expected time to first token for a prompt of `prompt_tokens`.
+
+    The fixed part comes from the provider's recent successful calls, with each sample's own
+    prefill taken out, so samples from short and long prompts are comparable. A failed call
+    costs about the first-token deadline before the next provider takes over, so the recent
+    error rate is charged at that price.
+    """
+    outcomes = registry.outcomes(provider)
+    overheads = [max(0.0, ttft - prefill_ms(provider, tokens))
+                 for ok, ttft, tokens in outcomes if ok and ttft is not None]
+    base = median(overheads) if overheads else PRIOR_TTFT_MS.get(provider, UNKNOWN_PROVIDER_TTFT_MS)
+    error_rate = sum(1 for ok, _, _ in outcomes if not ok) / len(outcomes) if outcomes else 0.0
+    return base + prefill_ms(provider, prompt_tokens) + error_rate * settings.FIRST_TOKEN_DEADLINE_SECONDS * 1000
+
+
+def rank_providers(prompt_tokens, providers, registry=llm_clients):
+    """Orders `providers` best first for a prompt of `prompt_tokens`.
+
+    Hosted providers carry ROUTER_HOSTED_PENALTY_MS, so a short chat stays on the local model
+    unless a hosted one is clearly faster, while local prefill grows with the prompt and pushes
+    long contexts to a hosted model. Degraded providers go last rather than away, so there is
+    always something to fall back to.
+    """
+    routes = []
+    for provider in providers:
+        expected = expected_ttft_ms(provider, prompt_tokens, registry)
+        penalty = 0.0 if provider == OLLAMA else settings.ROUTER_HOSTED_PENALTY_MS
+        routes.append(Route(provider=provider, expected_ttft_ms=expected, score=expected + penalty,
+                            degraded=not registry.is_healthy(provider)))
+    return sorted(routes, key=lambda route: (route.degraded, route.score))
+
+
+# --- FAILOVER ---
+class FailoverStream:
+    """Streams an answer from the first route that starts answering in time.
+
+    Every route but the last gets `first_token_timeout` seconds to produce its first token
+    before the next one is tried; a route that raises before its first token is skipped the
+    same way. Once a token has been streamed there is no switching, so later errors propagate.
+    Each attempt's outcome goes into the registry's provider health.
+
+    Args:
+        routes (list[Route]): Providers in the order to try them.
+        open_stream (callable): provider -> iterator of text chunks.
+        first_token_timeout (float | None): Seconds per attempt; None waits for every route.
+        prompt_tokens (int): Prompt size, recorded with each TTFT sample.
+        registry (ClientRegistry): Where provider health is recorded.
+    """
+
+    def __init__(self, routes, open_stream, first_token_timeout=None, prompt_tokens=0, registry=llm_clients):
+        self.routes = routes
+        self.open_stream = open_stream
+        self.first_token_timeout = first_token_timeout
+        self.prompt_tokens = prompt_tokens
+        self.registry = registry
+        self.provider = None  # the provider that answered
+        self.ttft_ms = None  # from the start of that provider's request
+        self.failovers = []  # (provider, error) of the abandoned attempts
+
+    def __iter__(self):
+        for i, route in enumerate(self.routes):
+            is_last = i == len(self.routes) - 1
+            started = time.perf_counter()
+            streamed = False
+            try:
+                stream = self.open_stream(route.provider)
+                if self.first_token_timeout and not is_last:
+                    stream = stream_with_deadline(stream, self.first_token_timeout)
+                for chunk in stream:
+                    if chunk and not streamed:
+                        streamed = True
+                        self.provider = route.provider
+                        self.ttft_ms = (time.perf_counter() - started) * 1000
+                    yield chunk
+            except Exception as e:
+                self.registry.record_failure(route.provider, e)
+                if streamed or is_last:
+                    raise
+                self.failovers.append((route.provider, e))
+                logger.warning(f"{route.provider} failed before its first token ({type(e).__name__}: {e}), "
+                               f"failing over to {self.routes[i + 1].provider}")
+                continue
+            self.provider = route.provider
+            self.registry.record_success(route.provider, self.ttft_ms, self.prompt_tokens)
+            return
@@ -0,0 +1,149 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from dataclasses import dataclass
+from app.core.logger import logger
+
+# Shared by every chat turn; stages are short I/O waits, so a handful of threads is plenty
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="ava-stage")
+
+
+@dataclass
+class Stage:
+    """One independent step of a chat turn.
+
+    Args:
+        name (str): Label used in timings and logs.
+        fn (callable): Zero-argument function to run.
+        timeout (float | None): Seconds (from pipeline start) before we stop waiting. None waits forever.
+        fallback: Value used when the stage times out or raises.
+    """
+    name: str
+    fn: object
+    timeout: float = None
+    fallback: object = None
+
+
+@dataclass
+class StageResult:
+    value: object
+    elapsed_ms: float
+    timed_out: bool = False
+    error: Exception = None
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    value = fn()
+    return value, (time.perf_counter() - start) * 1000
+
+
+def run_stages(stages):
+    """Runs independent stages concurrently and collects them, degrading slow or failing ones.
+
+    A stage that misses its deadline keeps running in the background but its result is
+    replaced by the fallback, so one slow source never stalls the whole turn.
+
+    Returns:
+        dict[str, StageResult]: one result per stage name.
+    """
+    start = time.perf_counter()
+    futures = {stage.name: (stage, _executor.submit(_timed, stage.fn)) for stage in stages}
+
+    results = {}
+    for name, (stage, future) in futures.items():
+        remaining = None if stage.timeout is None else max(0.0, stage.timeout - (time.perf_counter() - start))
+        try:
+            value, elapsed_ms = future.result(timeout=remaining)
+            results[name] = StageResult(value=value, elapsed_ms=elapsed_ms)
+        except FutureTimeout:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            logger.warning(f"Stage '{name}' exceeded {stage.timeout}s, continuing without it")
+            results[name] = StageResult(value=stage.fallback, elapsed_ms=elapsed_ms, timed_out=True)
+        except Exception as e:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            logger.warning(f"Stage '{name}' failed, continuing without it: {e}")
+            results[name] = StageResult(value=stage.fallback, elapsed_ms=elapsed_ms, error=e)
+    return results
+
+
+class FirstTokenTimeout(TimeoutError):
+    """A stream produced nothing within its first-token deadline."""
+
+
+_DONE = object()
+
+
+def stream_with_deadline(stream, first_token_timeout):
+    """Iterates `stream` in a worker thread and gives up if its first non-empty item is late.
+
+    Once the first item has arrived the stream runs at its own pace. An abandoned stream is
+    left to its worker thread, which stops at the next item it receives.
+
+    Raises:
+        FirstTokenTimeout: nothing arrived within `first_token_timeout` seconds.
+    """
+    items = queue.Queue()
+    cancelled = threading.Event()
+
+    def pump():
+        try:
+            for item in stream:
+                if cancelled.is_set():
+                    return
+                items.put((item, None))
+            items.put((_DONE, None))
+        except Exception as e:
+            items.put((None, e))
+        finally:
+            close = getattr(stream, "close", None)
+            if cancelled.is_set() and close:
+                close()
+
+    threading.Thread(target=pump, name="ava-stream", daemon=True).start()
+    deadline = time.monotonic() + first_token_timeout
+    started = False
+    try:
+        while True:
+            try:
+                item, error = items.get(timeout=None if started else max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                raise FirstTokenTimeout(f"no token within {first_token_timeout}s") from None
+            if error is not None:
+                raise error
+            if item is _DONE:
+                return
+            started = started or bool(item)
+            yield item
+    finally:
+        cancelled.set()
+
+
+def coalesce_chunks(stream, interval, max_chars):
+    """Merges tiny streamed chunks into fewer, larger ones.
+
+    The first non-empty chunk is passed through at once (time to first token is unchanged);
+    after that, chunks are buffered and joined into one whenever `interval` seconds have
+    passed since the last flush or `max_chars` are waiting, and once more at the end. Every
+    flush is a re-render of the growing answer downstream, so this bounds re-renders by time
+    rather than by token count. Checks happen as chunks arrive, so a stall can hold back at
+    most one interval's worth of text.
+    """
+    buffer, buffered_chars = [], 0
+    last_flush = None
+    for chunk in stream:
+        if not chunk:
+            continue
+        if last_flush is None:
+            last_flush = time.monotonic()
+            yield chunk
+            continue
+        buffer.append(chunk)
+        buffered_chars += len(chunk)
+        now = time.monotonic()
+        if buffered_chars >= max_chars or now - last_flush >= interval:
+            yield "".join(buffer)
+            buffer, buffered_chars, last_flush = [], 0, now
+    if buffer:
+        yield "".join(buffer)
@@ -0,0 +1,105 @@
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from app.core.config import settings
+from app.core.logger import logger
+
+
+@dataclass
+class CachedResponse:
+    bucket: tuple
+    query: str
+    vector: list
+    norm: float
+    response: str
+    created_at: float
+
+
+def context_fingerprint(*parts):
+    """Stable hash of everything besides the question that shaped an answer (prompt + context)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update((part or "").encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class SemanticResponseCache:
+    """In-process cache of LLM answers, matched by query-embedding similarity.
+
+    Entries are bucketed by (mode, provider, context fingerprint), so an answer is only reused
+    when it was produced with the same system prompt and the same retrieved data; within a
+    bucket, a new question hits when its cosine similarity to a cached one clears the threshold.
+    Entries expire after `ttl_seconds` and the least recently used ones are evicted first.
+    """
+
+    def __init__(self, max_entries=256, ttl_seconds=6 * 3600, similarity_threshold=0.95):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def _norm(vector):
+        return math.sqrt(sum(x * x for x in vector)) or 1.0
+
+    def lookup(self, mode, provider, fingerprint, query_vector):
+        """Returns the best cached answer for a similar question, or None."""
+        bucket = (mode, provider, fingerprint)
+        query_norm = self._norm(query_vector)
+        now = time.time()
+
+        with self._lock:
+            best_id, best_score = None, self.similarity_threshold
+            for entry_id, entry in list(self._entries.items()):
+                if now - entry.created_at > self.ttl_seconds:
+                    del self._entries[entry_id]
+                    continue
+                if entry.bucket != bucket:
+                    continue
+                score = sum(a * b for a, b in zip(query_vector, entry.vector)) / (query_norm * entry.norm)
+                if score >= best_score:
+                    best_id, best_score = entry_id, score
+
+            if best_id is None:
+                self._misses += 1
+                return None
+
+            self._hits += 1
+            self._entries.move_to_end(best_id)
+            entry = self._entries[best_id]
+            logger.info(f"Response cache hit ({best_score:.3f}) for '{entry.query[:40]}'")
+            return entry.response
+
+    def store(self, mode, provider, fingerprint, query_vector, query, response):
+        with self._lock:
+            self._entries[self._next_id] = CachedResponse(bucket=(mode, provider, fingerprint),
+                                                          query=query,
+                                                          vector=list(query_vector),
+                                                          norm=self._norm(query_vector),
+                                                          response=response,
+                                                          created_at=time.time())
+            self._next_id += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        total = self._hits + self._misses
+        return {
+            "entries": len(self._entries),
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / total, 4) if total else None,
+        }
+
+
+response_cache = SemanticResponseCache(max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+                                       ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+                                       similarity_threshold=settings.RESPONSE_CACHE_SIMILARITY)
@@ -1,10 +1,11 @@
-from google.genai import types
-
 def get_safety_settings():
     """
     Returns high-threshold safety settings to prevent harmful content 
     while allowing for fitness-related discussions.
     """
+    # Imported here: google.genai is slow to import and only the Gemini provider needs it
+    from google.genai import types
+
     return [
         types.SafetySetting(
             category="HARM_CATEGORY_DANGEROUS_CONTENT",
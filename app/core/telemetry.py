@@ -0,0 +1,214 @@
+import json
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, UTC
+from statistics import quantiles
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from app.core.config import settings
+from app.core.logger import LOG_DIR, logger
+
+# One JSON object per finished chat turn, separate from the human-readable app log
+TRACE_LOG_FILE = LOG_DIR / "traces.jsonl"
+
+_trace_logger = logging.getLogger("AVA.traces")
+_trace_logger.setLevel(logging.INFO)
+_trace_logger.propagate = False
+if not _trace_logger.handlers:
+    _trace_handler = logging.FileHandler(TRACE_LOG_FILE)
+    _trace_handler.setFormatter(logging.Formatter("%(message)s"))
+    _trace_logger.addHandler(_trace_handler)
+
+
+# --- METRICS ---
+class MetricsRegistry:
+    """In-process latency samples and counters.
+
+    Latencies keep the last `window` samples per (stage, provider) in a ring buffer, so
+    p50/p95 describe recent behaviour and memory stays bounded. Counters only ever grow.
+    """
+
+    def __init__(self, window=500):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples = defaultdict(lambda: deque(maxlen=self.window))
+        self._counters = defaultdict(float)
+
+    def observe(self, stage, elapsed_ms, provider=""):
+        with self._lock:
+            self._samples[(stage, provider)].append(elapsed_ms)
+
+    def inc(self, name, value=1, **labels):
+        with self._lock:
+            self._counters[(name, tuple(sorted(labels.items())))] += value
+
+    def latency_summary(self):
+        """[{stage, provider, count, p50_ms, p95_ms, max_ms}] over the current window."""
+        with self._lock:
+            samples = {key: list(values) for key, values in self._samples.items()}
+        rows = []
+        for (stage, provider), values in sorted(samples.items()):
+            p50, p95 = (values[0], values[0]) if len(values) == 1 else (
+                quantiles(values, n=100, method="inclusive")[i] for i in (49, 94))
+            rows.append({"stage": stage, "provider": provider, "count": len(values),
+                         "p50_ms": round(float(p50), 1), "p95_ms": round(float(p95), 1),
+                         "max_ms": round(max(values), 1)})
+        return rows
+
+    def counters(self):
+        """[{name, **labels, value}] for every counter."""
+        with self._lock:
+            items = list(self._counters.items())
+        return [{"name": name, **dict(labels), "value": value} for (name, labels), value in sorted(items)]
+
+    def render_openmetrics(self):
+        """Prometheus/OpenMetrics text exposition of the current state."""
+        lines = ["# TYPE ava_stage_latency_ms summary"]
+        for row in self.latency_summary():
+            labels = f'stage="{row["stage"]}",provider="{row["provider"]}"'
+            lines.append(f'ava_stage_latency_ms{{{labels},quantile="0.5"}} {row["p50_ms"]}')
+            lines.append(f'ava_stage_latency_ms{{{labels},quantile="0.95"}} {row["p95_ms"]}')
+            lines.append(f"ava_stage_latency_ms_count{{{labels}}} {row['count']}")
+
+        declared = set()
+        for counter in self.counters():
+            name = counter.pop("name")
+            value = counter.pop("value")
+            if name not in declared:
+                lines.append(f"# TYPE ava_{name} counter")
+                declared.add(name)
+            labels = ",".join(f'{key}="{_escape(val)}"' for key, val in counter.items())
+            lines.append(f"ava_{name}_total{{{labels}}} {value:g}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+metrics = MetricsRegistry(window=settings.TELEMETRY_WINDOW)
+
+
+# --- TRACES ---
+@dataclass
+class TurnTrace:
+    """Spans of one chat turn. Stage durations feed the metrics and the whole turn is
+    written as one JSON record when it finishes.
+
+    Args:
+        mode (str): AVA mode of the turn.
+        provider (str): Provider the turn was sent to.
+    """
+    mode: str
+    provider: str
+    started: float = field(default_factory=time.perf_counter)
+    stages: dict = field(default_factory=dict)
+    attrs: dict = field(default_factory=dict)
+    finished: bool = False
+
+    def record(self, name, elapsed_ms, status="ok"):
+        self.stages[name] = round(elapsed_ms, 1)
+        metrics.observe(name, elapsed_ms, provider=self.provider)
+        if status != "ok":
+            metrics.inc("stage_failures", stage=name, status=status)
+
+    @contextmanager
+    def span(self, name):
+        """Times the enclosed block as stage `name` (marked "error" if it raises)."""
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            yield
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            self.record(name, (time.perf_counter() - start) * 1000, status=status)
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def finish(self, outcome="ok"):
+        """Closes the turn: records its total time and token counts, then logs the JSON trace.
+
+        Only the first call counts, so a turn is never recorded twice.
+        """
+        if self.finished:
+            return
+        self.finished = True
+        self.record("total", self.elapsed_ms())
+        model = self.attrs.get("model", "")
+        cached = bool(self.attrs.get("cached"))
+        metrics.inc("turns", provider=self.provider, model=model, mode=self.mode, outcome=outcome, cached=cached)
+        for kind in ("prompt", "completion"):
+            tokens = self.attrs.get(f"{kind}_tokens")
+            if tokens:
+                metrics.inc("tokens", tokens, provider=self.provider, model=model, kind=kind)
+
+        record = {"ts": datetime.now(UTC).isoformat(timespec="milliseconds"), "event": "chat_turn",
+                  "mode": self.mode, "provider": self.provider, "outcome": outcome,
+                  "stages_ms": self.stages, **self.attrs}
+        _trace_logger.info(json.dumps(record, default=str))
+        logger.info("Turn timings: " + " | ".join(f"{name}={ms}ms" for name, ms in self.stages.items()))
+
+
+def model_name(llm):
+    """Best-effort model id of a LangChain chat model (attribute names differ per provider)."""
+    for attr in ("model_name", "model"):
+        value = getattr(llm, attr, None)
+        if isinstance(value, str) and value:
+            return value
+    return type(llm).__name__
+
+
+# --- METRICS ENDPOINT ---
+_server = None
+_server_lock = threading.Lock()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.render_openmetrics().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/openmetrics-text; version=1.0.0; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would flood the app log
+        pass
+
+
+def start_metrics_server(port=None):
+    """Serves /metrics on localhost in a daemon thread, once per process.
+
+    Args:
+        port (int, optional): Defaults to settings.METRICS_PORT; 0 leaves the endpoint off.
+    """
+    global _server
+    port = settings.METRICS_PORT if port is None else port
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer(("127.0.0.1", port), _MetricsHandler)
+            except OSError as e:
+                # Don't retry (and warn) on every Streamlit rerun
+                _server = False
+                logger.warning(f"Metrics endpoint not started on port {port}: {e}")
+                return None
+            threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+            logger.info(f"Metrics endpoint on http://127.0.0.1:{port}/metrics")
+    return _server or None
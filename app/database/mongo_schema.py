@@ -0,0 +1,85 @@
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+
+# --- INDEXES ---
+# Every hot query has a compound index whose prefix matches its filter and whose suffix matches
+# its sort, so Mongo walks the index in order and stops at the limit instead of scanning and
+# sorting the whole collection.
+INDEXES = {
+    "life_logs": [
+        # get_mongo_history: find({"type": ...}).sort("timestamp", -1)
+        ([("type", ASCENDING), ("timestamp", DESCENDING)], "type_timestamp"),
+        # per-day lookups of a user's logs
+        ([("user_nickname", ASCENDING), ("date", DESCENDING)], "user_nickname_date"),
+    ],
+    "chat_history": [
+        # get_session_messages(_page): find({"session_id": ...}).sort(timestamp, _id), walked either way
+        ([("session_id", ASCENDING), ("timestamp", ASCENDING), ("_id", ASCENDING)], "session_id_timestamp_id"),
+    ],
+    "chat_sessions": [
+        # get_unique_sessions: find().sort("last_msg", -1), one page at a time
+        ([("last_msg", DESCENDING)], "last_msg"),
+    ],
+}
+
+# --- PROJECTIONS ---
+# Only the fields callers actually read come back over the wire
+HISTORY_PROJECTION = {"_id": 0, "type": 1, "date": 1, "timestamp": 1, "payload": 1}
+# _id and timestamp double as the pagination cursor for get_session_messages_page
+SESSION_MESSAGE_PROJECTION = {"role": 1, "content": 1, "timestamp": 1}
+SESSION_SUMMARY_PROJECTION = {"title": 1, "last_msg": 1, "message_count": 1}
+
+
+def ensure_indexes(db):
+    """Creates any missing index. Safe to run on every start: existing indexes are a no-op."""
+    created = []
+    for collection_name, indexes in INDEXES.items():
+        for keys, name in indexes:
+            created.append(db[collection_name].create_index(keys, name=name, background=True))
+    return created
+
+
+def session_summary_update(session_title, timestamp):
+    """Upsert applied to a session's chat_sessions document for every message written.
+
+    The title is only set when the session is created; after that it changes through
+    rename_session alone, so a message written with a stale title can't undo a rename.
+    """
+    return {
+        "$max": {"last_msg": timestamp},
+        "$inc": {"message_count": 1},
+        "$setOnInsert": {"title": session_title, "created_at": timestamp},
+    }
+
+
+def backfill_chat_sessions(db, batch_size=500):
+    """Builds chat_sessions from chat_history the first time, for sessions that predate it.
+
+    Runs the old sidebar $group once; later writes keep the summaries current. Uses $max and
+    $setOnInsert so it never overwrites a summary a live write created in the meantime.
+    """
+    if db["chat_sessions"].estimated_document_count() > 0:
+        return 0
+    pipeline = [
+        {"$sort": {"timestamp": 1}},
+        {"$group": {
+            "_id": "$session_id",
+            "title": {"$last": "$session_title"},
+            "last_msg": {"$max": "$timestamp"},
+            "created_at": {"$min": "$timestamp"},
+            "message_count": {"$sum": 1},
+        }},
+    ]
+    requests, backfilled = [], 0
+    for session in db["chat_history"].aggregate(pipeline, allowDiskUse=True):
+        requests.append(UpdateOne({"_id": session["_id"]}, {
+            "$max": {"last_msg": session["last_msg"], "message_count": session["message_count"]},
+            "$setOnInsert": {"title": session["title"], "created_at": session["created_at"]},
+        }, upsert=True))
+        if len(requests) >= batch_size:
+            db["chat_sessions"].bulk_write(requests, ordered=False)
+            backfilled += len(requests)
+            requests = []
+    if requests:
+        db["chat_sessions"].bulk_write(requests, ordered=False)
+        backfilled += len(requests)
+    return backfilled
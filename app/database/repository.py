@@ -0,0 +1,192 @@
+import threading
+from datetime import datetime
+from bson import ObjectId
+from app.core.config import settings
+from app.core.logger import logger
+from app.database import sqlite_db
+from app.database.mongodb import add_mongo_log, get_mongo_history, iter_mongo_logs
+
+LOG_TYPES = ("fitness", "workout", "journal")
+
+# Payloads are the same dicts the dashboard has always sent to Mongo:
+#   fitness: {"weight", "calories", "protein"}
+#   workout: {"split", "exercises": [{"exercise", "sets", "reps", "weight"}]}
+#   journal: {"content", "mood", "tags": [str]}
+
+
+# --- BACKENDS ---
+class SQLiteLogStore:
+    """Local store on disk: every read is served from here."""
+
+    name = "sqlite"
+
+    def save(self, log_type, sync_id, day, payload):
+        if log_type == "fitness":
+            sqlite_db.add_fitness_log(day, payload["weight"], payload.get("calories", 0), payload.get("protein"),
+                                      sync_id=sync_id)
+        elif log_type == "workout":
+            exercises = [{"name": ex["exercise"], "sets": ex["sets"], "reps": ex["reps"], "weight": ex["weight"]}
+                         for ex in payload.get("exercises", [])]
+            sqlite_db.add_workout_session(day, payload.get("split", ""), exercises, sync_id=sync_id)
+        elif log_type == "journal":
+            tags = payload.get("tags") or []
+            sqlite_db.add_journal_entry(payload["content"], payload.get("mood", "Neutral"),
+                                        ",".join(tag.strip() for tag in tags), date=day, sync_id=sync_id)
+        else:
+            raise ValueError(f"Unknown log type: {log_type}")
+
+    def recent(self, log_type, limit):
+        """Newest logs as (date, payload) pairs."""
+        if log_type == "fitness":
+            return [(row["date"], {"weight": row["weight"], "calories": row["calories"], "protein": row["protein"]})
+                    for row in sqlite_db.get_recent_rows("fitness", limit)]
+        if log_type == "journal":
+            return [(row["date"], {"content": row["content"], "mood": row["mood"],
+                                   "tags": [tag for tag in (row["tags"] or "").split(",") if tag]})
+                    for row in sqlite_db.get_recent_rows("journal", limit)]
+
+        # Workouts are stored one row per exercise; regroup them into sessions
+        sessions = {}
+        for row in sqlite_db.get_recent_rows("workout", limit * 12):
+            key = row["sync_id"] or (row["date"], row["workout_type"])
+            if key not in sessions:
+                if len(sessions) == limit:
+                    break
+                sessions[key] = (row["date"], {"split": row["workout_type"], "exercises": []})
+            sessions[key][1]["exercises"].insert(0, {"exercise": row["exercise_name"], "sets": row["sets"],
+                                                     "reps": row["reps"], "weight": row["weight_lifted"]})
+        return list(sessions.values())
+
+    def count(self, log_type):
+        return sqlite_db.count_logs(log_type)
+
+    def known_ids(self, log_type, sync_ids):
+        return sqlite_db.existing_sync_ids(log_type, sync_ids)
+
+
+class MongoLogStore:
+    """Cloud copy. Writes go through the write-behind queue, so saving never waits on Atlas."""
+
+    name = "mongo"
+
+    def save(self, log_type, sync_id, day, payload):
+        add_mongo_log(log_type, payload, document_id=ObjectId(sync_id), date=day)
+
+    def recent(self, log_type, limit):
+        return [(log.get("date", "Unknown Date"), log.get("payload", {}))
+                for log in get_mongo_history(log_type=log_type, limit=limit)]
+
+    def iter_all(self, log_type):
+        for log in iter_mongo_logs(log_type):
+            yield str(log["_id"]), log.get("date"), log.get("payload", {})
+
+
+# --- REPOSITORY ---
+class LocalFirstRepository:
+    """Writes land in the local store first and are mirrored to the remote in the background;
+    reads never leave the machine.
+
+    Args:
+        local: Store every read is served from (SQLiteLogStore).
+        remote (optional): Store that receives a copy of every write (MongoLogStore), or None.
+    """
+
+    def __init__(self, local, remote=None):
+        self.local = local
+        self.remote = remote
+        self._import_started = False
+        self._import_lock = threading.Lock()
+
+    def log(self, log_type, payload, day=None):
+        """Saves a log locally, queues its cloud copy and returns the id both copies share.
+
+        Raises:
+            DatabaseException: If the local write fails (nothing is sent to the remote then).
+        """
+        sync_id = str(ObjectId())
+        day = day or datetime.now().strftime("%Y-%m-%d")
+        self.local.save(log_type, sync_id, day, payload)
+        if self.remote is not None:
+            try:
+                self.remote.save(log_type, sync_id, day, payload)
+            except Exception as e:
+                logger.error(f"Couldn't queue {log_type} log for {self.remote.name} sync: {e}")
+        return sync_id
+
+    def recent(self, log_type, limit=5):
+        return self.local.recent(log_type, limit)
+
+    def context_lines(self, log_type, limit=5):
+        """One formatted line per recent log, newest first."""
+        return [f"- [{day}]: {payload}" for day, payload in self.recent(log_type, limit)]
+
+    # --- HISTORY IMPORT ---
+    def import_remote_history(self, batch_size=500):
+        """Copies remote logs the local store doesn't have yet (first run on a machine).
+
+        Only log types whose local table is still empty are imported: after that the local
+        store is the one being written to, and the remote only receives copies.
+        """
+        imported = {}
+        for log_type in LOG_TYPES:
+            if self.local.count(log_type):
+                continue
+            batch, count = [], 0
+            for item in self.remote.iter_all(log_type):
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    count += self._import_batch(log_type, batch)
+                    batch = []
+            if batch:
+                count += self._import_batch(log_type, batch)
+            imported[log_type] = count
+
+        if imported.get("workout"):
+            # The exercise summary may have been built (or refreshed by a new workout) while the
+            # import ran, and is otherwise only rebuilt when empty: recompute it with the history
+            from app.services.analytics import rebuild_workout_summary
+            rebuild_workout_summary()
+        return imported
+
+    def _import_batch(self, log_type, batch):
+        known = self.local.known_ids(log_type, [sync_id for sync_id, _, _ in batch])
+        count = 0
+        for sync_id, day, payload in batch:
+            if sync_id in known:
+                continue
+            try:
+                self.local.save(log_type, sync_id, day, payload)
+                count += 1
+            except Exception as e:
+                # One malformed legacy document shouldn't stop the rest
+                logger.warning(f"Skipped {log_type} log {sync_id} during import: {e}")
+        return count
+
+    def start_remote_import(self):
+        """Runs import_remote_history once per process in a background thread."""
+        if self.remote is None:
+            return
+        with self._import_lock:
+            if self._import_started:
+                return
+            self._import_started = True
+
+        def _run():
+            try:
+                imported = self.import_remote_history()
+                if any(imported.values()):
+                    logger.info(f"Imported cloud history into the local store: {imported}")
+            except Exception as e:
+                logger.error(f"Cloud history import failed: {e}")
+
+        threading.Thread(target=_run, name="log-import", daemon=True).start()
+
+
+def build_repository(sync_target=None):
+    """Local SQLite store, mirrored to Mongo unless settings.LOG_SYNC_TARGET is "none"."""
+    sync_target = sync_target or settings.LOG_SYNC_TARGET
+    remote = MongoLogStore() if sync_target == "mongo" else None
+    return LocalFirstRepository(local=SQLiteLogStore(), remote=remote)
+
+
+log_repository = build_repository()
@@ -1,164 +1,288 @@
-import sqlite3
-import pandas as pd
 from datetime import datetime
 from app.core.config import settings
 from app.core.logger import logger, log_error_cleanly
 from app.core.exceptions import DatabaseException
+from app.database.sqlite_pool import get_pool
 
 # --- INITIALIZATION ---
+def _create_tables(conn):
+    cursor = conn.cursor()
+    
+    # 1. Body Stats & Nutrition
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS fitness_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date TEXT NOT NULL,  
+        weight REAL NOT NULL,
+        calories INTEGER NOT NULL,
+        protein REAL,
+        notes TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""")
+
+    # 2. Gym Performance (PPL)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS workout_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date TEXT NOT NULL,  
+        workout_type TEXT NOT NULL,
+        exercise_name TEXT NOT NULL,
+        sets INTEGER NOT NULL,
+        reps INTEGER NOT NULL,
+        weight_lifted REAL NOT NULL,
+        rpe INTEGER,
+        metadata TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""")
+
+    # 3. Personal Reflections (Journaling)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS journal_entries (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date TEXT NOT NULL,
+        content TEXT NOT NULL,
+        mood TEXT,
+        tags TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""")
+
+    # 4. Indexes: every read is "a date window" or "the latest N", optionally per exercise/split
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_fitness_logs_date ON fitness_logs (date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_workout_logs_date ON workout_logs (date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_workout_logs_exercise_date ON workout_logs (exercise_name, date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_workout_logs_type_date ON workout_logs (workout_type, date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_journal_entries_date ON journal_entries (date)")
+
+    # 5. Sync identity: the id a log shares with its cloud copy (Mongo _id), so syncing both ways
+    # never duplicates it. A workout's exercises share one id.
+    for table in ("fitness_logs", "workout_logs", "journal_entries"):
+        _add_column_if_missing(cursor, table, "sync_id", "TEXT")
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_sync_id ON {table} (sync_id)")
+    logger.info("Database initialized: All tables verified.")
+
+def _add_column_if_missing(cursor, table, column, declaration):
+    columns = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+    if column not in columns:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+
+def _pool():
+    """Shared connection pool for the Life OS database; tables are created on first use."""
+    pool = get_pool(settings.SQLITE_DB_PATH)
+    pool.ensure_schema("life_os", _create_tables)
+    return pool
+
 def init_db():
     """Verifies and creates all tables required for the modular Life OS."""
     try:
-        with sqlite3.connect(settings.SQLITE_DB_PATH) as conn:
-            cursor = conn.cursor()
-            
-            # 1. Body Stats & Nutrition
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS fitness_logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                date TEXT NOT NULL,  
-                weight REAL NOT NULL,
-                calories INTEGER NOT NULL,
-                protein REAL,
-                notes TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )""")
-
-            # 2. Gym Performance (PPL)
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS workout_logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                date TEXT NOT NULL,  
-                workout_type TEXT NOT NULL,
-                exercise_name TEXT NOT NULL,
-                sets INTEGER NOT NULL,
-                reps INTEGER NOT NULL,
-                weight_lifted REAL NOT NULL,
-                rpe INTEGER,
-                metadata TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )""")
-
-            # 3. Personal Reflections (Journaling)
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS journal_entries (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                date TEXT NOT NULL,
-                content TEXT NOT NULL,
-                mood TEXT,
-                tags TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )""")
-            
-            conn.commit()
-            logger.info("Database initialized: All tables verified.")
+        _pool()
     except Exception as e:
         log_error_cleanly(e)
         raise DatabaseException("Database Initialization Failed")
 
 # --- FITNESS & DIET DATA METHODS ---
-def add_fitness_log(date, weight, calories, protein, notes=None):
+def add_fitness_log(date, weight, calories, protein, notes=None, sync_id=None):
     try:
-        with sqlite3.connect(settings.SQLITE_DB_PATH) as conn:
-            cursor = conn.cursor()
-            query = "INSERT INTO fitness_logs (date, weight, calories, protein, notes) VALUES (?, ?, ?, ?, ?)"
-            cursor.execute(query, (date, weight, calories, protein, notes))
-            conn.commit()
+        with _pool().transaction() as conn:
+            query = "INSERT INTO fitness_logs (date, weight, calories, protein, notes, sync_id) VALUES (?, ?, ?, ?, ?, ?)"
+            conn.execute(query, (date, weight, calories, protein, notes, sync_id))
     except Exception as e:
         log_error_cleanly(e)
         raise DatabaseException("Failed to add fitness log")
 
-def add_workout_log(date, workout_type, exercise_name, sets, reps, weight_lifted, rpe=None, metadata=None):
+WORKOUT_INSERT = """INSERT INTO workout_logs (date, workout_type, exercise_name, sets, reps, weight_lifted, rpe, metadata, sync_id)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+
+def add_workout_log(date, workout_type, exercise_name, sets, reps, weight_lifted, rpe=None, metadata=None, sync_id=None):
     try:
-        with sqlite3.connect(settings.SQLITE_DB_PATH) as conn:
-            cursor = conn.cursor()
-            query = """INSERT INTO workout_logs (date, workout_type, exercise_name, sets, reps, weight_lifted, rpe, metadata)
-                       VALUES (?, ?, ?, ?, ?, ?, ?, ?)"""
-            cursor.execute(query, (date, workout_type, exercise_name, sets, reps, weight_lifted, rpe, metadata))
-            conn.commit()
+        with _pool().transaction() as conn:
+            conn.execute(WORKOUT_INSERT, (date, workout_type, exercise_name, sets, reps, weight_lifted, rpe, metadata, sync_id))
     except Exception as e:
         log_error_cleanly(e)
         raise DatabaseException("Failed to add workout log")
 
-def get_fitness_history():
+def add_workout_session(date, workout_type, exercises, sync_id=None):
+    """Saves a whole workout in one transaction (one executemany instead of a commit per exercise).
+
+    Args:
+        date (str): Workout date (YYYY-MM-DD).
+        workout_type (str): Split of the day (Push/Pull/Legs...).
+        exercises (list[dict]): One dict per exercise with name, sets, reps, weight and optional rpe/metadata.
+        sync_id (str, optional): Id shared with the cloud copy of this workout.
+    """
+    rows = [(date, workout_type, ex["name"], ex["sets"], ex["reps"], ex["weight"], ex.get("rpe"), ex.get("metadata"), sync_id)
+            for ex in exercises]
+    if not rows:
+        return 0
+    try:
+        with _pool().transaction() as conn:
+            conn.executemany(WORKOUT_INSERT, rows)
+        return len(rows)
+    except Exception as e:
+        log_error_cleanly(e)
+        raise DatabaseException("Failed to add workout session")
+
+# --- TIME-SERIES QUERIES ---
+# Columns callers may ask for (anything else is rejected before it reaches the SQL string) and
+# their types, so frames come back typed even when a column is empty or all NULL
+FITNESS_COLUMNS = {"id": "int", "date": "date", "weight": "float", "calories": "int", "protein": "float",
+                   "notes": "str", "created_at": "timestamp", "sync_id": "str"}
+WORKOUT_COLUMNS = {"id": "int", "date": "date", "workout_type": "str", "exercise_name": "str", "sets": "int",
+                   "reps": "int", "weight_lifted": "float", "rpe": "int", "metadata": "str", "created_at": "timestamp",
+                   "sync_id": "str"}
+DTYPES = {
+    "numpy_nullable": {"int": "Int64", "float": "Float64", "str": "string"},
+    "pyarrow": {"int": "int64[pyarrow]", "float": "double[pyarrow]", "str": "string[pyarrow]"},
+}
+
+def _resolve_dtype_backend(dtype_backend):
+    if dtype_backend == "pyarrow":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            logger.warning("pyarrow is not installed, returning numpy_nullable frames instead.")
+            return "numpy_nullable"
+    return dtype_backend
+
+def _query_frame(table, allowed_columns, columns, filters, start, end, limit, newest_first, dtype_backend):
+    """Runs an indexed, column-projected date-window query and returns a typed DataFrame."""
+    # pandas is only needed by the frame queries, not by the log writers the whole app imports us for
+    import pandas as pd
+
+    columns = list(columns or allowed_columns)
+    unknown = set(columns) - set(allowed_columns)
+    if unknown:
+        raise ValueError(f"Unknown {table} column(s): {sorted(unknown)}")
+
+    where, params = [], []
+    for column, value in filters.items():
+        if value is not None:
+            where.append(f"{column} = ?")
+            params.append(value)
+    if start is not None:
+        where.append("date >= ?")
+        params.append(str(start))
+    if end is not None:
+        where.append("date <= ?")
+        params.append(str(end))
+
+    direction = "DESC" if newest_first else "ASC"
+    query = f"SELECT {', '.join(columns)} FROM {table}"
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    query += f" ORDER BY date {direction}, id {direction}"
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(int(limit))
+
+    dtype_backend = _resolve_dtype_backend(dtype_backend)
+    with _pool().connection() as conn:
+        frame = pd.read_sql_query(query, conn, params=params, dtype_backend=dtype_backend)
+
+    dtypes = DTYPES[dtype_backend]
+    for column in columns:
+        kind = allowed_columns[column]
+        if kind == "date":
+            frame[column] = pd.to_datetime(frame[column], format="%Y-%m-%d")
+        elif kind == "timestamp":
+            frame[column] = pd.to_datetime(frame[column], format="%Y-%m-%d %H:%M:%S")
+        else:
+            frame[column] = frame[column].astype(dtypes[kind])
+    return frame
+
+def query_fitness_logs(start=None, end=None, columns=None, limit=None, newest_first=False,
+                       dtype_backend="numpy_nullable"):
+    """Body-stat logs within a date window, only the requested columns.
+
+    Args:
+        start (str | date, optional): First date included (YYYY-MM-DD). Defaults to no lower bound.
+        end (str | date, optional): Last date included. Defaults to no upper bound.
+        columns (list[str], optional): Subset of FITNESS_COLUMNS. Defaults to all of them.
+        limit (int, optional): Most rows returned (counted from the sort order).
+        newest_first (bool, optional): Sort by date descending instead of ascending.
+        dtype_backend (str, optional): "numpy_nullable" or "pyarrow" (falls back when pyarrow is missing).
+    """
+    return _query_frame("fitness_logs", FITNESS_COLUMNS, columns, {}, start, end, limit, newest_first, dtype_backend)
+
+def query_workout_logs(start=None, end=None, columns=None, exercise_name=None, workout_type=None,
+                       limit=None, newest_first=False, dtype_backend="numpy_nullable"):
+    """Workout sets within a date window, optionally for one exercise or one split.
+
+    Args:
+        start (str | date, optional): First date included (YYYY-MM-DD). Defaults to no lower bound.
+        end (str | date, optional): Last date included. Defaults to no upper bound.
+        columns (list[str], optional): Subset of WORKOUT_COLUMNS. Defaults to all of them.
+        exercise_name (str, optional): Only this exercise (uses the exercise/date index).
+        workout_type (str, optional): Only this split (uses the type/date index).
+        limit (int, optional): Most rows returned (counted from the sort order).
+        newest_first (bool, optional): Sort by date descending instead of ascending.
+        dtype_backend (str, optional): "numpy_nullable" or "pyarrow" (falls back when pyarrow is missing).
+    """
+    filters = {"exercise_name": exercise_name, "workout_type": workout_type}
+    return _query_frame("workout_logs", WORKOUT_COLUMNS, columns, filters, start, end, limit, newest_first, dtype_backend)
+
+def get_fitness_history(start=None, end=None, columns=None):
     try:
-        with sqlite3.connect(settings.SQLITE_DB_PATH) as conn:
-            return pd.read_sql_query("SELECT * FROM fitness_logs ORDER BY date DESC", conn)
+        return query_fitness_logs(start=start, end=end, columns=columns, newest_first=True)
     except Exception as e:
         log_error_cleanly(e)
+        import pandas as pd
         return pd.DataFrame()
 
-def get_workout_history():
+def get_workout_history(start=None, end=None, columns=None):
     try:
-        with sqlite3.connect(settings.SQLITE_DB_PATH) as conn:
-            return pd.read_sql_query("SELECT * FROM workout_logs ORDER BY date DESC", conn)
+        return query_workout_logs(start=start, end=end, columns=columns, newest_first=True)
     except Exception as e:
         log_error_cleanly(e)
+        import pandas as pd
         return pd.DataFrame()
 
 # --- JOURNALING METHODS ---
-def add_journal_entry(content, mood="Neutral", tags=""):
+def add_journal_entry(content, mood="Neutral", tags="", date=None, sync_id=None):
     try:
-        today = datetime.now().strftime("%Y-%m-%d")
-        with sqlite3.connect(settings.SQLITE_DB_PATH) as conn:
-            cursor = conn.cursor()
-            query = "INSERT INTO journal_entries (date, content, mood, tags) VALUES (?, ?, ?, ?)"
-            cursor.execute(query, (today, content, mood, tags))
-            conn.commit()
+        day = date or datetime.now().strftime("%Y-%m-%d")
+        with _pool().transaction() as conn:
+            query = "INSERT INTO journal_entries (date, content, mood, tags, sync_id) VALUES (?, ?, ?, ?, ?)"
+            conn.execute(query, (day, content, mood, tags, sync_id))
     except Exception as e:
         log_error_cleanly(e)
         raise DatabaseException("Failed to save journal entry")
 
-# --- MODULAR AI CONTEXT FETCHERS ---
-# These supply the 'Brain' with specific data depending on the selected mode
+# --- SYNC HELPERS ---
+LOG_TABLES = {"fitness": "fitness_logs", "workout": "workout_logs", "journal": "journal_entries"}
 
-def get_fitness_context():
-    """Builds a string of recent physical activity and nutrition."""
-    try:
-        with sqlite3.connect(settings.SQLITE_DB_PATH) as conn:
-            cursor = conn.cursor()
-            context = "### RECENT BODY STATS (Date, Weight, Cals):\n"
-            cursor.execute("SELECT date, weight, calories FROM fitness_logs ORDER BY date DESC LIMIT 5")
-            for row in cursor.fetchall():
-                context += f"- {row[0]}: {row[1]}kg, {row[2]} kcal\n"
-            
-            context += "\n### RECENT WORKOUTS (Date, Exercise, Load):\n"
-            cursor.execute("SELECT date, exercise_name, sets, reps, weight_lifted FROM workout_logs ORDER BY date DESC LIMIT 5")
-            for row in cursor.fetchall():
-                context += f"- {row[0]}: {row[1]} ({row[2]}x{row[3]} @ {row[4]}kg)\n"
-            return context
-    except Exception:
-        return ""
-
-def get_journal_context():
-    """Builds a string of recent mental/emotional reflections."""
-    try:
-        with sqlite3.connect(settings.SQLITE_DB_PATH) as conn:
-            cursor = conn.cursor()
-            context = "### RECENT JOURNAL ENTRIES:\n"
-            cursor.execute("SELECT date, content, mood FROM journal_entries ORDER BY date DESC LIMIT 5")
-            for row in cursor.fetchall():
-                context += f"- {row[0]} [Mood: {row[2]}]: {row[1]}\n"
-            return context
-    except Exception:
-        return ""
+def count_logs(log_type):
+    with _pool().connection() as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {LOG_TABLES[log_type]}").fetchone()[0]
+
+def existing_sync_ids(log_type, sync_ids):
+    """The subset of `sync_ids` already stored locally for a log type."""
+    sync_ids = list(sync_ids)
+    found = set()
+    with _pool().connection() as conn:
+        for start in range(0, len(sync_ids), 500):
+            chunk = sync_ids[start:start + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            found.update(row[0] for row in conn.execute(
+                f"SELECT DISTINCT sync_id FROM {LOG_TABLES[log_type]} WHERE sync_id IN ({placeholders})", chunk))
+    return found
+
+def get_recent_rows(log_type, limit):
+    """Newest rows of a log table as dicts (uses the date index)."""
+    with _pool().connection() as conn:
+        cursor = conn.execute(f"SELECT * FROM {LOG_TABLES[log_type]} ORDER BY date DESC, id DESC LIMIT ?", (limit,))
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
 
 # --- MAINTENANCE ---
 def clear_fitness_logs():
-    with sqlite3.connect(settings.SQLITE_DB_PATH) as conn:
+    with _pool().transaction() as conn:
         conn.execute("DELETE FROM fitness_logs")
-        conn.commit()
 
 def clear_workout_logs():
-    with sqlite3.connect(settings.SQLITE_DB_PATH) as conn:
+    with _pool().transaction() as conn:
         conn.execute("DELETE FROM workout_logs")
-        conn.commit()
 
 def clear_journal_entries():
-    with sqlite3.connect(settings.SQLITE_DB_PATH) as conn:
-        conn.execute("DELETE FROM journal_entries")
-        conn.commit()     
-
+    with _pool().transaction() as conn:
+        conn.execute("DELETE FROM journal_entries")     
 
-# --- AUTO-INIT ---
-init_db()
\ No newline at end of file
@@ -0,0 +1,115 @@
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from app.core.logger import logger
+
+# WAL lets readers run alongside the single writer; NORMAL sync is durable across app crashes
+# (only an OS crash can lose the last commits), which is the right trade for a personal log.
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-20000",      # ~20 MB page cache per connection
+    "PRAGMA mmap_size=268435456",    # 256 MB memory-mapped reads
+    "PRAGMA temp_store=MEMORY",
+)
+CACHED_STATEMENTS = 256  # prepared statements kept per connection, keyed by SQL text
+BUSY_TIMEOUT_SECONDS = 5.0
+
+
+def open_connection(path):
+    """A new connection with our pragmas applied. Safe to hand between threads (one at a time)."""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_SECONDS, check_same_thread=False,
+                           cached_statements=CACHED_STATEMENTS)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+class ConnectionPool:
+    """A bounded set of reusable, pre-configured connections to one SQLite file.
+
+    Connections are checked out by one thread at a time and returned afterwards, so they survive
+    Streamlit's per-rerun threads and keep their statement cache and page cache warm. Modules
+    sharing the file register their tables with `ensure_schema`, which runs once per process on
+    first use instead of at import.
+    """
+
+    def __init__(self, path, max_size=8):
+        self.path = str(path)
+        self.max_size = max_size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._schemas = set()
+        self._schema_lock = threading.Lock()
+
+    def _checkout(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.max_size:
+                self._created += 1
+                return open_connection(self.path)
+        # Pool exhausted: wait for another thread to hand one back
+        return self._idle.get(timeout=BUSY_TIMEOUT_SECONDS)
+
+    @contextmanager
+    def connection(self):
+        """Borrows a connection for reads (or for managing a transaction yourself)."""
+        conn = self._checkout()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+
+    @contextmanager
+    def transaction(self):
+        """Borrows a connection and commits on success, rolls back on error."""
+        with self.connection() as conn:
+            with conn:
+                yield conn
+
+    def ensure_schema(self, name, create):
+        """Runs `create(conn)` once per process for the named group of tables."""
+        if name in self._schemas:
+            return
+        with self._schema_lock:
+            if name in self._schemas:
+                return
+            with self.transaction() as conn:
+                create(conn)
+            self._schemas.add(name)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._created = 0
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path, max_size=8):
+    """Returns the shared pool for an SQLite file, creating it on first use."""
+    key = str(Path(path).resolve())
+    pool = _pools.get(key)
+    if pool is not None:
+        return pool
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(path, max_size=max_size)
+            logger.info(f"SQLite pool ready for {path}")
+    return pool
@@ -0,0 +1,223 @@
+import atexit
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from bson import json_util
+from pymongo import UpdateMany, UpdateOne
+from pymongo.errors import BulkWriteError
+from app.core.logger import logger
+
+DUPLICATE_KEY = 11000
+
+
+class WriteBehindQueue:
+    """Background, batched Mongo writer with a local durable spool.
+
+    Callers enqueue inserts or updates and return immediately; a daemon thread groups them per
+    collection and writes them (insert_many / bulk_write) once `batch_size` operations are waiting
+    or `flush_interval` seconds have passed. If Mongo is unreachable the batch is appended to a
+    JSON-lines spool on disk and replayed later, so nothing typed during an outage is lost.
+    Documents get their _id client-side, which makes replayed inserts idempotent (duplicates are
+    ignored). Updates are replayed as-is, so prefer operators that tolerate a repeat ($set, $max,
+    $setOnInsert); an $inc from a batch that failed half-way can be applied twice.
+    `on_write(collection_name)` is called on the worker thread after each successful batch, e.g.
+    to invalidate read caches once the data is actually in Mongo.
+    """
+
+    def __init__(self, get_db, spool_path, batch_size=50, flush_interval=1.0, retry_interval=30.0, on_write=None):
+        self._get_db = get_db
+        self.on_write = on_write
+        self.spool_path = Path(spool_path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_interval = retry_interval
+
+        self._queue = queue.Queue()
+        self._spool_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._worker = None
+        self._stopping = threading.Event()
+        self._next_replay = 0.0
+        self.stats = {"enqueued": 0, "written": 0, "batches": 0, "spooled": 0, "replayed": 0}
+
+    # --- PUBLIC API ---
+    def insert(self, collection_name, document):
+        """Queues one document for insertion into `collection_name`."""
+        self._put((collection_name, "insert", document))
+
+    def update(self, collection_name, filter, update, upsert=False, many=False):
+        """Queues an update_one (update_many with `many`); updates to one collection are applied in the order queued."""
+        self._put((collection_name, "update", {"filter": filter, "update": update, "upsert": upsert, "many": many}))
+
+    def _put(self, item):
+        self._ensure_worker()
+        self._queue.put(item)
+        self.stats["enqueued"] += 1
+
+    def flush(self, timeout=10.0):
+        """Blocks until everything queued so far has been written (or spooled).
+
+        Returns:
+            bool: True if it all reached Mongo; False on timeout or while writes wait in the spool.
+        """
+        if self._worker is not None:
+            done = threading.Event()
+            self._queue.put(done)
+            if not done.wait(timeout):
+                return False
+        return not self.has_spooled()
+
+    def has_spooled(self):
+        """Whether any writes are sitting in the local spool, waiting for Mongo to come back."""
+        with self._spool_lock:
+            if self.spool_path.with_suffix(".replaying").exists():
+                return True
+            return self.spool_path.exists() and self.spool_path.stat().st_size > 0
+
+    def shutdown(self, timeout=10.0):
+        self.flush(timeout)
+        self._stopping.set()
+
+    # --- WORKER ---
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return
+        with self._start_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="mongo-write-behind", daemon=True)
+                self._worker.start()
+                atexit.register(self.shutdown)
+
+    def _run(self):
+        self._replay_spool()
+        while not self._stopping.is_set():
+            batch, waiters = self._collect_batch()
+            if batch:
+                self._write(batch)
+            if time.monotonic() >= self._next_replay:
+                self._replay_spool()
+            for waiter in waiters:
+                waiter.set()
+
+    def _collect_batch(self):
+        """Waits for the first item, then gathers more until the batch is full or the interval ends."""
+        batch, waiters = [], []
+        try:
+            item = self._queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return batch, waiters
+
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            if isinstance(item, threading.Event):
+                # A flush() marker: write what we have right away
+                waiters.append(item)
+                break
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                break
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+        return batch, waiters
+
+    def _write(self, batch):
+        """Writes a batch grouped per collection and kind; anything that fails goes to the spool."""
+        grouped = {}
+        for collection_name, kind, body in batch:
+            grouped.setdefault((collection_name, kind), []).append(body)
+
+        for (collection_name, kind), bodies in grouped.items():
+            write = self._insert_many if kind == "insert" else self._bulk_update
+            if write(collection_name, bodies):
+                self.stats["written"] += len(bodies)
+                self.stats["batches"] += 1
+                self._notify_written(collection_name)
+            else:
+                self._spool([(collection_name, kind, body) for body in bodies])
+
+    def _notify_written(self, collection_name):
+        if self.on_write is None:
+            return
+        try:
+            self.on_write(collection_name)
+        except Exception as e:
+            logger.warning(f"on_write callback failed for '{collection_name}': {e}")
+
+    def _insert_many(self, collection_name, documents):
+        try:
+            self._get_db()[collection_name].insert_many(documents, ordered=False)
+            return True
+        except BulkWriteError as e:
+            # Already-written documents (from an earlier, partially applied attempt) are fine
+            errors = e.details.get("writeErrors", [])
+            rejected = [error for error in errors if error.get("code") != DUPLICATE_KEY]
+            if rejected:
+                # Rejected documents would fail the same way on every replay, so they aren't spooled
+                logger.error(f"Mongo rejected {len(rejected)} document(s) in '{collection_name}': "
+                             f"{rejected[0].get('errmsg')}")
+            return True
+        except Exception as e:
+            logger.error(f"Mongo batch write to '{collection_name}' failed, spooling locally: {e}")
+            self._next_replay = time.monotonic() + self.retry_interval
+            return False
+
+    def _bulk_update(self, collection_name, updates):
+        requests = [(UpdateMany if u.get("many") else UpdateOne)(u["filter"], u["update"], upsert=u["upsert"])
+                    for u in updates]
+        try:
+            self._get_db()[collection_name].bulk_write(requests, ordered=True)
+            return True
+        except BulkWriteError as e:
+            # Same as inserts: an update Mongo refuses would be refused again on replay
+            errors = e.details.get("writeErrors", [])
+            logger.error(f"Mongo rejected {len(errors)} update(s) in '{collection_name}': "
+                         f"{errors[0].get('errmsg') if errors else e}")
+            return True
+        except Exception as e:
+            logger.error(f"Mongo batch update of '{collection_name}' failed, spooling locally: {e}")
+            self._next_replay = time.monotonic() + self.retry_interval
+            return False
+
+    # --- DURABLE SPOOL ---
+    def _spool(self, items):
+        with self._spool_lock:
+            self.spool_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.spool_path, "a", encoding="utf-8") as f:
+                for collection_name, kind, body in items:
+                    f.write(json_util.dumps({"collection": collection_name, "kind": kind, "body": body}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        self.stats["spooled"] += len(items)
+
+    def _replay_spool(self):
+        """Re-sends spooled documents; whatever still fails is put back in the spool."""
+        replay_path = self.spool_path.with_suffix(".replaying")
+        with self._spool_lock:
+            # A leftover .replaying file means we crashed mid-replay last time; finish that first
+            if not replay_path.exists():
+                if not self.spool_path.exists() or self.spool_path.stat().st_size == 0:
+                    return
+                os.replace(self.spool_path, replay_path)
+
+        with open(replay_path, encoding="utf-8") as f:
+            items = [json_util.loads(line) for line in f if line.strip()]
+        # Spools written before updates existed only hold inserts: {"collection", "document"}
+        items = [(item["collection"], item.get("kind", "insert"), item.get("body", item.get("document")))
+                 for item in items]
+        logger.info(f"Replaying {len(items)} spooled Mongo writes")
+
+        for start in range(0, len(items), self.batch_size):
+            chunk = items[start:start + self.batch_size]
+            before = self.stats["spooled"]
+            self._write(chunk)
+            if self.stats["spooled"] > before:
+                # Still offline: keep the rest for the next attempt
+                self._spool(items[start + self.batch_size:])
+                break
+            self.stats["replayed"] += len(chunk)
+
+        replay_path.unlink(missing_ok=True)
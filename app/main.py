@@ -3,12 +3,15 @@ from datetime import date
 import os
 import uuid
 # from app.database.sqlite_db import *
-from app.database.mongodb import add_mongo_log, get_unique_sessions, get_session_messages
+from app.database.mongodb import get_unique_sessions, get_session_messages_page, flush_pending_writes, init_mongo_schema
 from app.utils.utils import *
-from app.core.llm import get_ava_response, get_chat_title
 from app.core.prompts import SYSTEM_MODES
 from app.core.config import settings
-from app.services.vector_engine import index_pdf, clear_research_collection
+from app.database.repository import log_repository
+from app.core import telemetry
+from app.core.llm_factory import AUTO, OLLAMA, PROVIDERS, llm_clients
+from app.core.chat_titles import heuristic_title, start_title_generation, take_generated_title
+from app.core.exceptions import DatabaseException
 
 from app.core.logger import logger, log_error_cleanly
 
@@ -16,6 +19,10 @@ from app.core.logger import logger, log_error_cleanly
 # MUST BE FIRST
 st.set_page_config(page_title="AVA: Life OS", layout="wide", page_icon="🛡️")
 logger.info("Initiated AVA")
+init_mongo_schema()
+log_repository.start_remote_import()
+telemetry.start_metrics_server()
+llm_clients.warm_up()
 
 # --- INITIALIZATION ---
 if "exercise_count" not in st.session_state:
@@ -32,9 +39,73 @@ if "current_session_id" not in st.session_state:
     st.session_state.current_session_id = str(uuid.uuid4()) # Unique ID for MongoDB grouping
 if "current_session_title" not in st.session_state:
     st.session_state.current_session_title = "New Conversation"
+# A title generated in the background since the last rerun replaces the heuristic one
+if generated_title := take_generated_title(st.session_state.current_session_id):
+    st.session_state.current_session_title = generated_title
+if "session_pages" not in st.session_state:
+    st.session_state.session_pages = 1
+if "has_older_messages" not in st.session_state:
+    st.session_state.has_older_messages = False # More of this session is in MongoDB than in memory
+if "visible_messages" not in st.session_state:
+    st.session_state.visible_messages = settings.CHAT_PAGE_SIZE
 
 logger.info("Defined all session state variables.")
 
+# --- CHAT WINDOW ---
+# Only the latest page of a session is loaded and rendered; older messages stay collapsed
+# (and in MongoDB) until asked for, so reruns cost the same however long the session gets.
+def open_session(session_id, session_title):
+    messages, has_older = get_session_messages_page(session_id, limit=settings.CHAT_PAGE_SIZE)
+    st.session_state.current_session_id = session_id
+    st.session_state.current_session_title = session_title
+    st.session_state.messages = messages
+    st.session_state.has_older_messages = has_older
+    st.session_state.visible_messages = settings.CHAT_PAGE_SIZE
+
+def reset_chat_window():
+    st.session_state.messages = []
+    st.session_state.has_older_messages = False
+    st.session_state.visible_messages = settings.CHAT_PAGE_SIZE
+
+def show_earlier_messages():
+    st.session_state.visible_messages += settings.CHAT_PAGE_SIZE
+    messages = st.session_state.messages
+    if st.session_state.visible_messages > len(messages) and st.session_state.has_older_messages:
+        # The oldest loaded message came from MongoDB, so it can serve as the cursor
+        older, has_older = get_session_messages_page(st.session_state.current_session_id,
+                                                     limit=settings.CHAT_PAGE_SIZE,
+                                                     before=messages[0])
+        st.session_state.messages = older + messages
+        st.session_state.has_older_messages = has_older
+
+def compact_chat_window():
+    """Once a long session outgrows the memory cap, reload just its latest page from MongoDB.
+
+    If the latest turns haven't reached MongoDB yet, the loaded list is trimmed in place instead,
+    so they stay in the chat.
+    """
+    messages = st.session_state.messages
+    if len(messages) <= settings.CHAT_MAX_LOADED_MESSAGES:
+        return
+    if flush_pending_writes():
+        latest, has_older = get_session_messages_page(st.session_state.current_session_id,
+                                                      limit=settings.CHAT_PAGE_SIZE)
+        if latest:
+            st.session_state.messages = latest
+            st.session_state.has_older_messages = has_older
+            st.session_state.visible_messages = settings.CHAT_PAGE_SIZE
+        return
+
+    # Keep at least the latest page, starting at a message loaded from MongoDB: its timestamp is the
+    # cursor show_earlier_messages pages back from (turns typed here don't have one yet)
+    start = len(messages) - settings.CHAT_PAGE_SIZE
+    while start > 0 and "timestamp" not in messages[start]:
+        start -= 1
+    if start > 0:
+        st.session_state.messages = messages[start:]
+        st.session_state.has_older_messages = True
+        st.session_state.visible_messages = settings.CHAT_PAGE_SIZE
+
 # --- SIDEBAR: MODE SELECTOR & CONFIG ---
 st.sidebar.title("🛡️ Project AVA")
 st.sidebar.divider()
@@ -54,6 +125,9 @@ if app_mode == "AI Sidekick":
         logger.info("Selected Research mode.")
         st.sidebar.divider()
         st.sidebar.subheader("📚 Knowledge Base")
+        # Loaded here so the Dashboard never imports Qdrant/PDF tooling
+        from app.services.vector_engine import index_pdf, clear_research_collection
+
         uploaded_research = st.sidebar.file_uploader("Upload Research PDF", type="pdf")
         if uploaded_research:
             temp_path = os.path.join("data", uploaded_research.name)
@@ -61,8 +135,11 @@ if app_mode == "AI Sidekick":
                 f.write(uploaded_research.getbuffer())
             if st.sidebar.button("Index Document"):
                 with st.sidebar.status("Indexing... 🧠"):
-                    index_pdf(filepath=temp_path)
-                st.sidebar.success(f"Successfully indexed {uploaded_research.name}!") 
+                    report = index_pdf(filepath=temp_path)
+                if report.skipped_files:
+                    st.sidebar.info(f"{uploaded_research.name} is already indexed and unchanged. Skipped.")
+                else:
+                    st.sidebar.success(f"Successfully indexed {uploaded_research.name}! ({report.points} new chunks in {report.total_s:.1f}s)")
                 os.remove(temp_path)
             if st.sidebar.button("🗑️ Clear Knowledge Base"):
                 msg = clear_research_collection()
@@ -74,13 +151,16 @@ if app_mode == "AI Sidekick":
     
     selected_provider = st.sidebar.selectbox(
         "LLM Provider",
-        options=["Ollama (Local)", "Gemini 3 Flash", "Groq", "OpenAI"],
-        index=0
+        options=[*PROVIDERS, AUTO],
+        index=0,
+        help="Auto sends each message to the provider expected to answer first (hosted providers need a key in .env)."
     )
+    if selected_provider in PROVIDERS and not llm_clients.is_healthy(selected_provider):
+        st.sidebar.warning(f"⚠️ {selected_provider} has been failing: {llm_clients.health(selected_provider).last_error}")
     
     # Conditional API Key Entry
     api_key = None
-    if selected_provider != "Ollama (Local)":
+    if selected_provider not in (OLLAMA, AUTO):
         api_key = st.sidebar.text_input(
             f"Enter {selected_provider} API Key",
             type="password",
@@ -95,15 +175,21 @@ if app_mode == "AI Sidekick":
     
     st.sidebar.divider()
     if st.sidebar.button("Clear Conversation"):
-        st.session_state.messages = []
+        reset_chat_window()
         st.rerun()
         
     # NEW: History Section (UI only for now, logic comes next)
     st.sidebar.subheader("📜 History")
     st.sidebar.caption(f"Active: {st.session_state.current_session_title}")
 
-    # Return all the session_ids of past conversations
-    past_sessions = get_unique_sessions()
+    # Past conversations, one page at a time
+    past_sessions = []
+    for page in range(st.session_state.session_pages):
+        page_sessions = get_unique_sessions(limit=settings.SESSION_PAGE_SIZE, skip=page * settings.SESSION_PAGE_SIZE)
+        past_sessions.extend(page_sessions)
+        if len(page_sessions) < settings.SESSION_PAGE_SIZE:
+            break
+    has_more_sessions = len(past_sessions) == st.session_state.session_pages * settings.SESSION_PAGE_SIZE
 
     # If there are no past conversations in the MongoDB
     if not past_sessions:
@@ -111,14 +197,15 @@ if app_mode == "AI Sidekick":
     else:
         for sess in past_sessions:
             if st.sidebar.button(f"💬 {sess['title']}", key=sess['_id']):
-                st.session_state.session_id = sess['_id']
-                st.session_state.session_title = sess['title']
-                st.session_state.messages = get_session_messages(session_id=sess['_id'])
+                open_session(sess['_id'], sess['title'])
                 st.rerun()
+        if has_more_sessions and st.sidebar.button("Load more", use_container_width=True):
+            st.session_state.session_pages += 1
+            st.rerun()
 
     # Create New Conversation
     if st.sidebar.button("➕ New Chat", use_container_width=True):
-        st.session_state.messages = []
+        reset_chat_window()
         st.session_state.current_session_id = str(uuid.uuid4()) # Generate fresh ID
         st.session_state.current_session_title = "New Conversation"
         st.rerun()
@@ -144,14 +231,22 @@ def save_workout_callback():
             "split": st.session_state.wk_type,
             "exercises": exercises
         }
-        # Save to MongoDB
-        add_mongo_log("workout", payload)
+        # Saved locally, synced to the cloud in the background
+        today = date.today().isoformat()
+        try:
+            log_repository.log("workout", payload, day=today)
+        except DatabaseException as e:
+            st.error(f"Workout couldn't be saved: {e.message}")
+            return
+        # Only the exercises logged today get re-aggregated for the Analytics tab
+        from app.services import analytics
+        analytics.refresh_workout_summary(today, [ex["exercise"] for ex in exercises])
         
         # Reset UI state
         for i in range(st.session_state.exercise_count):
             st.session_state[f"ex_name_{i}"] = ""
         st.session_state.exercise_count = 1
-        st.toast("Workout session saved to Cloud! 💪")
+        st.toast("Workout session saved! 💪")
     
 def save_fitness_callback():
     w = st.session_state.get("fit_weight", 0.0)
@@ -161,8 +256,11 @@ def save_fitness_callback():
             "calories": st.session_state.get("fit_cals", 0),
             "protein": st.session_state.get("fit_prot", 0)
         }
-        result = add_mongo_log("fitness", payload)
-        print(f"DEBUG: Mongo Insert Result: {result}") # Check your VS Code terminal for this!
+        try:
+            log_repository.log("fitness", payload, day=date.today().isoformat())
+        except DatabaseException as e:
+            st.error(f"Fitness log couldn't be saved: {e.message}")
+            return
         st.toast(f"Fitness Log Saved! 📈")
     else:
         st.error("Weight must be greater than 0.")
@@ -211,12 +309,68 @@ if app_mode == "Dashboard":
             if st.form_submit_button("Log Entry"):
                 if content:
                     payload = {"content": content, "mood": mood, "tags": tags.split(",")}
-                    add_mongo_log("journal", payload)
-                    st.success("Reflection saved to MongoDB.")
+                    try:
+                        log_repository.log("journal", payload)
+                        st.success("Reflection saved.")
+                    except DatabaseException as e:
+                        st.error(f"Reflection couldn't be saved: {e.message}")
 
     with tab4:
+        # Imported here so the AI Sidekick page never loads pandas or runs the analytics queries
+        from app.services import analytics
+
         st.header("Progress Analytics")
-        st.info("Visualizations (Plotly/Altair) will be integrated here in Phase 4.")
+        trend = analytics.weight_trend(days=90)
+        progress = analytics.exercise_progress()
+        if trend.empty and progress.empty:
+            st.info("Log some body stats or workouts to see your progress here.")
+
+        if not trend.empty:
+            balance = analytics.calorie_balance()
+            c1, c2, c3 = st.columns(3)
+            weekly_change = balance.get("weight_change_per_week")
+            c1.metric("Weight (7-day avg)", f"{trend['weight_trend'].iloc[-1]:.1f} kg",
+                      delta=f"{weekly_change:+.2f} kg/week" if weekly_change is not None else None,
+                      delta_color="off")
+            # No body logs in the last 28 days leaves the balance empty even with an older trend
+            if balance:
+                c2.metric("Calories (28-day avg)", f"{balance['avg_calories']} kcal",
+                          delta=f"{balance['vs_goal']:+d} vs goal", delta_color="off")
+            else:
+                c2.metric("Calories (28-day avg)", "—")
+            deficit = balance.get("implied_daily_deficit")
+            c3.metric("Implied deficit", f"{deficit:+d} kcal/day" if deficit is not None else "—")
+            st.subheader("Weight Trend")
+            st.line_chart(trend[["weight", "weight_trend"]])
+
+        if not progress.empty:
+            st.subheader("Strength (estimated 1RM)")
+            exercise = st.selectbox("Exercise", sorted(progress["exercise_name"].unique()))
+            st.line_chart(progress[progress["exercise_name"] == exercise].set_index("date")[["top_e1rm", "top_weight"]])
+            st.subheader("Weekly Volume (sets × reps × kg)")
+            st.bar_chart(analytics.weekly_volume(weeks=12))
+            st.subheader("Recent PRs")
+            st.dataframe(analytics.personal_records(days=30), hide_index=True)
+
+    with tab5:
+        st.header("System Admin")
+        with st.expander("⏱️ Chat pipeline telemetry"):
+            latency = telemetry.metrics.latency_summary()
+            if not latency:
+                st.caption("No chat turns recorded since AVA started.")
+            else:
+                st.caption(f"p50/p95 over the last {telemetry.metrics.window} turns per stage and provider. "
+                           f"Full traces: {telemetry.TRACE_LOG_FILE}")
+                st.dataframe(latency, hide_index=True)
+                tokens = [row for row in telemetry.metrics.counters() if row["name"] == "tokens"]
+                if tokens:
+                    st.subheader("Tokens by provider/model")
+                    st.dataframe([{key: row[key] for key in ("provider", "model", "kind", "value")} for row in tokens],
+                                 hide_index=True)
+            if settings.METRICS_PORT:
+                st.caption(f"OpenMetrics endpoint: http://127.0.0.1:{settings.METRICS_PORT}/metrics")
+            st.subheader("LLM providers")
+            st.dataframe(llm_clients.health_report(), hide_index=True)
 
     # with tab5:
     #     st.header("System Admin")
@@ -232,18 +386,27 @@ if app_mode == "Dashboard":
     #         st.toast("Journal entries cleared! 👍")
 
 else: # AI SIDEKICK MODE
+    # The chat pipeline (LangChain, vector store, tokenizers) is only imported once the Sidekick is opened
+    from app.core.llm import get_ava_response
+    from app.services.vector_engine import warm_up as warm_up_retrieval
+
+    # Load the embedding model in the background while the user types their first message
+    warm_up_retrieval()
+
     st.title(f"🤖 AVA: {selected_ai_mode}")
     
-    # Display Chat History
-    for message in st.session_state.messages:
+    # Display Chat History (latest window only)
+    hidden_count = max(0, len(st.session_state.messages) - st.session_state.visible_messages)
+    if hidden_count or st.session_state.has_older_messages:
+        hidden_label = f"{hidden_count} earlier" if hidden_count else "Earlier"
+        st.button(f"⬆️ {hidden_label} messages hidden — show more", on_click=show_earlier_messages)
+    for message in st.session_state.messages[hidden_count:]:
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
 
     if prompt := st.chat_input("Message AVA..."):
         # 1. Add user message to state and UI
-        if st.session_state.current_session_title == "New Conversation":
-            # Updating the chat title
-            st.session_state.session_title = get_chat_title(prompt)
+        is_new_session = st.session_state.current_session_title == "New Conversation"
         st.session_state.messages.append({"role": "user", "content": prompt})
         with st.chat_message("user"):
             st.markdown(prompt)
@@ -251,11 +414,14 @@ else: # AI SIDEKICK MODE
         # 2. Generate Assistant Response
         with st.chat_message("assistant"):
             # Check for API Key requirement
-            is_cloud = st.session_state.provider != "Ollama (Local)"
+            is_cloud = st.session_state.provider not in (OLLAMA, AUTO)
             if is_cloud and not st.session_state.api_key:
                 st.error(f"Please enter your {st.session_state.provider} API Key in the sidebar.")
             else:
                 try:
+                    if is_new_session:
+                        # Instant title now; the model's title is generated once the answer is done
+                        st.session_state.current_session_title = heuristic_title(prompt)
                     # Capture the stream
                     # We use a placeholder or a brief status for the initial connection
                     with st.spinner(f"Connecting to {st.session_state.provider}..."):
@@ -273,6 +439,9 @@ else: # AI SIDEKICK MODE
                     
                     # 3. Store the final string in history
                     st.session_state.messages.append({"role": "assistant", "content": full_response})
+                    compact_chat_window()
+                    if is_new_session:
+                        start_title_generation(st.session_state.current_session_id, prompt)
                     
                 except Exception as e:
                     st.error(f"Error communicating with {st.session_state.provider}: {e}")
\ No newline at end of file
@@ -0,0 +1,245 @@
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+from app.core.config import settings
+from app.core.logger import logger, log_error_cleanly
+from app.database.sqlite_db import init_db, query_fitness_logs, query_workout_logs
+from app.database.sqlite_pool import get_pool
+
+# kcal stored in one kg of body mass, used to turn the weight trend into an energy balance
+KCAL_PER_KG = 7700
+WEIGHT_TREND_WINDOW = 7
+
+# --- SUMMARY TABLE ---
+# One row per (exercise, day) with that day's volume and best estimated 1RM. Logging a workout
+# only recomputes the rows of the exercises it touched, and every chart/stat below reads this
+# small table instead of re-aggregating the raw sets.
+def _create_summary_table(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS exercise_daily_summary (
+        exercise_name TEXT NOT NULL,
+        date TEXT NOT NULL,
+        sets INTEGER NOT NULL,
+        volume REAL NOT NULL,
+        top_weight REAL NOT NULL,
+        top_e1rm REAL NOT NULL,
+        PRIMARY KEY (exercise_name, date)
+    )""")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_exercise_daily_summary_date ON exercise_daily_summary (date)")
+
+
+def _summary_pool():
+    init_db()
+    pool = get_pool(settings.SQLITE_DB_PATH)
+    pool.ensure_schema("analytics", _create_summary_table)
+    return pool
+
+
+def epley_1rm(weight, reps):
+    """Estimated one-rep max (Epley). Works on scalars, NumPy arrays and Series alike."""
+    weight = np.asarray(weight, dtype=float)
+    reps = np.asarray(reps, dtype=float)
+    return np.where(reps <= 1, weight, weight * (1 + reps / 30))
+
+
+def _aggregate_sets(sets):
+    """Raw workout rows -> exercise_daily_summary rows, vectorized."""
+    if sets.empty:
+        return pd.DataFrame(columns=["exercise_name", "date", "sets", "volume", "top_weight", "top_e1rm"])
+    sets = sets.assign(
+        volume=sets["sets"].astype(float) * sets["reps"].astype(float) * sets["weight_lifted"].astype(float),
+        e1rm=epley_1rm(sets["weight_lifted"], sets["reps"]),
+        date=sets["date"].dt.strftime("%Y-%m-%d"),
+    )
+    return (sets.groupby(["exercise_name", "date"], as_index=False)
+                .agg(sets=("sets", "sum"), volume=("volume", "sum"),
+                     top_weight=("weight_lifted", "max"), top_e1rm=("e1rm", "max")))
+
+
+def _upsert_summary(conn, summary):
+    conn.executemany(
+        """INSERT INTO exercise_daily_summary (exercise_name, date, sets, volume, top_weight, top_e1rm)
+           VALUES (?, ?, ?, ?, ?, ?)
+           ON CONFLICT(exercise_name, date) DO UPDATE SET
+               sets = excluded.sets, volume = excluded.volume,
+               top_weight = excluded.top_weight, top_e1rm = excluded.top_e1rm""",
+        [(row.exercise_name, row.date, int(row.sets), float(row.volume), float(row.top_weight), float(row.top_e1rm))
+         for row in summary.itertuples(index=False)],
+    )
+
+
+def refresh_workout_summary(day, exercise_names):
+    """Recomputes the summary rows of the exercises logged on `day` (after a workout is saved).
+
+    Args:
+        day (str | date): Date of the workout (YYYY-MM-DD).
+        exercise_names (list[str]): Exercises the workout contained.
+    """
+    try:
+        names = set(exercise_names)
+        sets = query_workout_logs(start=day, end=day, columns=["date", "exercise_name", "sets", "reps", "weight_lifted"])
+        summary = _aggregate_sets(sets[sets["exercise_name"].isin(names)])
+        with _summary_pool().transaction() as conn:
+            _upsert_summary(conn, summary)
+    except Exception as e:
+        log_error_cleanly(e)
+
+
+def rebuild_workout_summary():
+    """Recomputes the whole summary table from workout_logs (first run, or after edits)."""
+    sets = query_workout_logs(columns=["date", "exercise_name", "sets", "reps", "weight_lifted"])
+    summary = _aggregate_sets(sets)
+    with _summary_pool().transaction() as conn:
+        conn.execute("DELETE FROM exercise_daily_summary")
+        _upsert_summary(conn, summary)
+    logger.info(f"Rebuilt exercise summary: {len(summary)} exercise-days from {len(sets)} sets")
+    return len(summary)
+
+
+def _load_summary(start=None, exercise_name=None):
+    query = "SELECT exercise_name, date, sets, volume, top_weight, top_e1rm FROM exercise_daily_summary"
+    where, params = [], []
+    if start is not None:
+        where.append("date >= ?")
+        params.append(str(start))
+    if exercise_name is not None:
+        where.append("exercise_name = ?")
+        params.append(exercise_name)
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    query += " ORDER BY exercise_name, date"
+
+    pool = _summary_pool()
+    with pool.connection() as conn:
+        empty = conn.execute("SELECT 1 FROM exercise_daily_summary LIMIT 1").fetchone() is None
+        has_sets = conn.execute("SELECT 1 FROM workout_logs LIMIT 1").fetchone() is not None
+    if empty and has_sets:
+        rebuild_workout_summary()
+    with pool.connection() as conn:
+        summary = pd.read_sql_query(query, conn, params=params)
+    summary["date"] = pd.to_datetime(summary["date"], format="%Y-%m-%d")
+    return summary
+
+
+# --- STRENGTH ---
+def exercise_progress(exercise_name=None):
+    """Per exercise and day: volume, best e1RM and whether that e1RM was a PR at the time."""
+    summary = _load_summary(exercise_name=exercise_name)
+    if summary.empty:
+        return summary.assign(is_pr=pd.Series(dtype=bool))
+    running_best = summary.groupby("exercise_name")["top_e1rm"].cummax()
+    previous_best = running_best.groupby(summary["exercise_name"]).shift()
+    # The first session of an exercise sets the baseline rather than a PR
+    return summary.assign(is_pr=summary["top_e1rm"] > previous_best.fillna(np.inf))
+
+
+def personal_records(days=30):
+    """PRs (new best e1RM per exercise) set within the last `days` days, newest first."""
+    progress = exercise_progress()
+    if progress.empty:
+        return progress
+    since = pd.Timestamp(date.today() - timedelta(days=days))
+    prs = progress[progress["is_pr"] & (progress["date"] >= since)]
+    return prs.sort_values("date", ascending=False)[["date", "exercise_name", "top_weight", "top_e1rm"]]
+
+
+def weekly_volume(weeks=12):
+    """Total volume (sets x reps x load) per ISO week and exercise, last `weeks` weeks."""
+    summary = _load_summary(start=date.today() - timedelta(weeks=weeks))
+    if summary.empty:
+        return pd.DataFrame()
+    week = summary["date"].dt.to_period("W-SUN").dt.start_time
+    return summary.assign(week=week).pivot_table(index="week", columns="exercise_name",
+                                                 values="volume", aggfunc="sum", fill_value=0.0)
+
+
+# --- BODY & NUTRITION ---
+def weight_trend(days=90, window=WEIGHT_TREND_WINDOW):
+    """Daily weight with its rolling mean and calories, last `days` days."""
+    logs = query_fitness_logs(start=date.today() - timedelta(days=days), columns=["date", "weight", "calories"])
+    if logs.empty:
+        return logs
+    daily = logs.groupby("date").agg(weight=("weight", "mean"), calories=("calories", "sum"))
+    daily = daily.astype(float)
+    daily["weight_trend"] = daily["weight"].rolling(window, min_periods=1).mean()
+    return daily
+
+
+def _slope_per_day(series):
+    """Least-squares slope of a dated series, in units per day."""
+    series = series.dropna()
+    if len(series) < 2:
+        return None
+    x = (series.index - series.index[0]).days.to_numpy(dtype=float)
+    if np.ptp(x) == 0:
+        return None
+    return float(np.polyfit(x, series.to_numpy(dtype=float), 1)[0])
+
+
+def calorie_balance(days=28):
+    """Average intake vs goal, and the deficit implied by the weight trend over `days` days."""
+    daily = weight_trend(days=days)
+    if daily.empty:
+        return {}
+    slope = _slope_per_day(daily["weight"])
+    avg_calories = float(daily["calories"].mean())
+    balance = {
+        "avg_calories": round(avg_calories),
+        "calorie_goal": settings.DAILY_CALORIE_GOAL,
+        "vs_goal": round(avg_calories - settings.DAILY_CALORIE_GOAL),
+        "weight_change_per_week": round(slope * 7, 2) if slope is not None else None,
+        # Losing weight means eating below maintenance: deficit = -slope x energy density
+        "implied_daily_deficit": round(-slope * KCAL_PER_KG) if slope is not None else None,
+    }
+    if slope is not None:
+        balance["estimated_maintenance"] = round(avg_calories - slope * KCAL_PER_KG)
+    return balance
+
+
+# --- LLM CONTEXT ---
+def fitness_stats_context(top_exercises=5, weeks=4):
+    """Compact, precomputed CLIENT DATA for the fitness prompt ("" when nothing is logged yet)."""
+    lines = []
+    try:
+        daily = weight_trend(days=28)
+        if not daily.empty:
+            latest = daily.iloc[-1]
+            lines.append(f"Weight: latest {latest['weight']:.1f}kg, 7-day avg {latest['weight_trend']:.1f}kg "
+                         f"(target {settings.TARGET_WEIGHT}kg)")
+            balance = calorie_balance(days=28)
+            if balance.get("weight_change_per_week") is not None:
+                lines.append(f"Trend: {balance['weight_change_per_week']:+.2f}kg/week, implied "
+                             f"{balance['implied_daily_deficit']:+d} kcal/day deficit, "
+                             f"est. maintenance {balance['estimated_maintenance']} kcal")
+            if balance:
+                lines.append(f"Calories (28d avg): {balance['avg_calories']} vs goal {balance['calorie_goal']} "
+                             f"({balance['vs_goal']:+d})")
+
+        progress = exercise_progress()
+        if not progress.empty:
+            since = pd.Timestamp(date.today() - timedelta(weeks=weeks))
+            recent = progress[progress["date"] >= since]
+            ranked = recent.groupby("exercise_name")["volume"].sum().nlargest(top_exercises).index
+            for exercise in ranked:
+                history = progress[progress["exercise_name"] == exercise]
+                current = history.iloc[-1]
+                before = history[history["date"] < since]
+                change = (f", {current['top_e1rm'] - before['top_e1rm'].max():+.1f}kg e1RM vs {weeks} weeks ago"
+                          if not before.empty else "")
+                lines.append(f"{exercise}: e1RM {current['top_e1rm']:.1f}kg (top set {current['top_weight']:.1f}kg "
+                             f"on {current['date']:%Y-%m-%d}){change}")
+
+            volume = weekly_volume(weeks=2).sum(axis=1)
+            if len(volume) >= 2:
+                lines.append(f"Weekly volume: {volume.iloc[-1]:,.0f}kg this week vs {volume.iloc[-2]:,.0f}kg last week")
+            prs = personal_records(days=14)
+            if not prs.empty:
+                lines.append("Recent PRs: " + ", ".join(f"{row.exercise_name} {row.top_e1rm:.1f}kg e1RM ({row.date:%m-%d})"
+                                                        for row in prs.head(5).itertuples()))
+    except Exception as e:
+        log_error_cleanly(e)
+        return ""
+
+    if not lines:
+        return ""
+    return "CLIENT DATA (precomputed):\n" + "\n".join(f"- {line}" for line in lines)
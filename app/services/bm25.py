@@ -0,0 +1,56 @@
+import re
+import zlib
+from collections import Counter
+from qdrant_client.models import SparseVector
+
+# --- BM25 SPARSE ENCODING ---
+# Documents are stored as sparse vectors of saturated term frequencies and Qdrant applies the
+# IDF part at query time (SparseVectorParams(modifier=Modifier.IDF)), so the index never has
+# to be rebuilt when new documents change the corpus statistics.
+SPARSE_VECTOR_NAME = "bm25"
+K1 = 1.2
+B = 0.75
+# Average token count of a 1000-char chunk; stands in for the corpus average document length
+AVG_DOC_LEN = 160
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.\-][a-z0-9]+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were "
+    "will with what which who how why when where does do did can could should would i you we they "
+    "he she them our your their not no".split()
+)
+
+
+def tokenize(text):
+    """Lowercased terms, keeping things like 'gpt-4', 'f1.5' or 'llama-3.1' in one piece."""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def term_id(token):
+    # Stable across processes (unlike hash()), so index and query time always agree
+    return zlib.crc32(token.encode("utf-8")) & 0x7FFFFFFF
+
+
+def _to_sparse(weights):
+    merged = {}
+    for token, weight in weights.items():
+        index = term_id(token)
+        merged[index] = merged.get(index, 0.0) + weight
+    indices = sorted(merged)
+    return SparseVector(indices=indices, values=[merged[i] for i in indices])
+
+
+def encode_document(text):
+    """BM25 term-frequency component of a chunk as a Qdrant sparse vector."""
+    tokens = tokenize(text)
+    if not tokens:
+        return SparseVector(indices=[], values=[])
+
+    length_norm = K1 * (1 - B + B * len(tokens) / AVG_DOC_LEN)
+    weights = {token: tf * (K1 + 1) / (tf + length_norm) for token, tf in Counter(tokens).items()}
+    return _to_sparse(weights)
+
+
+def encode_query(text):
+    """Each distinct query term with weight 1; Qdrant multiplies in the IDF."""
+    return _to_sparse({token: 1.0 for token in set(tokenize(text))})
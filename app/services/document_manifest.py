@@ -0,0 +1,119 @@
+import hashlib
+import uuid
+from pathlib import Path
+from app.core.config import settings
+from app.core.logger import logger
+from app.database.sqlite_pool import get_pool
+
+# Namespace for deterministic Qdrant point IDs: the same chunk of the same document in the
+# same collection always maps to the same point, so re-indexing overwrites instead of duplicating.
+POINT_NAMESPACE = uuid.UUID("6f1c2a52-3c1e-4b8e-9a43-2a8f5f0d7a11")
+
+
+def _create_tables(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS research_documents (
+        collection TEXT NOT NULL,
+        doc_key TEXT NOT NULL,
+        file_hash TEXT NOT NULL,
+        chunk_count INTEGER NOT NULL,
+        indexed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (collection, doc_key)
+    )""")
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS research_chunks (
+        collection TEXT NOT NULL,
+        doc_key TEXT NOT NULL,
+        chunk_hash TEXT NOT NULL,
+        point_id TEXT NOT NULL,
+        PRIMARY KEY (collection, doc_key, chunk_hash)
+    )""")
+
+
+def _pool():
+    pool = get_pool(settings.SQLITE_DB_PATH)
+    pool.ensure_schema("research_manifest", _create_tables)
+    return pool
+
+
+def document_key(filepath, root=None):
+    """Identity of a document across uploads.
+
+    Files from a folder or list are keyed by their path relative to the ingest root, so
+    a/intro.pdf and b/intro.pdf stay two documents. A single upload (which lands in a temp
+    path) is keyed by its file name.
+    """
+    if root is None:
+        return Path(filepath).name
+    return Path(filepath).resolve().relative_to(root).as_posix()
+
+
+def hash_file(filepath, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def hash_chunk(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def point_id_for(collection_name, doc_key, chunk_hash):
+    return str(uuid.uuid5(POINT_NAMESPACE, f"{collection_name}:{doc_key}:{chunk_hash}"))
+
+
+def get_file_hash(collection_name, doc_key):
+    """Returns the hash the document was last indexed with, or None if it was never indexed."""
+    with _pool().connection() as conn:
+        row = conn.execute(
+            "SELECT file_hash FROM research_documents WHERE collection = ? AND doc_key = ?",
+            (collection_name, doc_key),
+        ).fetchone()
+    return row[0] if row else None
+
+
+def get_chunk_points(collection_name, doc_key):
+    """Maps chunk hash -> point ID for everything currently indexed for a document."""
+    with _pool().connection() as conn:
+        rows = conn.execute(
+            "SELECT chunk_hash, point_id FROM research_chunks WHERE collection = ? AND doc_key = ?",
+            (collection_name, doc_key),
+        ).fetchall()
+    return dict(rows)
+
+
+def save_document(collection_name, doc_key, file_hash, chunk_points):
+    """Replaces the manifest entry of a document with its freshly indexed chunks.
+
+    Args:
+        collection_name (str): Qdrant collection.
+        doc_key (str): Document identity (see document_key).
+        file_hash (str): Hash of the whole file.
+        chunk_points (dict): chunk hash -> point ID of every chunk now in the collection.
+    """
+    with _pool().transaction() as conn:
+        conn.execute("DELETE FROM research_chunks WHERE collection = ? AND doc_key = ?",
+                     (collection_name, doc_key))
+        conn.executemany(
+            "INSERT INTO research_chunks (collection, doc_key, chunk_hash, point_id) VALUES (?, ?, ?, ?)",
+            [(collection_name, doc_key, chunk_hash, point_id) for chunk_hash, point_id in chunk_points.items()],
+        )
+        conn.execute(
+            """INSERT INTO research_documents (collection, doc_key, file_hash, chunk_count)
+               VALUES (?, ?, ?, ?)
+               ON CONFLICT(collection, doc_key) DO UPDATE SET
+                   file_hash = excluded.file_hash,
+                   chunk_count = excluded.chunk_count,
+                   indexed_at = CURRENT_TIMESTAMP""",
+            (collection_name, doc_key, file_hash, len(chunk_points)),
+        )
+    logger.info(f"Manifest updated for '{doc_key}' in '{collection_name}': {len(chunk_points)} chunks")
+
+
+def clear_collection(collection_name):
+    """Forgets every document of a collection (used when the collection itself is dropped)."""
+    with _pool().transaction() as conn:
+        conn.execute("DELETE FROM research_chunks WHERE collection = ?", (collection_name,))
+        conn.execute("DELETE FROM research_documents WHERE collection = ?", (collection_name,))
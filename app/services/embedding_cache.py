@@ -0,0 +1,163 @@
+import hashlib
+import threading
+import time
+from array import array
+from langchain_core.embeddings import Embeddings
+from app.core.logger import logger
+from app.database.sqlite_pool import open_connection
+
+# SQLite caps the number of '?' placeholders per statement, so lookups go in slices
+LOOKUP_SLICE = 500
+
+
+class CachedEmbeddings(Embeddings):
+    """Content-addressed, on-disk cache in front of any LangChain embeddings object.
+
+    Vectors are stored as float32 blobs keyed by (model name, sha256 of the text), so the
+    same boilerplate page, re-indexed chunk or repeated research question is only ever
+    embedded once per model. The store is bounded to `max_entries` and evicts the least
+    recently used vectors first.
+    """
+
+    def __init__(self, inner, model_name, path, max_entries=200_000):
+        self.inner = inner
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+        # One long-lived connection guarded by self._lock; same pragmas as the app database
+        self._conn = open_connection(path)
+        self._conn.execute("""
+        CREATE TABLE IF NOT EXISTS embeddings (
+            model TEXT NOT NULL,
+            text_hash TEXT NOT NULL,
+            vector BLOB NOT NULL,
+            last_used REAL NOT NULL,
+            PRIMARY KEY (model, text_hash)
+        )""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+        self._entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    @staticmethod
+    def _hash(text):
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _pack(vector):
+        return array("f", vector).tobytes()
+
+    @staticmethod
+    def _unpack(blob):
+        vector = array("f")
+        vector.frombytes(blob)
+        return vector.tolist()
+
+    def _lookup(self, hashes):
+        found = {}
+        unique = list(dict.fromkeys(hashes))
+        for start in range(0, len(unique), LOOKUP_SLICE):
+            chunk = unique[start:start + LOOKUP_SLICE]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                (self.model_name, *chunk),
+            ).fetchall()
+            found.update(rows)
+        return found
+
+    def _store(self, items):
+        now = time.time()
+        # A key can already be there if another thread embedded the same text since the lookup;
+        # its vector is the same, so it is kept and only the rows actually inserted are counted
+        changes_before = self._conn.total_changes
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO embeddings (model, text_hash, vector, last_used) VALUES (?, ?, ?, ?)",
+            [(self.model_name, text_hash, self._pack(vector), now) for text_hash, vector in items],
+        )
+        self._entries += self._conn.total_changes - changes_before
+        if self._entries > self.max_entries:
+            self._evict()
+
+    def _touch(self, hashes):
+        now = time.time()
+        self._conn.executemany(
+            "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+            [(now, self.model_name, text_hash) for text_hash in hashes],
+        )
+
+    def _evict(self):
+        # Trim 10% below the bound so we don't evict on every single insert
+        self._entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        overflow = self._entries - int(self.max_entries * 0.9)
+        if overflow <= 0:
+            return
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE rowid IN (SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+            (overflow,),
+        )
+        self._entries -= overflow
+        self._evictions += overflow
+        logger.info(f"Embedding cache evicted {overflow} least recently used vectors")
+
+    def embed_documents(self, texts):
+        hashes = [self._hash(text) for text in texts]
+        with self._lock:
+            cached = self._lookup(hashes)
+
+        missing = {}
+        for text, text_hash in zip(texts, hashes):
+            if text_hash not in cached:
+                missing.setdefault(text_hash, text)
+
+        # Embed outside the lock so concurrent queries aren't stuck behind a big ingestion batch
+        computed = {}
+        if missing:
+            vectors = self.inner.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+
+        with self._lock:
+            self._hits += len(texts) - sum(1 for text_hash in hashes if text_hash in computed)
+            self._misses += sum(1 for text_hash in hashes if text_hash in computed)
+            if cached:
+                self._touch(cached.keys())
+            if computed:
+                self._store(computed.items())
+            self._conn.commit()
+
+        return [computed[text_hash] if text_hash in computed else self._unpack(cached[text_hash])
+                for text_hash in hashes]
+
+    def embed_query(self, text):
+        # Some models embed queries differently from documents, so they get their own key space
+        text_hash = self._hash("query\0" + text)
+        with self._lock:
+            cached = self._lookup([text_hash])
+            if cached:
+                self._hits += 1
+                self._touch([text_hash])
+                self._conn.commit()
+                return self._unpack(cached[text_hash])
+
+        vector = self.inner.embed_query(text)
+        with self._lock:
+            self._misses += 1
+            self._store([(text_hash, vector)])
+            self._conn.commit()
+        return vector
+
+    def stats(self):
+        """Hit-rate and size counters since the process started."""
+        total = self._hits + self._misses
+        return {
+            "model": self.model_name,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / total, 4) if total else None,
+            "entries": self._entries,
+            "max_entries": self.max_entries,
+            "evictions": self._evictions,
+        }
@@ -0,0 +1,110 @@
+import threading
+import time
+from langchain_core.documents import Document
+from app.core.config import settings
+from app.core.logger import logger
+from app.services import bm25
+
+# --- HYBRID RETRIEVAL ---
+# Dense MiniLM search finds paraphrases, BM25 finds exact terms (model names, acronyms, equation
+# labels). Both candidate lists are merged with reciprocal-rank fusion, which only looks at ranks
+# and so needs no score calibration between the two, then optionally reranked by a cross-encoder.
+RRF_K = 60
+RERANK_POOL = 10
+# Reranking only starts if retrieval used less than this share of the latency budget
+RERANK_BUDGET_SHARE = 0.5
+
+_cross_encoder = None
+_cross_encoder_lock = threading.Lock()
+
+
+def _get_cross_encoder():
+    global _cross_encoder
+    if _cross_encoder is None:
+        with _cross_encoder_lock:
+            if _cross_encoder is None:
+                from sentence_transformers import CrossEncoder
+
+                start = time.perf_counter()
+                _cross_encoder = CrossEncoder(settings.RESEARCH_RERANK_MODEL, device="cpu")
+                logger.info(f"Loaded reranker in {(time.perf_counter() - start) * 1000:.0f}ms")
+    return _cross_encoder
+
+
+def dense_search(store, question, limit):
+    """[(point_id, Document)] from the MiniLM vectors, best first."""
+    results = store.similarity_search_with_score(query=question, k=limit)
+    return [(doc.metadata.get("_id"), doc) for doc, _ in results]
+
+
+def sparse_search(client, collection_name, question, limit):
+    """[(point_id, Document)] from the BM25 sparse vectors, best first."""
+    query = bm25.encode_query(question)
+    if not query.indices:
+        return []
+
+    response = client.query_points(collection_name=collection_name,
+                                   query=query,
+                                   using=bm25.SPARSE_VECTOR_NAME,
+                                   limit=limit,
+                                   with_payload=True)
+    hits = []
+    for point in response.points:
+        payload = point.payload or {}
+        metadata = {**payload.get("metadata", {}), "_id": point.id}
+        hits.append((point.id, Document(page_content=payload.get("page_content", ""), metadata=metadata)))
+    return hits
+
+
+def reciprocal_rank_fusion(*ranked_lists, k=RRF_K):
+    """Merges ranked [(id, doc)] lists into one list ordered by sum(1 / (k + rank))."""
+    scores = {}
+    docs = {}
+    for ranked in ranked_lists:
+        for rank, (point_id, doc) in enumerate(ranked, start=1):
+            scores[point_id] = scores.get(point_id, 0.0) + 1.0 / (k + rank)
+            docs.setdefault(point_id, doc)
+    return [docs[point_id] for point_id in sorted(scores, key=scores.get, reverse=True)]
+
+
+def rerank(question, docs):
+    """Reorders docs by cross-encoder relevance to the question."""
+    scores = _get_cross_encoder().predict([(question, doc.page_content) for doc in docs])
+    return [doc for _, doc in sorted(zip(scores, docs), key=lambda pair: pair[0], reverse=True)]
+
+
+def retrieve(question, client, store, collection_name, k=None, mode="hybrid", use_rerank=None, budget_ms=None):
+    """Top-k research chunks for a question.
+
+    Args:
+        question (str): The user's research question.
+        client (QdrantClient): Client holding the collection.
+        store (QdrantVectorStore): Dense store for the same collection.
+        collection_name (str): Collection to search.
+        k (int, optional): Chunks to return. Defaults to settings.RESEARCH_TOP_K.
+        mode (str, optional): "dense", "sparse" or "hybrid". Defaults to "hybrid".
+        use_rerank (bool, optional): Cross-encoder rerank. Defaults to settings.RESEARCH_RERANK.
+        budget_ms (float, optional): Latency budget. Defaults to settings.RESEARCH_LATENCY_BUDGET_MS.
+
+    Returns:
+        list[Document]: best chunks first.
+    """
+    k = k or settings.RESEARCH_TOP_K
+    use_rerank = settings.RESEARCH_RERANK if use_rerank is None else use_rerank
+    budget_ms = budget_ms or settings.RESEARCH_LATENCY_BUDGET_MS
+    candidates = max(k, settings.RESEARCH_CANDIDATES)
+    start = time.perf_counter()
+
+    dense = dense_search(store, question, candidates) if mode in ("dense", "hybrid") else []
+    sparse = sparse_search(client, collection_name, question, candidates) if mode in ("sparse", "hybrid") else []
+    fused = reciprocal_rank_fusion(dense, sparse)
+
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if use_rerank and len(fused) > 1:
+        if elapsed_ms < budget_ms * RERANK_BUDGET_SHARE:
+            pool = fused[:RERANK_POOL]
+            fused = rerank(question, pool) + fused[RERANK_POOL:]
+        else:
+            logger.info(f"Skipping rerank: retrieval already took {elapsed_ms:.0f}ms of a {budget_ms}ms budget")
+
+    return fused[:k]
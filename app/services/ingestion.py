@@ -0,0 +1,279 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from multiprocessing import get_context
+from pathlib import Path
+from pypdf import PdfReader
+from qdrant_client.models import PointStruct
+from qdrant_client.models import PointIdsList
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from app.core.logger import logger
+from app.services import document_manifest
+from app.services import bm25
+
+# --- PIPELINE TUNING ---
+# Every stage works on a bounded window so peak memory stays flat no matter how big the PDF is:
+# at most MAX_INFLIGHT_TASKS page ranges are extracted at once, and chunks are embedded and
+# upserted in fixed-size batches instead of being materialized for the whole document.
+PAGES_PER_TASK = 8
+EMBED_BATCH_SIZE = 64
+UPSERT_BATCH_SIZE = 256
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 100
+MAX_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+MAX_INFLIGHT_TASKS = MAX_WORKERS * 2
+
+
+@dataclass
+class IngestionReport:
+    """Counters and per-stage timings for one ingestion run."""
+    files: list = field(default_factory=list)
+    skipped_files: list = field(default_factory=list)
+    pages: int = 0
+    chunks: int = 0
+    reused_chunks: int = 0
+    embedded: int = 0
+    points: int = 0
+    deleted_points: int = 0
+    extract_s: float = 0.0  # summed worker time, so throughput is per extraction core
+    chunk_s: float = 0.0
+    embed_s: float = 0.0
+    upsert_s: float = 0.0
+    total_s: float = 0.0
+
+    def throughput(self):
+        """Items per second for each stage."""
+        def _rate(count, seconds):
+            return round(count / seconds, 2) if seconds > 0 else None
+
+        return {
+            "extract_pages_per_s": _rate(self.pages, self.extract_s),
+            "chunk_pages_per_s": _rate(self.pages, self.chunk_s),
+            "embed_chunks_per_s": _rate(self.embedded, self.embed_s),
+            "upsert_points_per_s": _rate(self.points, self.upsert_s),
+        }
+
+    def summary(self):
+        return (f"Indexed {len(self.files)} file(s) ({len(self.skipped_files)} unchanged): "
+                f"{self.pages} pages -> {self.chunks} chunks ({self.reused_chunks} reused) -> "
+                f"{self.points} points upserted, {self.deleted_points} stale deleted "
+                f"in {self.total_s:.2f}s | {self.throughput()}")
+
+
+def collect_pdf_paths(source):
+    """Expands a file, a directory or a list of either into a sorted list of PDF paths.
+
+    Args:
+        source (str | Path | list): PDF file, folder of PDFs, or a list of those.
+    """
+    if isinstance(source, (list, tuple, set)):
+        paths = []
+        for item in source:
+            paths.extend(collect_pdf_paths(item))
+        return paths
+
+    path = Path(source)
+    if path.is_dir():
+        return sorted(str(p) for p in path.glob("*.pdf"))
+    return [str(path)]
+
+
+def ingest_root(source, paths):
+    """Directory document keys are relative to: None for a single file, else the deepest folder
+    holding every collected PDF (a folder source keys its files by plain name, as before).
+    """
+    if not paths or (not isinstance(source, (list, tuple, set)) and not Path(source).is_dir()):
+        return None
+    return Path(os.path.commonpath([str(Path(path).resolve().parent) for path in paths]))
+
+
+def _extract_page_range(filepath, start, stop):
+    """Worker: pulls the text of pages [start, stop) out of one PDF, plus the time it took."""
+    started = time.perf_counter()
+    reader = PdfReader(filepath)
+    pages = [(page_number, reader.pages[page_number].extract_text() or "")
+             for page_number in range(start, stop)]
+    return pages, time.perf_counter() - started
+
+
+def _iter_pages(page_counts, executor, report):
+    """Yields (filepath, page_number, total_pages, text) in document order.
+
+    Page ranges are handed to the process pool, but only MAX_INFLIGHT_TASKS at a time, so a
+    2,000 page report never has more than a few dozen pages of raw text in memory.
+    """
+    tasks = []
+    for filepath, total_pages in page_counts.items():
+        for start in range(0, total_pages, PAGES_PER_TASK):
+            tasks.append((filepath, start, min(start + PAGES_PER_TASK, total_pages), total_pages))
+
+    pending = deque()
+    task_iter = iter(tasks)
+
+    def _submit_next():
+        task = next(task_iter, None)
+        if task is None:
+            return
+        filepath, start, stop, total_pages = task
+        if executor is None:
+            pending.append((filepath, total_pages, _extract_page_range(filepath, start, stop)))
+        else:
+            pending.append((filepath, total_pages, executor.submit(_extract_page_range, filepath, start, stop)))
+
+    for _ in range(MAX_INFLIGHT_TASKS):
+        _submit_next()
+
+    while pending:
+        filepath, total_pages, result = pending.popleft()
+        pages, worker_s = result if executor is None else result.result()
+        report.extract_s += worker_s
+        _submit_next()
+
+        for page_number, text in pages:
+            report.pages += 1
+            yield filepath, page_number, total_pages, text
+
+
+def _iter_chunks(pages, splitter, report):
+    """Splits each page as it arrives, mirroring PyPDFLoader's per-page documents."""
+    for filepath, page_number, total_pages, text in pages:
+        start = time.perf_counter()
+        chunks = splitter.split_text(text) if text.strip() else []
+        report.chunk_s += time.perf_counter() - start
+
+        for chunk in chunks:
+            report.chunks += 1
+            yield chunk, {"source": filepath, "page": page_number, "total_pages": total_pages}
+
+
+def _iter_batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _upsert(client, collection_name, points, report):
+    start = time.perf_counter()
+    client.upsert(collection_name=collection_name, points=points, wait=True)
+    report.upsert_s += time.perf_counter() - start
+    report.points += len(points)
+
+
+class _DocumentState:
+    """Manifest bookkeeping for one file while it streams through the pipeline."""
+
+    def __init__(self, collection_name, filepath, root=None):
+        self.doc_key = document_manifest.document_key(filepath, root)
+        self.file_hash = document_manifest.hash_file(filepath)
+        self.existing = document_manifest.get_chunk_points(collection_name, self.doc_key)
+        self.seen = {}
+
+
+def _iter_new_chunks(chunks, states, collection_name, report):
+    """Drops chunks that are already in the collection, tagging the rest with a stable point ID."""
+    for text, metadata in chunks:
+        state = states[metadata["source"]]
+        chunk_hash = document_manifest.hash_chunk(text)
+        if chunk_hash in state.seen:
+            continue
+
+        point_id = document_manifest.point_id_for(collection_name, state.doc_key, chunk_hash)
+        state.seen[chunk_hash] = point_id
+        if chunk_hash in state.existing:
+            report.reused_chunks += 1
+            continue
+        yield text, metadata, point_id
+
+
+def ingest_pdfs(source, client, embeddings, collection_name="research_papers",
+                embed_batch_size=EMBED_BATCH_SIZE, upsert_batch_size=UPSERT_BATCH_SIZE, sparse=False):
+    """Streams one or more PDFs into a Qdrant collection.
+
+    Stages: page extraction (process pool) -> per-page chunking -> fixed-size embedding
+    batches -> bounded Qdrant upserts. The collection must already exist.
+
+    Indexing is incremental: a file whose hash matches the manifest is skipped outright, and a
+    changed file only embeds chunks that aren't indexed yet and deletes the ones that are gone.
+
+    Args:
+        source (str | Path | list): PDF file, folder of PDFs, or a list of those.
+        client (QdrantClient): Client to upsert into.
+        embeddings (Embeddings): LangChain embeddings used for the chunks.
+        collection_name (str, optional): Target collection. Defaults to "research_papers".
+        embed_batch_size (int, optional): Chunks per embedding call.
+        upsert_batch_size (int, optional): Max points per Qdrant upsert.
+        sparse (bool, optional): Also store a BM25 sparse vector per chunk for hybrid search.
+
+    Returns:
+        IngestionReport: counts and per-stage throughput.
+    """
+    report = IngestionReport(files=collect_pdf_paths(source))
+    splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    run_start = time.perf_counter()
+
+    root = ingest_root(source, report.files)
+    states = {}
+    for path in report.files:
+        state = _DocumentState(collection_name, path, root)
+        if document_manifest.get_file_hash(collection_name, state.doc_key) == state.file_hash:
+            report.skipped_files.append(path)
+        else:
+            states[path] = state
+
+    # A process pool only pays off when there is more than one task to spread out
+    page_counts = {path: len(PdfReader(path).pages) for path in states}
+    executor = None
+    if sum(page_counts.values()) > PAGES_PER_TASK and MAX_WORKERS > 1:
+        executor = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=get_context("spawn"))
+
+    try:
+        pages = _iter_pages(page_counts, executor, report)
+        chunks = _iter_new_chunks(_iter_chunks(pages, splitter, report), states, collection_name, report)
+
+        pending_points = []
+        for batch in _iter_batches(chunks, embed_batch_size):
+            texts = [text for text, _, _ in batch]
+            start = time.perf_counter()
+            vectors = embeddings.embed_documents(texts)
+            report.embed_s += time.perf_counter() - start
+            report.embedded += len(texts)
+
+            for (text, metadata, point_id), vector in zip(batch, vectors):
+                if sparse:
+                    vector = {"": vector, bm25.SPARSE_VECTOR_NAME: bm25.encode_document(text)}
+                pending_points.append(PointStruct(
+                    id=point_id,
+                    vector=vector,
+                    payload={"page_content": text, "metadata": metadata},
+                ))
+
+            while len(pending_points) >= upsert_batch_size:
+                _upsert(client, collection_name, pending_points[:upsert_batch_size], report)
+                pending_points = pending_points[upsert_batch_size:]
+
+        if pending_points:
+            _upsert(client, collection_name, pending_points, report)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    # Chunks that disappeared from a changed file are removed from the collection
+    for state in states.values():
+        stale = [point_id for chunk_hash, point_id in state.existing.items() if chunk_hash not in state.seen]
+        for start in range(0, len(stale), upsert_batch_size):
+            client.delete(collection_name=collection_name,
+                          points_selector=PointIdsList(points=stale[start:start + upsert_batch_size]),
+                          wait=True)
+        report.deleted_points += len(stale)
+        document_manifest.save_document(collection_name, state.doc_key, state.file_hash, state.seen)
+
+    report.total_s = time.perf_counter() - run_start
+    logger.info(report.summary())
+    return report
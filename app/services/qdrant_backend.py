@@ -0,0 +1,89 @@
+from pathlib import Path
+from qdrant_client import QdrantClient
+from qdrant_client.models import (
+    Distance,
+    HnswConfigDiff,
+    Modifier,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SparseVectorParams,
+    VectorParams,
+)
+from app.core.config import settings
+from app.core.logger import logger
+from app.services.bm25 import SPARSE_VECTOR_NAME
+
+# --- BACKEND MODES ---
+# local  : embedded on-disk Qdrant at QDRANT_PATH, no server and no network hop
+# server : a Qdrant server at QDRANT_URL (HNSW, on-disk payload and quantization apply here)
+# memory : throwaway in-process collections, for tests and benchmarks
+QDRANT_MODES = ("local", "server", "memory")
+
+
+def create_client(mode=None):
+    """Builds a QdrantClient for the configured (or given) backend mode.
+
+    Args:
+        mode (str, optional): "local", "server" or "memory". Defaults to settings.QDRANT_MODE.
+    """
+    mode = (mode or settings.QDRANT_MODE).lower()
+    if mode == "local":
+        Path(settings.QDRANT_PATH).mkdir(parents=True, exist_ok=True)
+        client = QdrantClient(path=settings.QDRANT_PATH)
+    elif mode == "server":
+        # gRPC skips JSON encoding of every vector on upsert/search
+        client = QdrantClient(url=settings.QDRANT_URL, prefer_grpc=settings.QDRANT_PREFER_GRPC)
+    elif mode == "memory":
+        client = QdrantClient(location=":memory:")
+    else:
+        raise ValueError(f"Unknown QDRANT_MODE '{mode}'. Expected one of {QDRANT_MODES}.")
+
+    logger.info(f"Qdrant backend ready (mode={mode})")
+    return client
+
+
+def create_collection(client, collection_name, dimension):
+    """Creates a collection tuned for our workload (small MiniLM vectors, text-heavy payloads)."""
+    client.create_collection(
+        collection_name=collection_name,
+        vectors_config=VectorParams(size=dimension, distance=Distance.COSINE),
+        hnsw_config=HnswConfigDiff(m=settings.QDRANT_HNSW_M,
+                                   ef_construct=settings.QDRANT_HNSW_EF_CONSTRUCT),
+        # BM25 term weights for exact-term hits; Qdrant applies IDF at query time
+        sparse_vectors_config={SPARSE_VECTOR_NAME: SparseVectorParams(modifier=Modifier.IDF)},
+        # Chunk text lives on disk; only vectors and the HNSW graph need to stay in RAM
+        on_disk_payload=settings.QDRANT_ON_DISK_PAYLOAD,
+    )
+
+
+def has_sparse_index(client, collection_name):
+    """Collections created before hybrid retrieval only carry the dense vector."""
+    sparse = client.get_collection(collection_name=collection_name).config.params.sparse_vectors
+    return bool(sparse) and SPARSE_VECTOR_NAME in sparse
+
+
+def maybe_quantize(client, collection_name):
+    """Turns on int8 scalar quantization once a collection grows past the configured size.
+
+    Quantized vectors are 4x smaller and faster to scan; Qdrant rescores the top hits with the
+    original float vectors, so recall stays where it was. The embedded local mode does a brute
+    force scan and ignores quantization, so this only runs against a server.
+    """
+    if settings.QDRANT_MODE.lower() != "server":
+        return False
+
+    info = client.get_collection(collection_name=collection_name)
+    if info.config.quantization_config is not None:
+        return False
+    if (info.points_count or 0) < settings.QDRANT_QUANTIZATION_THRESHOLD:
+        return False
+
+    client.update_collection(
+        collection_name=collection_name,
+        quantization_config=ScalarQuantization(
+            scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True),
+        ),
+    )
+    logger.info(f"Enabled scalar quantization on '{collection_name}' ({info.points_count} points)")
+    return True
@@ -1,54 +1,188 @@
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from qdrant_client import QdrantClient
-from langchain_huggingface import HuggingFaceEmbeddings
+import atexit
+import time
+import threading
+from collections import deque
 from langchain_qdrant import QdrantVectorStore
 from app.core.config import settings
+from app.core.logger import logger
+from app.services.ingestion import ingest_pdfs
+from app.services import document_manifest
+from app.services.embedding_cache import CachedEmbeddings
+from app.services import qdrant_backend
+from app.services import hybrid_retriever
 
-embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2",
-                                   model_kwargs={'device': 'cpu'})
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 
-client = QdrantClient(url="http://127.0.0.1:6333")
+# --- LAZY CLIENT, EMBEDDINGS & STORE REGISTRY ---
+# The Qdrant client and embedding model are only created the first time something needs them,
+# and we keep one live QdrantVectorStore per collection instead of rebuilding it on every query.
+_client = None
+_embeddings = None
+_stores = {}
+_retrieval_modes = {}
+_registry_lock = threading.RLock()
+_store_stats = {"cold_starts": deque(maxlen=500), "warm_queries": deque(maxlen=500)}
+_warmup_started = False
+
+def get_client():
+    """Returns the shared Qdrant client for the backend selected by settings.QDRANT_MODE."""
+    global _client
+    if _client is None:
+        with _registry_lock:
+            if _client is None:
+                _client = qdrant_backend.create_client()
+                # The embedded mode holds a file lock that should be released cleanly
+                atexit.register(_client.close)
+    return _client
+
+def get_embeddings():
+    """Loads the MiniLM embedding model on first use (behind the on-disk embedding cache)."""
+    global _embeddings
+    if _embeddings is None:
+        with _registry_lock:
+            if _embeddings is None:
+                from langchain_huggingface import HuggingFaceEmbeddings
+
+                start = time.perf_counter()
+                model = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME,
+                                              model_kwargs={'device': 'cpu'})
+                _embeddings = CachedEmbeddings(model,
+                                               model_name=EMBEDDING_MODEL_NAME,
+                                               path=settings.EMBEDDING_CACHE_PATH,
+                                               max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES)
+                logger.info(f"Loaded embedding model in {(time.perf_counter() - start) * 1000:.0f}ms")
+    return _embeddings
+
+def embeddings_ready():
+    """True once the embedding model is loaded (queries no longer pay the cold load)."""
+    return _embeddings is not None
+
+def warm_up(collection_name="research_papers"):
+    """Loads the embedding model and opens the research store in a background thread, once per
+    process, so the first Research turn doesn't spend its context deadline on the cold load.
+    """
+    global _warmup_started
+    with _registry_lock:
+        if _warmup_started:
+            return
+        _warmup_started = True
+
+    def _run():
+        start = time.perf_counter()
+        try:
+            get_embeddings().embed_query("warm-up")
+            get_vector_store(collection_name)
+            logger.info(f"Retrieval warmed up in {(time.perf_counter() - start) * 1000:.0f}ms")
+        except Exception as e:
+            logger.warning(f"Retrieval warm-up failed: {e}")
+
+    threading.Thread(target=_run, name="retrieval-warmup", daemon=True).start()
+
+def get_vector_store(collection_name="research_papers"):
+    """Returns the cached vector store for a collection, building it on first use.
+
+    Args:
+        collection_name (str, optional): name of the collection. Defaults to "research_papers".
+
+    Returns:
+        QdrantVectorStore | None: None when the collection doesn't exist yet.
+    """
+    store = _stores.get(collection_name)
+    if store is not None:
+        return store
+
+    with _registry_lock:
+        store = _stores.get(collection_name)
+        if store is None:
+            if not get_client().collection_exists(collection_name=collection_name):
+                return None
+            store = QdrantVectorStore(client=get_client(),
+                                      collection_name=collection_name,
+                                      embedding=get_embeddings())
+            _stores[collection_name] = store
+            # Collections indexed before hybrid search only have the dense vector
+            has_sparse = qdrant_backend.has_sparse_index(get_client(), collection_name)
+            _retrieval_modes[collection_name] = "hybrid" if has_sparse else "dense"
+    return store
+
+def invalidate_store(collection_name="research_papers"):
+    """Drops the cached store so the next query rebuilds it against the current collection."""
+    with _registry_lock:
+        _stores.pop(collection_name, None)
+        _retrieval_modes.pop(collection_name, None)
+
+def get_store_stats():
+    """Cold-start vs warm-query latency (ms) observed by query_research."""
+    def _avg(values):
+        return round(sum(values) / len(values), 2) if values else None
+
+    return {
+        "cached_collections": list(_stores.keys()),
+        "cold_start_count": len(_store_stats["cold_starts"]),
+        "cold_start_avg_ms": _avg(_store_stats["cold_starts"]),
+        "warm_query_count": len(_store_stats["warm_queries"]),
+        "warm_query_avg_ms": _avg(_store_stats["warm_queries"]),
+    }
+
+def _ensure_collection(collection_name):
+    """Creates the collection with the right vector size if it doesn't exist yet."""
+    client = get_client()
+    if client.collection_exists(collection_name=collection_name):
+        return False
+
+    dimension = len(get_embeddings().embed_query("dimension probe"))
+    qdrant_backend.create_collection(client, collection_name, dimension)
+    return True
 
 def index_pdf(filepath, collection_name='research_papers'):
-    docs = PyPDFLoader(file_path=filepath).load()
-    split_docs = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100).split_documents(documents=docs)
-        
-    # client.recreate_collection(
-    # collection_name="buddy_memories",
-    # vectors_config=client.get_fastembed_vector_params() 
-    # )
-    
-    # client.add(
-    #     collection_name=collection_name,
-    #     documents=split_docs,
-    #     ids=range(len(split_docs))
-    # )
-
-    vectorstore = QdrantVectorStore.from_documents(
-            client=client,
-            embedding=embeddings, 
-            documents=split_docs,
-            path="./data/qdrant_db",
-            collection_name=collection_name,
-        )
-    
+    """Streams a PDF (or a folder / list of PDFs) into the research collection.
+
+    Args:
+        filepath (str | list): PDF file, folder of PDFs, or a list of those.
+        collection_name (str, optional): name of the collection. Defaults to "research_papers".
+
+    Returns:
+        IngestionReport: per-stage counts and throughput.
+    """
+    # A freshly created collection must not be served by a store built before it existed,
+    # nor skip documents the manifest remembers from a collection that has since vanished
+    if _ensure_collection(collection_name):
+        invalidate_store(collection_name)
+        document_manifest.clear_collection(collection_name)
+
+    report = ingest_pdfs(filepath, client=get_client(), embeddings=get_embeddings(), collection_name=collection_name,
+                         sparse=qdrant_backend.has_sparse_index(get_client(), collection_name))
+    qdrant_backend.maybe_quantize(get_client(), collection_name)
+    return report
+
+
+def retrieve_research_chunks(question, collection_name="research_papers", k=None):
+    """Best matching chunk texts for a question, most relevant first (empty if nothing is indexed)."""
+    start = time.perf_counter()
+    is_cold = collection_name not in _stores
+
+    vector_store = get_vector_store(collection_name)
+    if vector_store is None:
+        return []
+
+    # Dense + BM25 with rank fusion (dense-only for collections without a sparse index)
+    results = hybrid_retriever.retrieve(question, client=get_client(), store=vector_store,
+                                        collection_name=collection_name, k=k,
+                                        mode=_retrieval_modes.get(collection_name, "dense"))
+
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    _store_stats["cold_starts" if is_cold else "warm_queries"].append(elapsed_ms)
+    logger.info(f"Research query on '{collection_name}' ({'cold' if is_cold else 'warm'}): {elapsed_ms:.1f}ms")
+
+    return [doc.page_content for doc in results]
 
 def query_research(question, collection_name="research_papers"):
-    vector_store = QdrantVectorStore.from_existing_collection(
-        client=client,
-        embedding=embeddings,
-        path='./data/qdrant_db',
-        collection_name=collection_name
-    )
-    
-    # Returning top 3 results
-    results = vector_store.similarity_search(query=question, k=3)
-    
+    chunks = retrieve_research_chunks(question, collection_name=collection_name)
+    if not chunks:
+        return "No relevant info found in the knowledge base."
+
     # Combine results into one string for AVA's context
-    context = "\n\n".join([doc.page_content for doc in results])
-    
-    return context
+    return "\n\n".join(chunks)
 
 def clear_research_collection(collection_name="research_papers"):
     """Wipes out entire collection data
@@ -56,6 +190,10 @@ def clear_research_collection(collection_name="research_papers"):
     Args:
         collection_name (str, optional): name of the collection. Defaults to "research_papers".
     """
+    client = get_client()
     if client.collection_exists(collection_name=collection_name):
         client.delete_collection(collection_name=collection_name)
-    
\ No newline at end of file
+    invalidate_store(collection_name)
+    document_manifest.clear_collection(collection_name)
+
+    return f"Cleared knowledge base '{collection_name}'."
@@ -0,0 +1,284 @@
+"""Offline end-to-end benchmark: chat turns, PDF ingestion, research queries and log I/O.
+
+Usage:
+    python -m benchmarks.bench_end_to_end --turns 20 --tokens-per-second 50 --pdfs 4 --pages 40
+    python -m benchmarks.bench_end_to_end --scenarios chat --tokens-per-second 0   # pipeline overhead only
+    BENCH_MONGO_URI=mongodb://localhost:27017 python -m benchmarks.bench_end_to_end
+
+Everything runs against local stand-ins in a temp directory:
+  - the LLM is benchmarks.fakes.FakeStreamingChatModel (fixed first-token delay + token rate),
+  - embeddings are feature-hashed bag-of-words vectors (no model download),
+  - Qdrant runs in memory, SQLite uses a throwaway file,
+  - Mongo is mongomock (`pip install mongomock`), or a local mongod when BENCH_MONGO_URI is set
+    (database ProjectAVA_bench).
+Each scenario reports latency percentiles, throughput and peak Python memory (tracemalloc, which
+slows allocation-heavy code a little; pass --no-tracemalloc for timing-only runs). Compare the
+saved JSON files between commits to spot regressions.
+"""
+import argparse
+import gc
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+from pathlib import Path
+import pymongo
+from app.core.config import settings
+from benchmarks.common import mongomock_client, save_results, summarize_ms
+from benchmarks.fakes import FILLER, FakeStreamingChatModel, HashingEmbeddings, write_text_pdf
+
+DATABASE = "ProjectAVA_bench"
+SCENARIOS = ["data", "ingest", "research", "chat"]
+CHAT_MODES = ["Fitness & Diet", "Journal & Chat", "Research Mode"]
+PROVIDER = "Ollama (Local)"
+EXERCISES = ["Bench Press", "Squat", "Deadlift", "Overhead Press", "Barbell Row", "Pull Up"]
+QUESTIONS = ["How should I adjust my calories this week", "Was my squat progress good this month",
+             "What does the paper say about protein timing", "Summarize how my training went",
+             "How much volume should a push day have", "Why am I tired after leg day"]
+
+
+# --- ENVIRONMENT ---
+def _configure(tmp):
+    """Points every store at the temp dir; must run before the app's stores are first used."""
+    settings.SQLITE_DB_PATH = str(Path(tmp) / "ava.db")
+    settings.EMBEDDING_CACHE_PATH = str(Path(tmp) / "embedding_cache.db")
+    settings.MONGO_SPOOL_PATH = str(Path(tmp) / "mongo_spool.jsonl")
+    settings.QDRANT_MODE = "memory"
+    settings.MONGO_DATABASE = DATABASE
+
+    uri = os.environ.get("BENCH_MONGO_URI")
+    if uri:
+        real_client = pymongo.MongoClient
+        pymongo.MongoClient = lambda *args, **kwargs: real_client(uri)
+        backend = "mongod"
+    else:
+        mongomock_client()  # fails early with an install hint when mongomock is missing
+        pymongo.MongoClient = lambda *args, **kwargs: mongomock_client()
+        backend = "mongomock"
+
+    from app.database import mongodb, mongo_schema
+    db = mongodb.get_db()
+    db.client.drop_database(DATABASE)
+    mongo_schema.ensure_indexes(db)
+    return backend
+
+
+def _install_fakes(tokens_per_second, first_token_latency, response_tokens):
+    from app.core import conversation_memory, llm
+    from app.services import vector_engine
+
+    chat_model = FakeStreamingChatModel(tokens_per_second=tokens_per_second,
+                                        first_token_latency=first_token_latency,
+                                        response_tokens=response_tokens)
+    summary_model = FakeStreamingChatModel(tokens_per_second=0, first_token_latency=0, response_tokens=60)
+    llm.get_llm_client = lambda provider, api_key=None: chat_model
+    conversation_memory.get_summary_llm = lambda: summary_model
+    vector_engine._embeddings = HashingEmbeddings()
+
+
+def _seed_logs(days, seed):
+    from app.database.repository import log_repository
+
+    rng = random.Random(seed)
+    first = date.today() - timedelta(days=days)
+    for offset in range(days):
+        day = (first + timedelta(days=offset)).isoformat()
+        log_repository.log("fitness", {"weight": round(82 - offset * 0.02 + rng.uniform(-0.5, 0.5), 1),
+                                       "calories": rng.randrange(1900, 2600), "protein": rng.randrange(120, 190)},
+                           day=day)
+        if offset % 2 == 0:
+            log_repository.log("workout", {"split": ["Push", "Pull", "Legs"][offset % 3], "exercises": [
+                {"exercise": name, "sets": rng.randint(2, 5), "reps": rng.randint(4, 12),
+                 "weight": round(rng.uniform(30, 140), 1)} for name in rng.sample(EXERCISES, 4)]}, day=day)
+        if offset % 3 == 0:
+            log_repository.log("journal", {"content": " ".join(rng.choices(FILLER, k=40)), "mood": "Good",
+                                           "tags": ["training"]}, day=day)
+
+
+def _measure(fn, trace_memory):
+    """Runs one scenario, adding wall time and peak traced memory to its results."""
+    gc.collect()
+    if trace_memory:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    results = fn()
+    results["wall_s"] = round(time.perf_counter() - started, 3)
+    if trace_memory:
+        results["peak_memory_mb"] = round((tracemalloc.get_traced_memory()[1] - baseline) / 2**20, 2)
+    return results
+
+
+# --- SCENARIOS ---
+def bench_data(writes, reads, seed):
+    """Local-first log writes, context reads and the chat-history Mongo paths."""
+    from app.database import mongodb
+    from app.database.repository import log_repository
+
+    rng = random.Random(seed)
+    write_times = []
+    for i in range(writes):
+        started = time.perf_counter()
+        log_repository.log("workout", {"split": "Push", "exercises": [
+            {"exercise": name, "sets": 3, "reps": rng.randint(5, 10), "weight": 60.0} for name in EXERCISES[:4]]})
+        write_times.append(time.perf_counter() - started)
+
+    context_times, history_times, page_times, save_times = [], [], [], []
+    for i in range(reads):
+        started = time.perf_counter()
+        log_repository.context_lines(rng.choice(["fitness", "workout", "journal"]), limit=10)
+        context_times.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        mongodb.save_chat_to_mongo("bench-data", "Bench", "user", rng.choice(QUESTIONS))
+        save_times.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        mongodb.get_mongo_history(log_type="workout", limit=10)
+        history_times.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        mongodb.get_session_messages_page("bench-data", limit=settings.CHAT_PAGE_SIZE)
+        page_times.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    mongodb.flush_pending_writes(timeout=60)
+    flush_s = time.perf_counter() - started
+    return {"log_write": summarize_ms(write_times), "writes_per_s": round(writes / sum(write_times), 1),
+            "context_lines": summarize_ms(context_times), "save_chat": summarize_ms(save_times),
+            "mongo_history": summarize_ms(history_times), "session_page": summarize_ms(page_times),
+            "flush_s": round(flush_s, 3)}
+
+
+def bench_ingest(tmp, pdfs, pages, seed):
+    """index_pdf over freshly generated PDFs, then again unchanged (manifest skip path)."""
+    from app.services.vector_engine import index_pdf
+
+    rng = random.Random(seed)
+    folder = Path(tmp) / "pdfs"
+    folder.mkdir(exist_ok=True)
+    for i in range(pdfs):
+        write_text_pdf(folder / f"paper_{i}.pdf",
+                       [" ".join(rng.choices(FILLER, k=320)) for _ in range(pages)])
+
+    started = time.perf_counter()
+    report = index_pdf(str(folder))
+    cold_s = time.perf_counter() - started
+    started = time.perf_counter()
+    index_pdf(str(folder))
+    unchanged_s = time.perf_counter() - started
+    return {"pages": report.pages, "chunks": report.chunks, "points": report.points,
+            "pages_per_s": round(report.pages / cold_s, 1), "index_s": round(cold_s, 3),
+            "reindex_unchanged_s": round(unchanged_s, 3), "stages": report.throughput()}
+
+
+def bench_research(queries, seed):
+    from app.services.vector_engine import query_research
+
+    rng = random.Random(seed)
+    samples = []
+    for _ in range(queries):
+        question = " ".join(rng.choices(FILLER, k=8))
+        started = time.perf_counter()
+        query_research(question)
+        samples.append(time.perf_counter() - started)
+    return {"query": summarize_ms(samples), "queries_per_s": round(queries / sum(samples), 1)}
+
+
+def bench_chat(turns, seed):
+    """get_ava_response end to end, per mode: TTFT, turn latency and streamed words/s."""
+    from app.core.llm import get_ava_response
+    from app.database import mongodb
+
+    rng = random.Random(seed)
+    results = {}
+    for mode in CHAT_MODES:
+        session_id = f"bench-{mode}"
+        ttft, total, words = [], [], 0
+        for turn in range(turns):
+            question = f"{rng.choice(QUESTIONS)} (turn {turn})"
+            started = time.perf_counter()
+            first = None
+            for chunk in get_ava_response(mode, question, session_id, "Bench", PROVIDER, None):
+                if first is None:
+                    first = time.perf_counter() - started
+                words += len(chunk.split())
+            total.append(time.perf_counter() - started)
+            ttft.append(first if first is not None else total[-1])
+        stream_s = sum(total)
+        results[mode] = {"ttft": summarize_ms(ttft), "turn": summarize_ms(total),
+                         "words_per_s": round(words / stream_s, 1), "turns_per_s": round(turns / stream_s, 3)}
+    mongodb.flush_pending_writes(timeout=60)
+    return results
+
+
+def run(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = _configure(tmp)
+        _install_fakes(args.tokens_per_second, args.first_token_latency, args.response_tokens)
+        _seed_logs(args.seed_days, args.seed)
+
+        scenarios = {
+            "data": lambda: bench_data(args.writes, args.reads, args.seed),
+            "ingest": lambda: bench_ingest(tmp, args.pdfs, args.pages, args.seed),
+            "research": lambda: bench_research(args.queries, args.seed),
+            "chat": lambda: bench_chat(args.turns, args.seed),
+        }
+        results = {"config": {**vars(args), "mongo": backend}}
+        if args.tracemalloc:
+            tracemalloc.start()
+        for name in SCENARIOS:
+            if name in args.scenarios:
+                results[name] = _measure(scenarios[name], args.tracemalloc)
+                print(f"{name:<9} done in {results[name]['wall_s']}s")
+        if args.tracemalloc:
+            tracemalloc.stop()
+
+        from app.database import mongodb
+        mongodb.get_db().client.drop_database(DATABASE)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--turns", type=int, default=10, help="chat turns per mode")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--first-token-latency", type=float, default=0.2)
+    parser.add_argument("--response-tokens", type=int, default=150)
+    parser.add_argument("--pdfs", type=int, default=4)
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--writes", type=int, default=300)
+    parser.add_argument("--reads", type=int, default=300)
+    parser.add_argument("--seed-days", type=int, default=180, help="days of logs seeded before timing")
+    parser.add_argument("--no-tracemalloc", dest="tracemalloc", action="store_false")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    results = run(args)
+    for name in SCENARIOS:
+        if name not in results:
+            continue
+        memory = f"  peak {results[name]['peak_memory_mb']}MB" if "peak_memory_mb" in results[name] else ""
+        if name == "chat":
+            for mode in CHAT_MODES:
+                stats = results[name][mode]
+                print(f"chat/{mode:<15} ttft p50 {stats['ttft']['p50_ms']}ms p95 {stats['ttft']['p95_ms']}ms  "
+                      f"turn p50 {stats['turn']['p50_ms']}ms  {stats['words_per_s']} words/s")
+            if memory:
+                print(f"chat     {memory}")
+        elif name == "ingest":
+            print(f"ingest    {results[name]['pages_per_s']} pages/s ({results[name]['chunks']} chunks){memory}")
+        elif name == "research":
+            print(f"research  p50 {results[name]['query']['p50_ms']}ms p95 {results[name]['query']['p95_ms']}ms{memory}")
+        else:
+            print(f"data      write p50 {results[name]['log_write']['p50_ms']}ms  "
+                  f"context p50 {results[name]['context_lines']['p50_ms']}ms{memory}")
+    print(f"Saved to {save_results('end_to_end', results)}")
+
+
+if __name__ == "__main__":
+    main()
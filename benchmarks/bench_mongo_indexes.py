@@ -0,0 +1,169 @@
+"""Measures the Mongo history/session queries before and after the startup indexes.
+
+Usage:
+    BENCH_MONGO_URI=mongodb://localhost:27017 python -m benchmarks.bench_mongo_indexes --logs 1000000
+
+Seeds synthetic life_logs and chat_history into a throwaway database, times the exact queries
+app.database.mongodb runs (same filters, sorts and projections), then creates the indexes from
+app.database.mongo_schema and times them again. Without BENCH_MONGO_URI it falls back to
+mongomock (`pip install mongomock`, not an app dependency), which has no query planner: the
+numbers only check the script, use a real mongod for anything you want to compare.
+"""
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta, UTC
+from bson import ObjectId
+from app.database import mongo_schema
+from benchmarks.common import mongomock_client, save_results, summarize_ms
+
+DATABASE = "ProjectAVA_bench"
+LOG_TYPES = ["fitness", "workout", "journal"]
+NICKNAMES = ["ava_user", "guest", "tester"]
+
+
+def _connect():
+    uri = os.environ.get("BENCH_MONGO_URI")
+    if uri:
+        from pymongo import MongoClient
+        return MongoClient(uri), "mongod"
+    return mongomock_client(), "mongomock"
+
+
+def _seed(db, logs, sessions, messages_per_session, batch_size, seed):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=UTC)
+
+    batch = []
+    for i in range(logs):
+        timestamp = start + timedelta(seconds=rng.randrange(0, 3 * 365 * 86400))
+        batch.append({
+            "_id": ObjectId(),
+            "user_nickname": rng.choice(NICKNAMES),
+            "type": rng.choice(LOG_TYPES),
+            "timestamp": timestamp,
+            "date": timestamp.strftime("%Y-%m-%d"),
+            "payload": {"weight": round(rng.uniform(60, 90), 1), "calories_in": rng.randrange(1500, 3200),
+                        "notes": "synthetic entry " * 8},
+        })
+        if len(batch) >= batch_size:
+            db["life_logs"].insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        db["life_logs"].insert_many(batch, ordered=False)
+
+    session_ids = [f"bench-session-{i}" for i in range(sessions)]
+    batch = []
+    for session_id in session_ids:
+        for i in range(messages_per_session):
+            batch.append({
+                "_id": ObjectId(),
+                "session_id": session_id,
+                "session_title": "Bench session",
+                "role": "user" if i % 2 == 0 else "assistant",
+                "content": "synthetic message " * 20,
+                "timestamp": start + timedelta(seconds=i),
+            })
+            if len(batch) >= batch_size:
+                db["chat_history"].insert_many(batch, ordered=False)
+                batch = []
+    if batch:
+        db["chat_history"].insert_many(batch, ordered=False)
+    return session_ids
+
+
+def _time_queries(db, session_ids, queries, limit, rng):
+    history, by_day, session = [], [], []
+    for _ in range(queries):
+        started = time.perf_counter()
+        list(db["life_logs"].find({"type": rng.choice(LOG_TYPES)}, mongo_schema.HISTORY_PROJECTION)
+             .sort("timestamp", -1).limit(limit))
+        history.append(time.perf_counter() - started)
+
+        day = (datetime(2024, 1, 1) + timedelta(days=rng.randrange(0, 3 * 365))).strftime("%Y-%m-%d")
+        started = time.perf_counter()
+        list(db["life_logs"].find({"user_nickname": rng.choice(NICKNAMES), "date": day},
+                                  mongo_schema.HISTORY_PROJECTION))
+        by_day.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        list(db["chat_history"].find({"session_id": rng.choice(session_ids)}, mongo_schema.SESSION_MESSAGE_PROJECTION)
+             .sort("timestamp", 1))
+        session.append(time.perf_counter() - started)
+
+    return {
+        "history": summarize_ms(history),
+        "logs_by_day": summarize_ms(by_day),
+        "session_messages": summarize_ms(session),
+    }
+
+
+def _winning_stage(db, backend):
+    """Top of the query plan for the history query (IXSCAN vs COLLSCAN), real mongod only."""
+    if backend != "mongod":
+        return None
+    plan = (db["life_logs"].find({"type": "fitness"}, mongo_schema.HISTORY_PROJECTION)
+            .sort("timestamp", -1).limit(30).explain())
+    stage = plan["queryPlanner"]["winningPlan"]
+    stages = []
+    while stage:
+        stages.append(stage.get("stage"))
+        stage = stage.get("inputStage")
+    return " <- ".join(stages)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logs", type=int, default=1_000_000)
+    parser.add_argument("--sessions", type=int, default=2_000)
+    parser.add_argument("--messages-per-session", type=int, default=40)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=30)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    client, backend = _connect()
+    client.drop_database(DATABASE)
+    db = client[DATABASE]
+
+    started = time.perf_counter()
+    session_ids = _seed(db, args.logs, args.sessions, args.messages_per_session, args.batch_size, args.seed)
+    seed_s = time.perf_counter() - started
+    print(f"[{backend}] seeded {args.logs} logs and {len(session_ids) * args.messages_per_session} "
+          f"messages in {seed_s:.1f}s")
+
+    before = _time_queries(db, session_ids, args.queries, args.limit, random.Random(args.seed))
+    plan_before = _winning_stage(db, backend)
+
+    started = time.perf_counter()
+    mongo_schema.ensure_indexes(db)
+    index_s = time.perf_counter() - started
+
+    after = _time_queries(db, session_ids, args.queries, args.limit, random.Random(args.seed))
+    plan_after = _winning_stage(db, backend)
+
+    results = {
+        "backend": backend,
+        "logs": args.logs,
+        "messages": len(session_ids) * args.messages_per_session,
+        "seed_s": round(seed_s, 2),
+        "index_build_s": round(index_s, 2),
+        "before": before,
+        "after": after,
+        "plan_before": plan_before,
+        "plan_after": plan_after,
+    }
+    for query in before:
+        print(f"{query:<17} p50 {before[query]['p50_ms']}ms -> {after[query]['p50_ms']}ms | "
+              f"p95 {before[query]['p95_ms']}ms -> {after[query]['p95_ms']}ms")
+    if plan_before:
+        print(f"history plan: {plan_before}  =>  {plan_after}")
+
+    client.drop_database(DATABASE)
+    print(f"Saved to {save_results('mongo_indexes', results)}")
+
+
+if __name__ == "__main__":
+    main()
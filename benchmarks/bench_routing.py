@@ -0,0 +1,131 @@
+"""Simulation of "Auto" provider routing against fake providers with scripted latencies.
+
+Usage:
+    python -m benchmarks.bench_routing --turns 24 --deadline 1.5 --stall-seconds 4
+
+Every provider is a benchmarks.fakes.ScriptedChatModel whose first-token delay is a fixed
+overhead plus a per-token prefill cost (local prefill being much slower), so short chats are
+fastest on Ollama and long research prompts on a hosted model. The prompts alternate between
+short chats and long research contexts. Scenarios:
+  - steady:      every provider healthy,
+  - local_stall: Ollama stops answering for the middle third of the run,
+  - flaky_groq:  Groq errors on a share of its calls.
+Each scenario runs the Auto policy (rank_providers + FailoverStream with the first-token deadline)
+next to fixed-provider policies, with a fresh provider health registry per run, and reports
+time to first token, failed turns, failovers and which provider served short and long prompts.
+"""
+import argparse
+import random
+import time
+from collections import Counter, defaultdict
+from langchain_core.output_parsers import StrOutputParser
+from app.core.config import settings
+from app.core.context_assembler import count_tokens
+from app.core.llm_factory import OLLAMA, ClientRegistry
+from app.core.provider_router import FailoverStream, Route, rank_providers
+from benchmarks.common import save_results, summarize_ms
+from benchmarks.fakes import FILLER, ScriptedChatModel
+
+SCENARIOS = ["steady", "local_stall", "flaky_groq"]
+POLICIES = ["auto", OLLAMA, "Groq"]
+SHORT_PROMPT_WORDS = 200
+LONG_PROMPT_WORDS = 3000
+
+# (fixed overhead s, prefill ms per prompt token)
+PROFILES = {OLLAMA: (0.25, 0.5), "Groq": (0.30, 0.02), "Gemini 3 Flash": (0.60, 0.03), "OpenAI": (0.70, 0.03)}
+
+
+def build_prompts(turns):
+    """Two short chats, then one long research prompt, repeated."""
+    prompts = []
+    for i in range(turns):
+        words = LONG_PROMPT_WORDS if i % 3 == 2 else SHORT_PROMPT_WORDS
+        prompts.append(" ".join(FILLER[j % len(FILLER)] for j in range(words)))
+    return prompts
+
+
+def build_providers(scenario, clock, turns, stall_seconds, error_share, seed):
+    """One scripted fake per provider; `clock["turn"]` is the turn being served."""
+    rng = random.Random(seed)
+
+    def script_for(provider):
+        overhead, prefill_ms = PROFILES[provider]
+
+        def script(call, prompt_tokens):
+            if scenario == "local_stall" and provider == OLLAMA and turns // 3 <= clock["turn"] < 2 * turns // 3:
+                return stall_seconds
+            if scenario == "flaky_groq" and provider == "Groq" and rng.random() < error_share:
+                time.sleep(0.05)
+                return ConnectionError("simulated 503 from Groq")
+            return overhead + prompt_tokens * prefill_ms / 1000
+        return script
+
+    return {provider: ScriptedChatModel(script=script_for(provider), response_tokens=5, tokens_per_second=0,
+                                        first_token_latency=0, model_name=f"fake-{provider}")
+            for provider in PROFILES}
+
+
+def run_policy(policy, scenario, prompts, args):
+    clock = {"turn": 0}
+    providers = build_providers(scenario, clock, len(prompts), args.stall_seconds, args.error_share, args.seed)
+    registry = ClientRegistry()
+    ttfts, failed, failovers = [], 0, 0
+    served = defaultdict(Counter)
+    for turn, prompt in enumerate(prompts):
+        clock["turn"] = turn
+        size = "long" if len(prompt.split()) >= LONG_PROMPT_WORDS else "short"
+        prompt_tokens = count_tokens(prompt)
+        if policy == "auto":
+            routes = rank_providers(prompt_tokens, list(providers), registry)
+            timeout = settings.FIRST_TOKEN_DEADLINE_SECONDS
+        else:
+            routes, timeout = [Route(policy)], None
+        answer = FailoverStream(routes, lambda name: (providers[name] | StrOutputParser()).stream(prompt),
+                                first_token_timeout=timeout, prompt_tokens=prompt_tokens, registry=registry)
+        started = time.perf_counter()
+        first_token = None
+        try:
+            for chunk in answer:
+                if chunk and first_token is None:
+                    first_token = time.perf_counter() - started
+        except Exception:
+            failed += 1
+        failovers += len(answer.failovers)
+        if first_token is not None:
+            ttfts.append(first_token)
+            served[size][answer.provider] += 1
+    return {"ttft": summarize_ms(ttfts), "failed_turns": failed, "failovers": failovers,
+            "served": {size: dict(counts) for size, counts in served.items()},
+            "health": registry.health_report()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", default=SCENARIOS, choices=SCENARIOS)
+    parser.add_argument("--turns", type=int, default=24)
+    parser.add_argument("--deadline", type=float, default=1.5, help="first-token deadline (s) before failing over")
+    parser.add_argument("--stall-seconds", type=float, default=4.0, help="first-token delay of a stalled Ollama")
+    parser.add_argument("--error-share", type=float, default=0.4, help="share of Groq calls failing in flaky_groq")
+    parser.add_argument("--retry-after", type=float, default=3.0, help="seconds a degraded provider is skipped")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    settings.FIRST_TOKEN_DEADLINE_SECONDS = args.deadline
+    settings.PROVIDER_RETRY_AFTER_SECONDS = args.retry_after
+    prompts = build_prompts(args.turns)
+
+    results = {"config": vars(args), "scenarios": {}}
+    for scenario in args.scenarios:
+        results["scenarios"][scenario] = {}
+        for policy in POLICIES:
+            run = run_policy(policy, scenario, prompts, args)
+            results["scenarios"][scenario][policy] = run
+            served = "  ".join(f"{size}: " + ", ".join(f"{name} {n}" for name, n in counts.items())
+                               for size, counts in sorted(run["served"].items()))
+            print(f"{scenario:<12} {policy:<15} ttft p50 {run['ttft']['p50_ms']}ms  p95 {run['ttft']['p95_ms']}ms  "
+                  f"failed {run['failed_turns']}  failovers {run['failovers']}  [{served}]")
+    print(f"Saved to {save_results('routing', results)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""SQLite access: a fresh connection per call (the old sqlite_db pattern) vs the shared pool.
+
+Usage:
+    python -m benchmarks.bench_sqlite --sessions 500 --exercises 6 --queries 2000
+
+Runs against a throwaway database file. Reports workout insert throughput for
+  - connect_per_row: sqlite3.connect + INSERT + commit for every exercise
+  - pooled_per_row:  add_workout_log through the pool (one commit per exercise)
+  - pooled_session:  add_workout_session (executemany, one commit per workout)
+and latency of the recent-workouts context query with a fresh connection vs a pooled one.
+"""
+import argparse
+import random
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+from app.core.config import settings
+from app.database.sqlite_pool import get_pool
+from benchmarks.common import save_results, summarize_ms
+
+EXERCISES = ["Bench Press", "Squat", "Deadlift", "Overhead Press", "Barbell Row", "Pull Up", "Leg Press", "Curl"]
+WORKOUT_TYPES = ["Push", "Pull", "Legs"]
+CONTEXT_QUERY = "SELECT date, exercise_name, sets, reps, weight_lifted FROM workout_logs ORDER BY date DESC LIMIT 5"
+
+
+def _workouts(sessions, exercises, seed):
+    rng = random.Random(seed)
+    for day in range(sessions):
+        date = f"2025-{1 + day // 28 % 12:02d}-{1 + day % 28:02d}"
+        yield date, rng.choice(WORKOUT_TYPES), [
+            {"name": rng.choice(EXERCISES), "sets": rng.randint(2, 5), "reps": rng.randint(5, 12),
+             "weight": round(rng.uniform(20, 140), 1), "rpe": rng.randint(6, 10)}
+            for _ in range(exercises)
+        ]
+
+
+def _clear(sqlite_db):
+    sqlite_db.clear_workout_logs()
+
+
+def run(sessions, exercises, queries, seed):
+    from app.database import sqlite_db
+
+    sqlite_db.init_db()
+    rows = sessions * exercises
+    results = {"rows": rows}
+
+    # 1. Old pattern: new connection, INSERT, commit, per exercise
+    started = time.perf_counter()
+    for date, workout_type, items in _workouts(sessions, exercises, seed):
+        for ex in items:
+            with sqlite3.connect(settings.SQLITE_DB_PATH) as conn:
+                conn.execute(sqlite_db.WORKOUT_INSERT, (date, workout_type, ex["name"], ex["sets"], ex["reps"],
+                                                        ex["weight"], ex["rpe"], None, None))
+                conn.commit()
+            conn.close()
+    elapsed = time.perf_counter() - started
+    results["connect_per_row"] = {"seconds": round(elapsed, 3), "rows_per_s": round(rows / elapsed, 1)}
+    _clear(sqlite_db)
+
+    # 2. Pooled connection, still one commit per exercise
+    started = time.perf_counter()
+    for date, workout_type, items in _workouts(sessions, exercises, seed):
+        for ex in items:
+            sqlite_db.add_workout_log(date, workout_type, ex["name"], ex["sets"], ex["reps"], ex["weight"], ex["rpe"])
+    elapsed = time.perf_counter() - started
+    results["pooled_per_row"] = {"seconds": round(elapsed, 3), "rows_per_s": round(rows / elapsed, 1)}
+    _clear(sqlite_db)
+
+    # 3. Pooled connection, one executemany + commit per workout
+    started = time.perf_counter()
+    for date, workout_type, items in _workouts(sessions, exercises, seed):
+        sqlite_db.add_workout_session(date, workout_type, items)
+    elapsed = time.perf_counter() - started
+    results["pooled_session"] = {"seconds": round(elapsed, 3), "rows_per_s": round(rows / elapsed, 1)}
+
+    # Query latency on the populated table
+    samples = []
+    for _ in range(queries):
+        started = time.perf_counter()
+        conn = sqlite3.connect(settings.SQLITE_DB_PATH)
+        conn.execute(CONTEXT_QUERY).fetchall()
+        conn.close()
+        samples.append(time.perf_counter() - started)
+    results["query_connect_per_call"] = summarize_ms(samples)
+
+    pool = get_pool(settings.SQLITE_DB_PATH)
+    samples = []
+    for _ in range(queries):
+        started = time.perf_counter()
+        with pool.connection() as conn:
+            conn.execute(CONTEXT_QUERY).fetchall()
+        samples.append(time.perf_counter() - started)
+    results["query_pooled"] = summarize_ms(samples)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=500)
+    parser.add_argument("--exercises", type=int, default=6)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        settings.SQLITE_DB_PATH = str(Path(tmp) / "bench.db")
+        results = run(args.sessions, args.exercises, args.queries, args.seed)
+
+    for name in ("connect_per_row", "pooled_per_row", "pooled_session"):
+        print(f"{name:<16} {results[name]['rows_per_s']:>10} rows/s")
+    for name in ("query_connect_per_call", "query_pooled"):
+        print(f"{name:<22} p50 {results[name]['p50_ms']}ms  p95 {results[name]['p95_ms']}ms")
+    print(f"Saved to {save_results('sqlite', results)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Date-window query latency on fitness/workout logs, with and without the indexes.
+
+Usage:
+    python -m benchmarks.bench_sqlite_timeseries --years 1 5 10 --queries 300
+
+For each history length, seeds one body-stat log and one workout (6 exercises) per day into a
+throwaway database, then times the dashboard/context queries with the indexes dropped and again
+with them in place. With the indexes the numbers should stay flat as the history grows.
+"""
+import argparse
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from app.core.config import settings
+from app.database.sqlite_pool import get_pool
+from benchmarks.common import save_results, summarize_ms
+
+EXERCISES = ["Bench Press", "Squat", "Deadlift", "Overhead Press", "Barbell Row", "Pull Up", "Leg Press", "Curl"]
+INDEXES = ["idx_fitness_logs_date", "idx_workout_logs_date", "idx_workout_logs_exercise_date",
+           "idx_workout_logs_type_date"]
+
+
+def _seed(sqlite_db, days, seed):
+    rng = random.Random(seed)
+    first = date.today() - timedelta(days=days)
+    fitness = []
+    for offset in range(days):
+        day = (first + timedelta(days=offset)).isoformat()
+        fitness.append((day, round(rng.uniform(70, 85), 1), rng.randrange(1800, 3200), rng.randrange(90, 200)))
+        sqlite_db.add_workout_session(day, ["Push", "Pull", "Legs"][offset % 3], [
+            {"name": rng.choice(EXERCISES), "sets": rng.randint(2, 5), "reps": rng.randint(5, 12),
+             "weight": round(rng.uniform(20, 140), 1)} for _ in range(6)
+        ])
+    with get_pool(settings.SQLITE_DB_PATH).transaction() as conn:
+        conn.executemany("INSERT INTO fitness_logs (date, weight, calories, protein) VALUES (?, ?, ?, ?)", fitness)
+
+
+def _time_queries(sqlite_db, repository, queries, rng):
+    window, exercise, context = [], [], []
+    for _ in range(queries):
+        start = date.today() - timedelta(days=rng.randrange(30, 365))
+        started = time.perf_counter()
+        sqlite_db.query_fitness_logs(start=start, end=start + timedelta(days=30), columns=["date", "weight", "calories"])
+        window.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        sqlite_db.query_workout_logs(start=date.today() - timedelta(days=90), exercise_name=rng.choice(EXERCISES),
+                                     columns=["date", "sets", "reps", "weight_lifted"])
+        exercise.append(time.perf_counter() - started)
+
+        # The prompt context of the Fitness mode: recent body stats and workouts
+        started = time.perf_counter()
+        repository.context_lines("fitness")
+        repository.context_lines("workout")
+        context.append(time.perf_counter() - started)
+    return {"fitness_30d_window": summarize_ms(window),
+            "exercise_90d": summarize_ms(exercise),
+            "fitness_context": summarize_ms(context)}
+
+
+def run(years, queries, seed):
+    from app.database import sqlite_db
+    from app.database.repository import LocalFirstRepository, SQLiteLogStore
+
+    with tempfile.TemporaryDirectory() as tmp:
+        settings.SQLITE_DB_PATH = str(Path(tmp) / f"bench_{years}y.db")
+        sqlite_db.init_db()
+        _seed(sqlite_db, years * 365, seed)
+        repository = LocalFirstRepository(local=SQLiteLogStore())
+
+        pool = get_pool(settings.SQLITE_DB_PATH)
+        with pool.transaction() as conn:
+            for index in INDEXES:
+                conn.execute(f"DROP INDEX {index}")
+        without = _time_queries(sqlite_db, repository, queries, random.Random(seed))
+
+        with pool.transaction() as conn:
+            sqlite_db._create_tables(conn)
+            conn.execute("ANALYZE")
+        with_indexes = _time_queries(sqlite_db, repository, queries, random.Random(seed))
+        pool.close()
+    return {"without_indexes": without, "with_indexes": with_indexes}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 5, 10])
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    results = {}
+    for years in args.years:
+        results[f"{years}y"] = run(years, args.queries, args.seed)
+        for query, stats in results[f"{years}y"]["with_indexes"].items():
+            before = results[f"{years}y"]["without_indexes"][query]
+            print(f"{years:>3}y {query:<20} p50 {before['p50_ms']}ms -> {stats['p50_ms']}ms")
+    print(f"Saved to {save_results('sqlite_timeseries', results)}")
+
+
+if __name__ == "__main__":
+    main()
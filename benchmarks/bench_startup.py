@@ -0,0 +1,114 @@
+"""Cold-start cost of the Streamlit entry point: per-module import time and the first Dashboard run.
+
+Usage:
+    python -m benchmarks.bench_startup --runs 5 --top 25
+
+1. Import profile: runs `python -X importtime` over the module-level imports of app/main.py in a
+   fresh interpreter (after `import streamlit`, which `streamlit run` has already paid for) and
+   reports the slowest modules and the total per top-level package.
+2. Cold start: in --runs fresh interpreters, times the first Dashboard render of app/main.py with
+   Streamlit's AppTest and records which heavy modules it pulled in. Mongo connects in a
+   background thread at startup, so pymongo may show up without costing the render anything.
+"""
+import argparse
+import ast
+import json
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from benchmarks.common import save_results, summarize_ms
+
+ROOT = Path(__file__).resolve().parent.parent
+MAIN = ROOT / "app" / "main.py"
+MARKER = "--- app imports ---"
+HEAVY_MODULES = ["langchain_ollama", "langchain_groq", "langchain_openai", "langchain_google_genai", "google.genai",
+                 "langchain_huggingface", "sentence_transformers", "langchain_qdrant", "qdrant_client", "pypdf",
+                 "tiktoken", "langchain_classic", "pymongo"]
+
+COLD_START = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+from streamlit.testing.v1 import AppTest
+# The first AppTest run in a process scans installed packages for components; keep that out of the number
+AppTest.from_string("import streamlit as st").run()
+started = time.perf_counter()
+app = AppTest.from_file({main!r}, default_timeout=120).run()
+elapsed = time.perf_counter() - started
+print(json.dumps({{"first_run_s": elapsed, "exceptions": [str(e.value) for e in app.exception],
+                  "loaded": [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+
+def main_imports():
+    """The import statements app/main.py runs at module level (i.e. on every page)."""
+    tree = ast.parse(MAIN.read_text())
+    return [ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+
+def profile_imports():
+    code = "\n".join(["import streamlit, sys", f"sys.stderr.write({MARKER!r} + '\\n')", *main_imports()])
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing app/main.py's modules failed:\n{result.stderr[-2000:]}")
+
+    lines = result.stderr.splitlines()
+    modules = []
+    for line in lines[lines.index(MARKER) + 1:]:
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append({"module": name.strip(), "self_ms": int(self_us) / 1000,
+                        "cumulative_ms": int(cumulative_us) / 1000})
+
+    packages = defaultdict(float)
+    for module in modules:
+        packages[module["module"].split(".")[0]] += module["self_ms"]
+    return {
+        "total_ms": round(sum(module["self_ms"] for module in modules), 1),
+        "modules": len(modules),
+        "slowest_modules": sorted(modules, key=lambda m: m["self_ms"], reverse=True),
+        "packages_ms": {name: round(ms, 1) for name, ms in sorted(packages.items(), key=lambda p: -p[1])},
+    }
+
+
+def cold_start(runs):
+    code = COLD_START.format(root=str(ROOT), main=str(MAIN), heavy=HEAVY_MODULES)
+    samples, loaded, exceptions = [], set(), []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"Dashboard run failed:\n{result.stderr[-2000:]}")
+        run = json.loads(result.stdout.strip().splitlines()[-1])
+        samples.append(run["first_run_s"])
+        loaded.update(run["loaded"])
+        exceptions += run["exceptions"]
+    return {"first_run": summarize_ms(samples), "heavy_modules_loaded": sorted(loaded), "exceptions": exceptions}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=25, help="slowest modules to print")
+    args = parser.parse_args()
+
+    imports = profile_imports()
+    print(f"app/main.py imports: {imports['total_ms']}ms over {imports['modules']} modules")
+    for name, ms in list(imports["packages_ms"].items())[:10]:
+        print(f"  {name:<28} {ms:>9.1f}ms")
+    print("Slowest modules (self time):")
+    for module in imports["slowest_modules"][:args.top]:
+        print(f"  {module['module']:<50} {module['self_ms']:>8.1f}ms  (cumulative {module['cumulative_ms']:.1f}ms)")
+    imports["slowest_modules"] = imports["slowest_modules"][:args.top]
+
+    startup = cold_start(args.runs)
+    print(f"Dashboard first run: p50 {startup['first_run']['p50_ms']}ms  max {startup['first_run']['max_ms']}ms")
+    print(f"Heavy modules loaded: {', '.join(startup['heavy_modules_loaded']) or 'none'}")
+    if startup["exceptions"]:
+        print(f"Script exceptions: {startup['exceptions']}")
+    print(f"Saved to {save_results('startup', {'imports': imports, 'cold_start': startup})}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""CPU cost of streaming a long answer to the UI: per-token appends and re-renders vs coalesced flushes.
+
+Usage:
+    python -m benchmarks.bench_streaming --tokens 5000 --repeats 5 --paced-tps 2000
+
+A fake 5,000-token answer is consumed the way a chat turn consumes it:
+  - before: every token is appended with `+=` and re-rendered, as get_ava_response and
+    st.write_stream did for each chunk,
+  - after:  tokens go through request_pipeline.coalesce_chunks (STREAM_FLUSH_INTERVAL_SECONDS /
+    STREAM_FLUSH_MAX_CHARS), parts are kept in a list and joined once at the end.
+A re-render is what st.write_stream does per chunk on the server: append to the text so far and
+serialize a Markdown element holding the whole answer. Streams run both as a burst (every token
+available at once) and paced at --paced-tps tokens/s; CPU time (time.process_time) excludes the
+pacing sleeps, so the numbers compare the work done per token.
+"""
+import argparse
+import statistics
+import time
+from streamlit.proto.Markdown_pb2 import Markdown
+from app.core.config import settings
+from app.core.request_pipeline import coalesce_chunks
+from benchmarks.common import save_results
+from benchmarks.fakes import FILLER
+
+CURSOR = " ▏"
+
+
+def fake_token_stream(tokens, tokens_per_second=0):
+    interval = 1 / tokens_per_second if tokens_per_second else 0
+    for i in range(tokens):
+        yield FILLER[i % len(FILLER)] + " "
+        if interval:
+            time.sleep(interval)
+
+
+def render(text):
+    """What the UI does per streamed chunk: a Markdown element carrying the whole answer so far."""
+    return Markdown(body=text + CURSOR).SerializeToString()
+
+
+def consume_per_token(stream):
+    full_response, shown, renders = "", "", 0
+    for chunk in stream:
+        full_response += chunk
+        shown += chunk
+        render(shown)
+        renders += 1
+    return full_response, renders
+
+
+def consume_coalesced(stream):
+    parts, shown, renders = [], "", 0
+    for chunk in coalesce_chunks(stream, settings.STREAM_FLUSH_INTERVAL_SECONDS, settings.STREAM_FLUSH_MAX_CHARS):
+        parts.append(chunk)
+        shown += chunk
+        render(shown)
+        renders += 1
+    return "".join(parts), renders
+
+
+def measure(consume, tokens, tokens_per_second, repeats):
+    cpu, wall, renders, length = [], [], 0, 0
+    for _ in range(repeats):
+        cpu_started, wall_started = time.process_time(), time.perf_counter()
+        text, renders = consume(fake_token_stream(tokens, tokens_per_second))
+        cpu.append(time.process_time() - cpu_started)
+        wall.append(time.perf_counter() - wall_started)
+        length = len(text)
+    cpu_s = statistics.median(cpu)
+    return {"cpu_ms": round(cpu_s * 1000, 3), "cpu_us_per_token": round(cpu_s / tokens * 1e6, 3),
+            "wall_ms": round(statistics.median(wall) * 1000, 3), "renders": renders, "answer_chars": length}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tokens", type=int, default=5000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--paced-tps", type=float, default=2000, help="token rate of the paced run (0 skips it)")
+    args = parser.parse_args()
+
+    results = {"config": {**vars(args), "flush_interval_s": settings.STREAM_FLUSH_INTERVAL_SECONDS,
+                          "flush_max_chars": settings.STREAM_FLUSH_MAX_CHARS}, "runs": {}}
+    for pace_name, tps in [("burst", 0), ("paced", args.paced_tps)]:
+        if pace_name == "paced" and not tps:
+            continue
+        # A paced stream takes tokens/tps seconds of wall time per pass, so it runs once
+        repeats = args.repeats if not tps else 1
+        before = measure(consume_per_token, args.tokens, tps, repeats)
+        after = measure(consume_coalesced, args.tokens, tps, repeats)
+        results["runs"][pace_name] = {"before": before, "after": after}
+        for label, run in (("before", before), ("after", after)):
+            print(f"{pace_name:<6} {label:<7} {run['cpu_us_per_token']:>9.2f}us CPU/token  "
+                  f"{run['renders']:>5} renders  cpu {run['cpu_ms']}ms  wall {run['wall_ms']}ms")
+    print(f"Saved to {save_results('streaming', results)}")
+
+
+if __name__ == "__main__":
+    main()
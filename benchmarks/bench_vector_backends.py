@@ -0,0 +1,93 @@
+"""Compares the Qdrant backends (embedded local, server, in-memory) on our workload shape.
+
+Usage:
+    python -m benchmarks.bench_vector_backends --points 20000 --queries 200 --modes memory local server
+
+Server mode is skipped when nothing answers at settings.QDRANT_URL.
+"""
+import argparse
+import random
+import tempfile
+import time
+from qdrant_client.models import PointStruct
+from app.core.config import settings
+from app.services import qdrant_backend
+from benchmarks.common import save_results, summarize_ms
+
+DIMENSION = 384  # all-MiniLM-L6-v2
+COLLECTION = "bench_research"
+PAYLOAD_TEXT = "lorem ipsum " * 80  # roughly one 1000-char chunk
+
+
+def _random_vector(rng):
+    vector = [rng.gauss(0, 1) for _ in range(DIMENSION)]
+    norm = sum(x * x for x in vector) ** 0.5
+    return [x / norm for x in vector]
+
+
+def run_mode(mode, points, queries, batch_size, seed):
+    rng = random.Random(seed)
+    settings.QDRANT_MODE = mode
+    client = qdrant_backend.create_client(mode)
+
+    if client.collection_exists(COLLECTION):
+        client.delete_collection(COLLECTION)
+    qdrant_backend.create_collection(client, COLLECTION, DIMENSION)
+
+    upsert_times = []
+    for start in range(0, points, batch_size):
+        batch = [PointStruct(id=i, vector=_random_vector(rng),
+                             payload={"page_content": PAYLOAD_TEXT, "metadata": {"page": i}})
+                 for i in range(start, min(start + batch_size, points))]
+        started = time.perf_counter()
+        client.upsert(collection_name=COLLECTION, points=batch, wait=True)
+        upsert_times.append(time.perf_counter() - started)
+
+    quantized = qdrant_backend.maybe_quantize(client, COLLECTION)
+
+    query_times = []
+    for _ in range(queries):
+        vector = _random_vector(rng)
+        started = time.perf_counter()
+        client.query_points(collection_name=COLLECTION, query=vector, limit=3, with_payload=True)
+        query_times.append(time.perf_counter() - started)
+
+    client.delete_collection(COLLECTION)
+    client.close()
+
+    upsert_s = sum(upsert_times)
+    return {
+        "points": points,
+        "quantized": quantized,
+        "upsert_points_per_s": round(points / upsert_s, 1) if upsert_s else None,
+        "upsert_batch": summarize_ms(upsert_times),
+        "query": summarize_ms(query_times),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=20_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--modes", nargs="+", default=["memory", "local", "server"],
+                        choices=qdrant_backend.QDRANT_MODES)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        # Never touch the real embedded store
+        settings.QDRANT_PATH = tmp
+        for mode in args.modes:
+            try:
+                results[mode] = run_mode(mode, args.points, args.queries, args.batch_size, args.seed)
+            except Exception as e:
+                results[mode] = {"skipped": str(e)}
+            print(f"{mode:>7}: {results[mode]}")
+
+    print(f"Saved to {save_results('vector_backends', results)}")
+
+
+if __name__ == "__main__":
+    main()
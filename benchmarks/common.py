@@ -0,0 +1,55 @@
+import json
+import subprocess
+from datetime import datetime
+from pathlib import Path
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers (pct in 0-100)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize_ms(samples_s):
+    """Turns a list of durations in seconds into p50/p95/max/mean milliseconds."""
+    samples_ms = [s * 1000 for s in samples_s]
+    return {
+        "count": len(samples_ms),
+        "mean_ms": round(sum(samples_ms) / len(samples_ms), 3) if samples_ms else None,
+        "p50_ms": round(percentile(samples_ms, 50), 3) if samples_ms else None,
+        "p95_ms": round(percentile(samples_ms, 95), 3) if samples_ms else None,
+        "max_ms": round(max(samples_ms), 3) if samples_ms else None,
+    }
+
+
+def mongomock_client():
+    """In-memory Mongo for benchmarks run without BENCH_MONGO_URI (mongomock isn't an app dependency)."""
+    try:
+        import mongomock
+    except ImportError:
+        raise SystemExit("This benchmark needs a Mongo: `pip install mongomock`, "
+                         "or set BENCH_MONGO_URI to a running mongod.") from None
+    return mongomock.MongoClient()
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=Path(__file__).parent,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def save_results(name, results):
+    """Writes results to benchmarks/results/<name>_<rev>_<timestamp>.json and returns the path."""
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    revision = git_revision()
+    path = RESULTS_DIR / f"{name}_{revision}_{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    path.write_text(json.dumps({"benchmark": name, "revision": revision, "results": results},
+                               indent=2, default=str))
+    return path
@@ -0,0 +1,88 @@
+"""Offline retrieval evaluation: recall@k and latency for dense, BM25, hybrid and hybrid+rerank.
+
+Loads the fixture corpus into an in-memory Qdrant collection using the same embeddings and
+BM25 encoder as Research Mode, then replays the labelled queries against every retrieval mode.
+
+Usage:
+    python -m benchmarks.eval_retrieval --repeats 5
+    python -m benchmarks.eval_retrieval --corpus path/to/corpus.json --no-rerank
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+from langchain_qdrant import QdrantVectorStore
+from qdrant_client.models import PointStruct
+from app.services import bm25, hybrid_retriever, qdrant_backend
+from app.services.vector_engine import get_embeddings
+from benchmarks.common import save_results, summarize_ms
+
+DEFAULT_CORPUS = Path(__file__).parent / "fixtures" / "retrieval_corpus.json"
+COLLECTION = "eval_corpus"
+RECALL_AT = (1, 3, 5)
+MODES = [("dense", False), ("sparse", False), ("hybrid", False), ("hybrid", True)]
+
+
+def build_collection(corpus, embeddings):
+    client = qdrant_backend.create_client("memory")
+    texts = [doc["text"] for doc in corpus["documents"]]
+    vectors = embeddings.embed_documents(texts)
+    qdrant_backend.create_collection(client, COLLECTION, len(vectors[0]))
+
+    client.upsert(collection_name=COLLECTION, wait=True, points=[
+        PointStruct(id=i,
+                    vector={"": vector, bm25.SPARSE_VECTOR_NAME: bm25.encode_document(doc["text"])},
+                    payload={"page_content": doc["text"], "metadata": {"doc_id": doc["id"]}})
+        for i, (doc, vector) in enumerate(zip(corpus["documents"], vectors))
+    ])
+    store = QdrantVectorStore(client=client, collection_name=COLLECTION, embedding=embeddings)
+    return client, store
+
+
+def evaluate(corpus, client, store, mode, use_rerank, repeats):
+    recalls = {k: [] for k in RECALL_AT}
+    latencies = []
+    for item in corpus["queries"]:
+        relevant = set(item["relevant"])
+        for _ in range(repeats):
+            start = time.perf_counter()
+            docs = hybrid_retriever.retrieve(item["query"], client=client, store=store,
+                                             collection_name=COLLECTION, k=max(RECALL_AT),
+                                             mode=mode, use_rerank=use_rerank, budget_ms=10_000)
+            latencies.append(time.perf_counter() - start)
+
+        ranked = [doc.metadata.get("doc_id") for doc in docs]
+        for k in RECALL_AT:
+            recalls[k].append(len(relevant & set(ranked[:k])) / len(relevant))
+
+    result = {f"recall@{k}": round(sum(v) / len(v), 4) for k, v in recalls.items()}
+    result["latency"] = summarize_ms(latencies)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS)
+    parser.add_argument("--repeats", type=int, default=5, help="Timed runs per query (recall uses the last).")
+    parser.add_argument("--no-rerank", action="store_true", help="Skip the cross-encoder mode.")
+    args = parser.parse_args()
+
+    corpus = json.loads(args.corpus.read_text())
+    client, store = build_collection(corpus, get_embeddings())
+
+    results = {}
+    for mode, use_rerank in MODES:
+        if use_rerank and args.no_rerank:
+            continue
+        name = f"{mode}+rerank" if use_rerank else mode
+        try:
+            results[name] = evaluate(corpus, client, store, mode, use_rerank, args.repeats)
+        except ImportError as e:
+            results[name] = {"skipped": str(e)}
+        print(f"{name:>13}: {results[name]}")
+
+    print(f"Saved to {save_results('retrieval_eval', results)}")
+
+
+if __name__ == "__main__":
+    main()
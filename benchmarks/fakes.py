@@ -0,0 +1,128 @@
+"""Local stand-ins for the services AVA talks to, so benchmarks run offline and repeatably."""
+import hashlib
+import math
+import time
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+FILLER = ("Progressive overload means adding a little load or a rep each week while recovery keeps up "
+          "protein intake sleep and total training volume decide how fast strength moves forward").split()
+
+
+class FakeStreamingChatModel(BaseChatModel):
+    """Chat model that streams `response_tokens` words at `tokens_per_second` after a fixed delay.
+
+    Args:
+        tokens_per_second (float): Streaming rate; 0 streams as fast as possible.
+        first_token_latency (float): Seconds before the first token (queueing + prefill).
+        response_tokens (int): Words in every answer.
+    """
+    tokens_per_second: float = 50.0
+    first_token_latency: float = 0.2
+    response_tokens: int = 200
+    model_name: str = "fake-streaming"
+
+    @property
+    def _llm_type(self):
+        return "fake-streaming"
+
+    def _tokens(self):
+        for i in range(self.response_tokens):
+            yield FILLER[i % len(FILLER)] + " "
+
+    def _first_token_delay(self, messages):
+        return self.first_token_latency
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self._first_token_delay(messages))
+        interval = 1 / self.tokens_per_second if self.tokens_per_second else 0
+        for token in self._tokens():
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+            if interval:
+                time.sleep(interval)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        text = "".join(chunk.message.content for chunk in self._stream(messages, stop=stop))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+
+class ScriptedChatModel(FakeStreamingChatModel):
+    """Fake provider whose first-token delay is scripted per call.
+
+    Args:
+        script (callable): (call number, prompt tokens) -> seconds before the first token, or an
+            exception to raise instead of answering. Prompt tokens are estimated at 4 chars each.
+    """
+    script: object = None
+    calls: int = 0
+
+    def _first_token_delay(self, messages):
+        self.calls += 1
+        prompt_tokens = sum(len(str(message.content)) for message in messages) // 4
+        outcome = self.script(self.calls, prompt_tokens)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+class HashingEmbeddings(Embeddings):
+    """Deterministic bag-of-words vectors (feature hashing), no model download needed.
+
+    Similar texts share words and therefore land close together, which is enough to exercise
+    retrieval and the response cache; the quality numbers mean nothing.
+    """
+    model_name = "hashing"
+
+    def __init__(self, dimension=384):
+        self.dimension = dimension
+
+    def _embed(self, text):
+        vector = [0.0] * self.dimension
+        for word in text.lower().split():
+            digest = hashlib.blake2b(word.encode(), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dimension
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+        return [x / norm for x in vector]
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+def write_text_pdf(path, pages, line_chars=90):
+    """Writes a minimal single-font PDF with one text page per string in `pages`."""
+    objects = {1: "<< /Type /Catalog /Pages 2 0 R >>",
+               3: "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"}
+    kids = []
+    for i, text in enumerate(pages):
+        page_id, content_id = 4 + 2 * i, 5 + 2 * i
+        kids.append(f"{page_id} 0 R")
+        escaped = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+        lines = [escaped[start:start + line_chars] for start in range(0, len(escaped), line_chars)]
+        stream = "BT /F1 9 Tf 30 780 Td 11 TL " + " ".join(f"({line}) '" for line in lines) + " ET"
+        objects[page_id] = (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>")
+        objects[content_id] = f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream"
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for number in sorted(objects):
+        offsets[number] = len(out)
+        out += f"{number} 0 obj\n{objects[number]}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    size = max(objects) + 1
+    out += f"xref\n0 {size}\n0000000000 65535 f \n".encode()
+    for number in range(1, size):
+        out += f"{offsets[number]:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    with open(path, "wb") as f:
+        f.write(out)